@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from . import __version__
+from .orchestrator import Orchestrator
+from .webserver import SSE_HEARTBEAT, Response, StreamResponse, WebApp, build_app
+
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 10 * 1024 * 1024
+KEEPALIVE_TIMEOUT = 75  # seconds an idle keep-alive connection is kept open
+# Routes whose handling blocks on the LLM; everything else is answered on the loop
+BLOCKING_ROUTES = {"/api/chat", "/api/approve"}
+
+
+class BadRequest(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    def __init__(self, method: str, path: str, version: str, headers: Dict[str, str], body: bytes) -> None:
+        self.method = method
+        self.path = path
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self) -> bool:
+        conn = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return conn == "keep-alive"
+        return conn != "close"
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    """Parse one HTTP/1.x request; None when the client closed the connection."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if not e.partial.strip():
+            return None
+        raise BadRequest(400, "incomplete request head")
+    except asyncio.LimitOverrunError:
+        raise BadRequest(431, "request head too large")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, path, version = lines[0].split(" ")
+    except ValueError:
+        raise BadRequest(400, "malformed request line")
+    if not version.startswith("HTTP/1."):
+        raise BadRequest(505, "unsupported HTTP version")
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(":")
+        if not sep:
+            raise BadRequest(400, "malformed header")
+        name = name.strip().lower()
+        value = value.strip()
+        headers[name] = f"{headers[name]}, {value}" if name in headers else value
+    if headers.get("transfer-encoding", "identity").lower() != "identity":
+        raise BadRequest(501, "request transfer-encoding not supported")
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise BadRequest(400, "bad content-length")
+    if length < 0 or length > MAX_BODY_BYTES:
+        raise BadRequest(413, "request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return Request(method.upper(), path, version, headers, body)
+
+
+def response_head(status: int, headers: List[Tuple[str, str]]) -> bytes:
+    try:
+        reason = HTTPStatus(status).phrase
+    except ValueError:
+        reason = ""
+    lines = [f"HTTP/1.1 {status} {reason}", f"Server: agentic/{__version__}"]
+    lines.extend(f"{k}: {v}" for k, v in headers)
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+class AsyncServer:
+    """Single-threaded asyncio HTTP/1.1 front end for WebApp.
+
+    Connections, request parsing and SSE writes all live on the event loop, so
+    idle or slow clients cost a coroutine rather than an OS thread. Blocking
+    work (orchestrator runs: LLM calls and tools) goes to a bounded worker
+    pool; SSE events are handed from the worker to the connection through a
+    queue, so a slow reader never stalls the run.
+    """
+
+    def __init__(self, app: WebApp, workers: int = 16) -> None:
+        self.app = app
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="agentic-web")
+        self.counters: Dict[str, int] = {"connections": 0, "requests": 0, "streams": 0, "open_streams": 0}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.counters["connections"] += 1
+        try:
+            while True:
+                try:
+                    req = await asyncio.wait_for(read_request(reader), KEEPALIVE_TIMEOUT)
+                except BadRequest as e:
+                    await self._write(writer, Response(e.status, str(e).encode("utf-8"), "text/plain"), keep_alive=False)
+                    break
+                except (asyncio.TimeoutError, ConnectionError):
+                    break
+                if req is None:
+                    break
+                self.counters["requests"] += 1
+                if not await self._dispatch(req, reader, writer):
+                    break
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def _dispatch(self, req: Request, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """Handle one request; returns whether the connection can be reused."""
+        loop = asyncio.get_running_loop()
+        if urlparse(req.path).path in BLOCKING_ROUTES:
+            resp = await loop.run_in_executor(self.executor, self.app.handle, req.method, req.path, req.headers, req.body)
+        else:
+            resp = self.app.handle(req.method, req.path, req.headers, req.body)
+        if isinstance(resp, StreamResponse):
+            await self._stream(resp, reader, writer)
+            return False
+        return await self._write(writer, resp, keep_alive=req.keep_alive)
+
+    async def _write(self, writer: asyncio.StreamWriter, resp: Response, keep_alive: bool) -> bool:
+        headers = [("Content-Type", resp.content_type), ("Content-Length", str(len(resp.body)))]
+        headers.extend(resp.headers)
+        headers.append(("Connection", "keep-alive" if keep_alive else "close"))
+        try:
+            writer.write(response_head(resp.status, headers) + resp.body)
+            await writer.drain()
+        except ConnectionError:
+            return False
+        return keep_alive
+
+    async def _stream(self, resp: StreamResponse, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        left = object()  # queued when the client disconnects
+
+        def listener(frame: Optional[bytes]) -> None:
+            # Called from the run's worker thread, timers or the loop itself
+            loop.call_soon_threadsafe(queue.put_nowait, frame)
+
+        def spawn(fn: Callable[[], None]) -> None:
+            loop.run_in_executor(self.executor, fn)
+
+        def schedule(delay: float, fn: Callable[[], None]) -> None:
+            # Coalescing window timers run on the loop instead of extra threads
+            loop.call_soon_threadsafe(loop.call_later, delay, fn)
+
+        async def watch_disconnect() -> None:
+            # The client sends nothing more on an SSE connection; EOF means it left
+            try:
+                await reader.read(1)
+            except Exception:
+                pass
+            queue.put_nowait(left)
+
+        headers = [("Content-Type", "text/event-stream"), ("Cache-Control", "no-cache"), ("Connection", "close")]
+        headers.extend(resp.headers)
+        self.counters["streams"] += 1
+        self.counters["open_streams"] += 1
+        watcher = asyncio.ensure_future(watch_disconnect())
+        # The run is detached: a disconnect only drops this listener
+        resp.open(listener, spawn=spawn, schedule=schedule)
+        try:
+            writer.write(response_head(200, headers))
+            await writer.drain()
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    frame = b": ping\n\n"
+                if frame is None or frame is left:
+                    break
+                writer.write(frame)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.counters["open_streams"] -= 1
+            watcher.cancel()
+            resp.close(listener)
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False)
+        self.app.close()
+
+
+def serve_async(orch: Orchestrator, port: int = 8080) -> int:
+    server = AsyncServer(build_app(orch), workers=orch.config.serve_workers)
+    print(f"Serving web UI on http://0.0.0.0:{port} (asyncio)")
+    try:
+        asyncio.run(server.serve("0.0.0.0", port))
+    except KeyboardInterrupt:
+        print("Shutting down...")
+    finally:
+        server.close()
+    return 0
@@ -11,9 +11,20 @@ from .providers.anthropic_provider import AnthropicProvider
 from .providers.ollama_provider import OllamaProvider
 from .providers.openrouter_provider import OpenRouterProvider
 from .providers.lmstudio_provider import LMStudioProvider
+from .providers.cache import CachingProvider, ResponseCache
+from .providers.transport import shared_transport
 
 
 def build_provider(cfg):
+    provider = _build_backend(cfg)
+    if cfg.llm_cache:
+        cache = ResponseCache(cfg.llm_cache_dir, max_bytes=cfg.llm_cache_max_mb * 1024 * 1024, max_age=cfg.llm_cache_max_age)
+        provider = CachingProvider(provider, cache, name=cfg.provider)
+    return provider
+
+
+def _build_backend(cfg):
+    shared_transport().configure(max_per_host=cfg.http_pool_size, idle_timeout=cfg.http_idle_timeout)
     if cfg.provider == "openai":
         if not cfg.openai_api_key:
             print("OPENAI_API_KEY is required for OpenAI provider", file=sys.stderr)
@@ -62,9 +73,13 @@ def parse_args(argv: Optional[list] = None):
     p.add_argument("--stream", dest="stream", action="store_true", help="스트리밍 출력 사용")
     p.add_argument("--no-stream", dest="stream", action="store_false", help="스트리밍 끔")
     p.set_defaults(stream=None)
+    p.add_argument("--json-mode", choices=["off", "json", "schema"], default=None, help="구조화 출력 강제(json: JSON 모드, schema: 프로토콜 JSON 스키마)")
+    p.add_argument("--tool-mode", choices=["json", "native"], default=None, help="도구 호출 방식(json: 텍스트 JSON 프로토콜, native: 프로바이더 tool calling)")
+    p.add_argument("--llm-cache", dest="llm_cache", action="store_true", default=None, help="동일한 LLM 요청을 디스크 캐시에서 응답(temperature 0 전제)")
     p.add_argument("--chat", action="store_true", help="대화형 모드")
     p.add_argument("--serve", action="store_true", help="웹 UI 서버 실행")
     p.add_argument("--port", type=int, default=None, help="웹 서버 포트(기본: AGENT_SERVE_PORT 또는 8080)")
+    p.add_argument("--serve-mode", choices=["thread", "asyncio"], default=None, help="웹 서버 방식(asyncio: 다수의 SSE 연결을 스레드 없이 처리)")
     return p.parse_args(argv)
 
 
@@ -86,7 +101,12 @@ def main(argv: Optional[list] = None) -> int:
         reasoning_effort=args.reasoning_effort,
         lmstudio_base_url=args.lmstudio_url,
         stream=args.stream,
+        tool_mode=args.tool_mode,
+        json_mode=args.json_mode,
+        llm_cache=args.llm_cache,
     )
+    if args.serve_mode:
+        cfg.serve_mode = args.serve_mode
     provider = build_provider(cfg)
     orch = Orchestrator(provider, cfg)
     if args.serve:
@@ -16,14 +16,43 @@ class AppConfig:
     max_steps: int = 12
     request_timeout: int = 120  # seconds for LLM HTTP
     tool_timeout: int = 180  # seconds for tools (shell etc.)
+    tool_workers: int = 4  # concurrent read-only tool calls per turn
+    memory_vec_dtype: str = "float32"  # float32|int8: row format of a new memory.vec sidecar
+    memory_compact_ratio: float = 0.5  # compact memory.jsonl once this share of its lines is superseded/deleted
+    memory_keyword_weight: float = 0.5  # memory_search: BM25 share of the fused score; 0 is vector-only
+    memory_ann: bool = False  # approximate (IVF) vector search for large memory stores; needs numpy; trains inline on the first search past 5000 vectors
+    memory_ann_nprobe: int = 32  # IVF lists scanned per query: higher is slower but closer to exact
+    tool_cache: bool = True  # memoize read-only tool results within a session
+    context_budget: int = 32000  # estimated prompt tokens per LLM call; 0 disables trimming
     verbose: bool = False
     log_dir: Path = Path("logs")
     config_dir: Path = Path(".agentic")
     mcp_registry_file: Path = Path(".agentic/mcp_registry.json")
     serve_port: int = 8080
+    serve_mode: str = "thread"  # thread (ThreadingHTTPServer) | asyncio
+    serve_workers: int = 16  # asyncio mode: threads running orchestrator work
+    sse_coalesce_ms: int = 30  # web UI: merge token deltas within this window; 0 sends each delta
+    sse_coalesce_bytes: int = 4096  # ...or once this much text is buffered
+    serve_replay_events: int = 2000  # SSE events kept per session for Last-Event-ID resume
+    serve_detach_grace: int = 300  # seconds a run keeps going with no client attached
+    serve_max_sessions: int = 64  # live web sessions, each with its own Orchestrator
+    serve_session_idle: int = 1800  # seconds before an idle web session is dropped
+    serve_tool_preview: int = 4096  # web UI: tool results longer than this (chars) are sent as a preview; 0 sends all
+    serve_tool_results_mb: int = 16  # per session: full text of previewed results kept for /api/tool_result
+    serve_job_workers: int = 4  # /api/jobs: background jobs run concurrently
+    serve_job_queue: int = 100  # jobs waiting for a worker before submissions get 429
+    serve_job_retain: int = 500  # finished jobs kept for status/event polling
     reasoning_mode: str = "auto"  # off|on|auto
     reasoning_effort: str = "medium"  # low|medium|high
     stream: bool = True
+    tool_mode: str = "json"  # json (protocol JSON in text) | native (provider tool calling)
+    json_mode: str = "off"  # off|json|schema: constrain output via the backend's structured-output feature
+    http_pool_size: int = 4  # idle keep-alive connections kept per LLM host
+    http_idle_timeout: int = 60  # seconds before an idle connection is dropped
+    llm_cache: bool = False  # serve identical LLM requests from an on-disk cache
+    llm_cache_dir: Path = Path(".agentic/llm_cache")
+    llm_cache_max_mb: int = 256
+    llm_cache_max_age: int = 7 * 86400  # seconds
 
     # Provider-specific
     openai_api_key: Optional[str] = None
@@ -60,6 +89,9 @@ def load_from_env(
     reasoning_mode: Optional[str] = None,
     reasoning_effort: Optional[str] = None,
     stream: Optional[bool] = None,
+    tool_mode: Optional[str] = None,
+    json_mode: Optional[str] = None,
+    llm_cache: Optional[bool] = None,
 ) -> AppConfig:
     cfg = AppConfig()
     if provider:
@@ -109,11 +141,32 @@ def load_from_env(
         cfg.tool_timeout = tool_timeout
     else:
         cfg.tool_timeout = int(getenv("AGENT_TOOL_TIMEOUT", str(cfg.tool_timeout)))
+    cfg.tool_workers = int(getenv("AGENT_TOOL_WORKERS", str(cfg.tool_workers)))
+    cfg.tool_cache = getenv("AGENT_TOOL_CACHE", "true").lower() in {"1", "true", "yes", "on"}
+    cfg.memory_vec_dtype = getenv("AGENT_MEMORY_VEC_DTYPE", cfg.memory_vec_dtype)
+    cfg.memory_compact_ratio = float(getenv("AGENT_MEMORY_COMPACT_RATIO", str(cfg.memory_compact_ratio)))
+    cfg.memory_keyword_weight = float(getenv("AGENT_MEMORY_KEYWORD_WEIGHT", str(cfg.memory_keyword_weight)))
+    cfg.memory_ann = getenv("AGENT_MEMORY_ANN", "false").lower() in {"1", "true", "yes", "on"}
+    cfg.memory_ann_nprobe = int(getenv("AGENT_MEMORY_ANN_NPROBE", str(cfg.memory_ann_nprobe)))
+    cfg.context_budget = int(getenv("AGENT_CONTEXT_BUDGET", str(cfg.context_budget)))
 
     if serve_port is not None:
         cfg.serve_port = serve_port
     else:
         cfg.serve_port = int(getenv("AGENT_SERVE_PORT", str(cfg.serve_port)))
+    cfg.serve_mode = getenv("AGENT_SERVE_MODE", cfg.serve_mode)
+    cfg.serve_workers = int(getenv("AGENT_SERVE_WORKERS", str(cfg.serve_workers)))
+    cfg.sse_coalesce_ms = int(getenv("AGENT_SSE_COALESCE_MS", str(cfg.sse_coalesce_ms)))
+    cfg.sse_coalesce_bytes = int(getenv("AGENT_SSE_COALESCE_BYTES", str(cfg.sse_coalesce_bytes)))
+    cfg.serve_replay_events = int(getenv("AGENT_SERVE_REPLAY_EVENTS", str(cfg.serve_replay_events)))
+    cfg.serve_detach_grace = int(getenv("AGENT_SERVE_DETACH_GRACE", str(cfg.serve_detach_grace)))
+    cfg.serve_max_sessions = int(getenv("AGENT_SERVE_MAX_SESSIONS", str(cfg.serve_max_sessions)))
+    cfg.serve_session_idle = int(getenv("AGENT_SERVE_SESSION_IDLE", str(cfg.serve_session_idle)))
+    cfg.serve_tool_preview = int(getenv("AGENT_SERVE_TOOL_PREVIEW", str(cfg.serve_tool_preview)))
+    cfg.serve_tool_results_mb = int(getenv("AGENT_SERVE_TOOL_RESULTS_MB", str(cfg.serve_tool_results_mb)))
+    cfg.serve_job_workers = int(getenv("AGENT_SERVE_JOB_WORKERS", str(cfg.serve_job_workers)))
+    cfg.serve_job_queue = int(getenv("AGENT_SERVE_JOB_QUEUE", str(cfg.serve_job_queue)))
+    cfg.serve_job_retain = int(getenv("AGENT_SERVE_JOB_RETAIN", str(cfg.serve_job_retain)))
     if reasoning_mode:
         cfg.reasoning_mode = reasoning_mode
     else:
@@ -127,6 +180,27 @@ def load_from_env(
     else:
         cfg.stream = getenv("AGENT_STREAM", "true").lower() in {"1", "true", "yes", "on"}
 
+    cfg.http_pool_size = int(getenv("AGENT_HTTP_POOL_SIZE", str(cfg.http_pool_size)))
+    cfg.http_idle_timeout = int(getenv("AGENT_HTTP_IDLE_TIMEOUT", str(cfg.http_idle_timeout)))
+
+    if tool_mode:
+        cfg.tool_mode = tool_mode
+    else:
+        cfg.tool_mode = getenv("AGENT_TOOL_MODE", cfg.tool_mode)
+
+    if json_mode:
+        cfg.json_mode = json_mode
+    else:
+        cfg.json_mode = getenv("AGENT_JSON_MODE", cfg.json_mode)
+
+    if llm_cache is not None:
+        cfg.llm_cache = llm_cache
+    else:
+        cfg.llm_cache = getenv("AGENT_LLM_CACHE", "false").lower() in {"1", "true", "yes", "on"}
+    cfg.llm_cache_dir = Path(getenv("AGENT_LLM_CACHE_DIR", str(cfg.config_dir / "llm_cache"))).resolve()
+    cfg.llm_cache_max_mb = int(getenv("AGENT_LLM_CACHE_MAX_MB", str(cfg.llm_cache_max_mb)))
+    cfg.llm_cache_max_age = int(getenv("AGENT_LLM_CACHE_MAX_AGE", str(cfg.llm_cache_max_age)))
+
     if verbose is not None:
         cfg.verbose = verbose
     else:
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .providers.base import Message
+from .utils import summarize
+
+
+# Approximate characters per token for ASCII text, by model family substring.
+# Non-ASCII text (Korean etc.) is counted as one token per character.
+CHARS_PER_TOKEN = [
+    ("claude", 3.5),
+    ("gpt", 4.0),
+    ("o1", 4.0),
+    ("o3", 4.0),
+    ("o4", 4.0),
+    ("qwen", 3.3),
+    ("llama", 3.8),
+    ("mistral", 3.6),
+    ("deepseek", 3.6),
+    ("gemma", 4.0),
+]
+DEFAULT_CHARS_PER_TOKEN = 4.0
+MESSAGE_OVERHEAD = 4  # role markers and separators per message
+
+TOOL_RESULT_PREFIX = "TOOL_RESULT["
+
+
+def chars_per_token(model: str) -> float:
+    lower = (model or "").lower()
+    for key, ratio in CHARS_PER_TOKEN:
+        if key in lower:
+            return ratio
+    return DEFAULT_CHARS_PER_TOKEN
+
+
+def estimate_tokens(text: str, model: str = "") -> int:
+    ascii_len = len(text.encode("ascii", "ignore"))
+    return int(ascii_len / chars_per_token(model)) + (len(text) - ascii_len)
+
+
+def _is_tool_result(m: Message) -> bool:
+    return m.get("role") == "user" and m.get("content", "").startswith(TOOL_RESULT_PREFIX)
+
+
+class ContextManager:
+    """Fits the conversation into a token budget before it is sent to the provider.
+
+    Old tool results are shrunk first, then dropped, then old turns are dropped,
+    oldest first. System messages, the first and the latest user request and
+    the newest message are always kept. Requests are the indices the caller
+    passes; reprompts, approval continuations and tool feedback are also user
+    messages, so without them any non-tool-result user message counts. The
+    orchestrator's own history is not modified.
+    """
+
+    def __init__(self, budget: int, shrink_chars: int = 400) -> None:
+        self.budget = budget
+        self.shrink_chars = shrink_chars
+
+    def message_tokens(self, m: Message, model: str) -> int:
+        return estimate_tokens(m.get("content", ""), model) + MESSAGE_OVERHEAD
+
+    def estimate(self, messages: List[Message], model: str) -> int:
+        return sum(self.message_tokens(m, model) for m in messages)
+
+    def _pinned(self, messages: List[Message], requests: Optional[Sequence[int]] = None) -> Set[int]:
+        pinned = {i for i, m in enumerate(messages) if m.get("role") == "system"}
+        if messages:
+            pinned.add(len(messages) - 1)
+        if requests is None:
+            requests = [i for i, m in enumerate(messages) if m.get("role") == "user" and m.get("content") and not _is_tool_result(m)]
+        valid = [i for i in requests if 0 <= i < len(messages)]
+        if valid:
+            pinned.update((valid[0], valid[-1]))
+        return pinned
+
+    def _shrink(self, content: str) -> str:
+        # Batched results are one line per call; shrink each so none disappears
+        return "\n".join(summarize(line, self.shrink_chars) for line in content.split("\n"))
+
+    def fit(self, messages: List[Message], model: str, requests: Optional[Sequence[int]] = None) -> Tuple[List[Message], Dict[str, int]]:
+        sizes = [self.message_tokens(m, model) for m in messages]
+        before = sum(sizes)
+        if self.budget <= 0 or before <= self.budget:
+            return messages, {"tokens_before": before, "tokens_after": before, "saved": 0, "dropped": 0}
+        out = list(messages)
+        total = before
+        pinned = self._pinned(out, requests)
+        # 1) shrink old tool results, oldest first
+        for i, m in enumerate(out):
+            if total <= self.budget:
+                break
+            if i in pinned or not _is_tool_result(m):
+                continue
+            shrunk = self._shrink(m["content"])
+            if shrunk != m["content"]:
+                out[i] = {**m, "content": shrunk}
+                new_size = self.message_tokens(out[i], model)
+                total -= sizes[i] - new_size
+                sizes[i] = new_size
+        # 2) drop old tool results, then 3) old turns, oldest first
+        dropped: Set[int] = set()
+        for only_tool_results in (True, False):
+            for i, m in enumerate(out):
+                if total <= self.budget:
+                    break
+                if i in pinned or i in dropped or (only_tool_results and not _is_tool_result(m)):
+                    continue
+                dropped.add(i)
+                total -= sizes[i]
+        if dropped:
+            out = [m for i, m in enumerate(out) if i not in dropped]
+        return out, {"tokens_before": before, "tokens_after": total, "saved": before - total, "dropped": len(dropped)}
@@ -56,6 +56,10 @@ class CLISink(EventSink):
             print("[assistant]", text)
 
     def on_tool_call(self, tool: str, tool_id: str, args: Dict[str, Any], note: Optional[str] = None) -> None:
+        if self._stream_started:
+            # End a streamed preamble line before the tool output
+            print()
+            self._stream_started = False
         line = f"[tool call] id={tool_id} tool={tool} args={args}"
         if note:
             line += f" note={note}"
@@ -98,7 +102,11 @@ class CLISink(EventSink):
 
     def on_final(self, content: str) -> None:
         print()  # ensure newline after streaming
-        print("assistant>", content)
+        streamed = self._stream_started
+        self._stream_started = False
+        self._stream_reason_started = False
+        if not streamed:
+            print("assistant>", content)
 
     def on_reasoning(self, text: Optional[str]) -> None:
         if text:
@@ -119,7 +127,7 @@ class CLISink(EventSink):
     def on_stream_text(self, text: str) -> None:
         import sys
         if not self._stream_started:
-            sys.stdout.write("assistant> ")
+            sys.stdout.write("\nassistant> " if self._stream_reason_started else "assistant> ")
             self._stream_started = True
         sys.stdout.write(text)
         sys.stdout.flush()
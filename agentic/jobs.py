@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import queue
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from .events import EventRecorder
+from .orchestrator import Orchestrator
+
+
+QUEUED = "queued"
+RUNNING = "running"
+NEEDS_APPROVAL = "needs_approval"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELED = "canceled"
+TERMINAL = {SUCCEEDED, FAILED, CANCELED}
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, job_id: str, text: str, auto_approve: bool) -> None:
+        self.id = job_id
+        self.input = text
+        self.auto_approve = auto_approve
+        self.status = QUEUED
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.result: Optional[str] = None
+        self.error: Optional[str] = None
+        self.pending: Optional[Dict[str, Any]] = None
+        self.cancel_requested = False
+        self.orch: Optional[Orchestrator] = None
+        self._log: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self.continuation: Optional[Callable[[JobSink], None]] = None
+
+    def append(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            self._log.append({"seq": len(self._log) + 1, **event})
+        # chat_stream resets the cancel flag when it starts; re-assert it
+        if self.cancel_requested and self.orch is not None:
+            self.orch.request_cancel()
+
+    def events_after(self, after: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._log[max(0, after):max(0, after) + limit]
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            n = len(self._log)
+        return {
+            "id": self.id,
+            "status": self.status,
+            "input": self.input,
+            "auto_approve": self.auto_approve,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "result": self.result,
+            "error": self.error,
+            "pending": self.pending,
+            "events": n,
+        }
+
+
+class _JobLog(list):
+    def __init__(self, job: Job) -> None:
+        super().__init__()
+        self._job = job
+
+    def append(self, event: Dict[str, Any]) -> None:  # type: ignore[override]
+        self._job.append(event)
+
+
+class JobSink(EventRecorder):
+    """Records into the job's event log and applies its approval policy."""
+
+    def __init__(self, job: Job) -> None:
+        super().__init__()
+        self.job = job
+        self.events = _JobLog(job)
+
+    def on_approval_required(self, tool, tool_id, reason, args, token=None) -> Any:  # True, or the recorder's defer sentinel
+        if self.job.auto_approve:
+            self.events.append({"type": "approval", "tool": tool, "id": tool_id, "reason": reason, "args": args, "token": token, "auto": True})
+            return True
+        return super().on_approval_required(tool, tool_id, reason, args, token)
+
+    def on_final(self, content: str) -> None:
+        super().on_final(content)
+        self.job.result = content
+
+
+class JobManager:
+    """Background task runner: a bounded queue drained by a fixed worker pool.
+
+    Each job gets its own Orchestrator from factory and runs to completion on
+    a worker thread, recording its events for polling. submit() raises
+    JobQueueFull once max_queue jobs are waiting, which callers turn into
+    back-pressure. A job that hits an approval (without auto_approve) parks
+    in needs_approval, keeping its Orchestrator, until approve() queues the
+    continuation. Only the newest max_retained finished jobs are kept.
+    """
+
+    def __init__(self, factory: Callable[[], Orchestrator], workers: int = 4, max_queue: int = 100, max_retained: int = 500) -> None:
+        self.factory = factory
+        self.workers = max(1, workers)
+        self.max_retained = max_retained
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=max(1, max_queue))
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._running = 0
+        self.counters: Dict[str, int] = {"submitted": 0, "rejected": 0, SUCCEEDED: 0, FAILED: 0, CANCELED: 0}
+
+    def _start_workers(self) -> None:
+        # Caller holds the lock; threads start with the first job
+        while len(self._threads) < self.workers:
+            t = threading.Thread(target=self._work, name=f"agentic-job-{len(self._threads)}", daemon=True)
+            self._threads.append(t)
+            t.start()
+
+    def _enqueue(self, job: Job) -> None:
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self.counters["rejected"] += 1
+            raise JobQueueFull(f"job queue is full ({self._queue.maxsize} waiting)")
+
+    def submit(self, text: str, auto_approve: bool = False) -> Job:
+        job = Job(secrets.token_urlsafe(9), text, auto_approve)
+        with self._lock:
+            self._start_workers()
+        self._enqueue(job)
+        with self._lock:
+            self._jobs[job.id] = job
+            self.counters["submitted"] += 1
+            self._prune()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, status: Optional[str] = None, offset: int = 0, limit: int = 50) -> Dict[str, Any]:
+        with self._lock:
+            jobs = [j for j in reversed(self._jobs.values()) if status is None or j.status == status]
+        return {"jobs": [j.summary() for j in jobs[offset:offset + limit]], "total": len(jobs), "offset": offset, "limit": limit}
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None or job.status in TERMINAL:
+            return job
+        job.cancel_requested = True
+        # Not on a worker: finish it here (a queued one is skipped when dequeued)
+        if not self._finish(job, CANCELED, only_from={QUEUED, NEEDS_APPROVAL}) and job.orch is not None:
+            job.orch.request_cancel()
+        return job
+
+    def approve(self, job_id: str, token: str, approve: bool) -> Optional[Job]:
+        """Queue the continuation of a job parked on token; None if there is nothing to resolve."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != NEEDS_APPROVAL or not job.pending or job.pending.get("token") != token:
+                return None
+            job.pending = None
+            job.status = QUEUED
+        orch = job.orch
+
+        def resume(sink: JobSink) -> None:
+            result = orch.resolve_approval(token, approve, sink=sink)
+            if result.get("approved") and not orch.has_pending_approval():
+                orch.chat_stream("", sink=sink)
+
+        job.continuation = resume
+        try:
+            self._enqueue(job)
+        except JobQueueFull:
+            with self._lock:
+                job.continuation = None
+                job.pending = orch.get_pending_info()
+                job.status = NEEDS_APPROVAL
+            raise
+        return job
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                if job.status != QUEUED:  # canceled while waiting
+                    continue
+                job.status = RUNNING
+                self._running += 1
+            try:
+                self._run(job)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+    def _run(self, job: Job) -> None:
+        job.started = job.started or time.time()
+        sink = JobSink(job)
+        try:
+            if job.orch is None:
+                job.orch = self.factory()
+            step, job.continuation = job.continuation, None
+            if job.cancel_requested:
+                pass  # canceled before the run started
+            elif step is not None:
+                step(sink)
+            else:
+                job.orch.chat_stream(job.input, sink=sink)
+        except Exception as e:
+            job.error = str(e)
+            job.append({"type": "error", "error": str(e)})
+            self._finish(job, FAILED)
+            return
+        if job.cancel_requested:
+            self._finish(job, CANCELED)
+        elif job.orch.has_pending_approval():
+            with self._lock:
+                job.pending = job.orch.get_pending_info()
+                job.status = NEEDS_APPROVAL
+        else:
+            job.result = job.result or ""
+            self._finish(job, SUCCEEDED)
+
+    def _finish(self, job: Job, status: str, only_from: Optional[set] = None) -> bool:
+        with self._lock:
+            if job.status in TERMINAL or (only_from is not None and job.status not in only_from):
+                return False
+            job.status = status
+            job.finished = time.time()
+            job.pending = None
+            self.counters[status] += 1
+            orch, job.orch = job.orch, None
+            self._prune()
+        if orch is not None:
+            orch.close()
+        return True
+
+    def _prune(self) -> None:
+        # Caller holds the lock; drop the oldest finished jobs beyond the limit
+        done = [j for j in self._jobs.values() if j.status in TERMINAL]
+        for j in done[:max(0, len(done) - self.max_retained)]:
+            del self._jobs[j.id]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            parked = sum(1 for j in self._jobs.values() if j.status == NEEDS_APPROVAL)
+            return {**self.counters, "queued": self._queue.qsize(), "running": self._running, "needs_approval": parked, "workers": self.workers, "max_queue": self._queue.maxsize}
+
+    def close(self) -> None:
+        with self._lock:
+            jobs = list(self._jobs.values())
+            threads = list(self._threads)
+        for job in jobs:
+            if job.status not in TERMINAL:
+                self.cancel(job.id)
+        for _ in threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
 import json
-from typing import Dict, List, Any, Tuple
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
 
 from .config import AppConfig
+from .context import ContextManager, estimate_tokens
+from . import metrics
+from .tool_cache import ToolResultCache
 from .logging_utils import log_jsonl
 from .providers.base import Message
 from .tools import (
@@ -43,7 +49,7 @@ from .mcp.registry import load_registry, save_registry, MCPServer, parse_command
 from .mcp.client import MCPStdIOClient
 from .events import EventSink, NullSink, APPROVAL_DEFER
 import uuid
-from .utils import extract_json_object, summarize
+from .utils import FinalContentStreamer, JSONStreamScanner, extract_json_object, summarize
 
 
 TOOL_SCHEMA = {
@@ -97,15 +103,144 @@ TOOL_SCHEMA = {
 }
 
 
+TOOL_DESCRIPTIONS = {
+    "run_shell": "Run a command (split with shlex, no shell features) with optional timeout and cwd.",
+    "read_file": "Read a text file under the workspace root.",
+    "write_file": "Write or append text to a file under the workspace root.",
+    "list_dir": "List a directory under the workspace root.",
+    "web_get": "HTTP GET a URL and return the body text.",
+    "web_search": "Search the web (DuckDuckGo) and return titles and URLs.",
+    "tmux": "Control tmux sessions: ensure, send a command, capture output, list.",
+    "manage_service": "Manage a systemd unit (system or user).",
+    "git": "Run a git command given as an argument string.",
+    "browser_headless": "Dump a page's DOM with headless Chromium (falls back to web_get).",
+    "mcp": "Manage MCP servers and call their tools.",
+    "delete_path": "Delete a file or directory under the workspace root.",
+    "move_path": "Move a file or directory under the workspace root.",
+    "copy_path": "Copy a file or directory under the workspace root.",
+    "make_dir": "Create a directory (with parents) under the workspace root.",
+    "replace_in_file": "Replace text (literal or regex) in a file under the workspace root.",
+    "memory_add": "Store a note in long-term memory with optional tags.",
+    "memory_search": "Search long-term memory by similarity.",
+    "memory_delete": "Delete a memory entry by id.",
+    "memory_list": "List recent memory entries.",
+    "memory_update": "Update a memory entry's text, tags or meta.",
+    "plan": "Create and track multi-step plans.",
+}
+
+PROTOCOL_TYPES = {"tool", "tools", "final"}
+
+_SCHEMA_TYPES = {"str": "string", "int": "integer", "bool": "boolean", "array": "array", "list": "array", "object": "object"}
+
+
+def _arg_schema(spec: str) -> Tuple[Dict[str, Any], bool]:
+    # "str", "int(optional)", "str(a|b|c)", "str|list(optional)"
+    m = re.match(r"^([\w|]+)(?:\((.*)\))?$", spec)
+    base, extra = (m.group(1), m.group(2)) if m else ("str", None)
+    types = [_SCHEMA_TYPES.get(t, "string") for t in base.split("|")]
+    schema: Dict[str, Any] = {"type": types[0] if len(types) == 1 else types}
+    if "array" in types:
+        schema["items"] = {"type": "string"}
+    if extra == "optional":
+        return schema, False
+    if extra:
+        schema["enum"] = extra.split("|")
+    return schema, True
+
+
+def tool_json_schemas() -> List[Dict[str, Any]]:
+    """TOOL_SCHEMA as provider-neutral tool specs with JSON Schema parameters."""
+    specs = []
+    for name, spec in TOOL_SCHEMA.items():
+        props: Dict[str, Any] = {}
+        required = []
+        for arg, desc in spec["args"].items():
+            props[arg], is_required = _arg_schema(desc)
+            if is_required:
+                required.append(arg)
+        specs.append({
+            "name": name,
+            "description": TOOL_DESCRIPTIONS.get(name, name),
+            "parameters": {"type": "object", "properties": props, "required": required},
+        })
+    return specs
+
+
+def protocol_json_schema() -> Dict[str, Any]:
+    """JSON Schema for one protocol response (type tool, tools or final)."""
+    call_props = {
+        "id": {"type": "string"},
+        "tool": {"type": "string", "enum": list(TOOL_SCHEMA)},
+        "args": {"type": "object"},
+        "note": {"type": "string"},
+    }
+    return {
+        "type": "object",
+        "properties": {
+            "type": {"type": "string", "enum": sorted(PROTOCOL_TYPES)},
+            **call_props,
+            "calls": {"type": "array", "items": {"type": "object", "properties": call_props, "required": ["tool", "args"]}},
+            "content": {"type": "string"},
+        },
+        "required": ["type"],
+    }
+
+
+# Tools that never modify state; independent calls to these run concurrently.
+# memory_search/memory_list are not among them: reading the store can migrate
+# the legacy format, save the keyword index and train the IVF index.
+READ_ONLY_TOOLS = {"read_file", "list_dir"}
+READ_ONLY_ACTIONS = {"plan": {"get", "list"}, "tmux": {"capture", "list"}}
+
+
+def is_read_only(tool: str, args: Dict[str, Any]) -> bool:
+    if tool in READ_ONLY_TOOLS:
+        return True
+    actions = READ_ONLY_ACTIONS.get(tool)
+    if actions:
+        return (args.get("action") or "").lower() in actions
+    return False
+
+
+def parse_tool_calls(obj: Dict[str, Any], step: int) -> List[Dict[str, Any]]:
+    """Normalize a type=tool or type=tools response into a list of calls."""
+    if obj.get("type") == "tool":
+        raw_calls = [obj]
+    else:
+        raw_calls = [c for c in (obj.get("calls") or []) if isinstance(c, dict)]
+    calls = []
+    for i, c in enumerate(raw_calls, start=1):
+        default_id = f"t{step}" if len(raw_calls) == 1 else f"t{step}_{i}"
+        calls.append({
+            "tool": c.get("tool"),
+            "id": c.get("id") or default_id,
+            "args": c.get("args") or {},
+            "note": c.get("note"),
+        })
+    return calls
+
+
 def system_prompt(config: AppConfig) -> str:
+    if config.tool_mode == "native":
+        return (
+            "You are a capable, careful system agent for Ubuntu servers.\n"
+            "Act through the provided tools. Call several tools in one turn when they do not depend on each other's results; "
+            "results come back as TOOL_RESULT[<id>] messages.\n"
+            "When the task is done, reply with the final answer as plain text. Keep arguments minimal.\n"
+            "Rationales must be high-level and avoid sensitive chain-of-thought. Do not include extra summaries.\n"
+            "Ask for clarification if requirements are ambiguous before running destructive actions."
+        )
     return (
         "You are a capable, careful system agent for Ubuntu servers.\n"
-        "Always respond with strict JSON in one of two forms.\n"
+        "Always respond with strict JSON in one of three forms.\n"
         "1) Tool call: {\"type\":\"tool\", \"id\":\"t1\", \"tool\":<tool_name>, \"args\":{...}, \"note\":\"short rationale(optional)\"}\n"
-        "2) Final answer: {\"type\":\"final\", \"content\":\"...\"}\n"
+        "2) Several independent tool calls: {\"type\":\"tools\", \"calls\":[{\"id\":\"t1\", \"tool\":<tool_name>, \"args\":{...}}, ...]}\n"
+        "3) Final answer: {\"type\":\"final\", \"content\":\"...\"}\n"
         "Available tools and their args schema: "
         + json.dumps(TOOL_SCHEMA)
-        + "\nRules: Use one tool call at a time. Keep arguments minimal. \n"
+        + "\nRules: Batch independent calls (e.g. reading several files) into one type=tools response; "
+        "calls run in the given order and all results come back together. "
+        "Only batch calls that do not depend on each other's results. Keep arguments minimal. \n"
         "Rationales must be high-level and avoid sensitive chain-of-thought. Do not include extra summaries.\n"
         "Ask for clarification if requirements are ambiguous before running destructive actions."
     )
@@ -118,18 +253,40 @@ class Orchestrator:
         self.messages: List[Message] = [{"role": "system", "content": system_prompt(config)}]
         self._pending: Dict[str, Any] | None = None
         self._cancel_requested: bool = False
+        self._executor: ThreadPoolExecutor | None = None
+        self.tool_cache = ToolResultCache(config.workspace_root, config.config_dir) if config.tool_cache else None
+        self.context = ContextManager(config.context_budget)
+        self._tool_specs = tool_json_schemas() if config.tool_mode == "native" else None
+        self._response_format: Dict[str, Any] | None = None
+        if config.tool_mode != "native" and config.json_mode == "json":
+            self._response_format = {"type": "json"}
+        elif config.tool_mode != "native" and config.json_mode == "schema":
+            self._response_format = {"type": "json_schema", "name": "agent_response", "schema": protocol_json_schema()}
+        # LLM round trips and the correction turns among them
+        self.counters: Dict[str, int] = {"llm_calls": 0, "json_reprompts": 0, "protocol_reprompts": 0}
+        self.last_context_stats: Dict[str, int] | None = None
+        # Indices in messages of user requests, as opposed to the user-role
+        # tool results, reprompts and continuations the orchestrator adds
+        self._requests: List[int] = []
 
     def append_user(self, content: str) -> None:
         self.messages.append({"role": "user", "content": content})
 
+    def _append_request(self, content: str) -> None:
+        if content:
+            self._requests.append(len(self.messages))
+        self.append_user(content)
+
     def append_assistant(self, content: str) -> None:
         self.messages.append({"role": "assistant", "content": content})
 
     def append_tool_result(self, tool_id: str, result: Dict[str, Any]) -> None:
         # Feed back as user message to keep provider compatibility
+        self.messages.append({"role": "user", "content": self._format_tool_result(tool_id, result)})
+
+    def _format_tool_result(self, tool_id: str, result: Dict[str, Any]) -> str:
         summary = summarize(json.dumps(result, ensure_ascii=False), 5000)
-        content = f"TOOL_RESULT[{tool_id}]: {summary}"
-        self.messages.append({"role": "user", "content": content})
+        return f"TOOL_RESULT[{tool_id}]: {summary}"
 
     def needs_approval(self, tool: str, args: Dict[str, Any]) -> Tuple[bool, str]:
         if self.config.approval_policy == "always":
@@ -155,6 +312,47 @@ class Orchestrator:
         return False, "safe"
 
     def execute_tool(self, tool: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        return self._cached_execute(tool, args)[0]
+
+    def _cached_execute(self, tool: str, args: Dict[str, Any]) -> Tuple[Dict[str, Any], str | None]:
+        """Run a tool through the session's result cache; returns (result, cache status)."""
+        started = time.monotonic()
+        try:
+            result, status = self._cached_execute_inner(tool, args)
+        except Exception:
+            metrics.TOOL_ERRORS.inc(tool=tool)
+            raise
+        metrics.TOOL_SECONDS.observe(time.monotonic() - started, tool=tool, cache=status or "none")
+        if isinstance(result, dict) and result.get("error"):
+            metrics.TOOL_ERRORS.inc(tool=tool)
+        return result, status
+
+    def _cached_execute_inner(self, tool: str, args: Dict[str, Any]) -> Tuple[Dict[str, Any], str | None]:
+        cache = self.tool_cache
+        if cache is None:
+            return self._dispatch_tool(tool, args), None
+        cached, token = cache.lookup(tool, args)
+        if cached is not None:
+            return cached, "hit"
+        if token is None:
+            result = self._dispatch_tool(tool, args)
+            if not is_read_only(tool, args):
+                cache.invalidate(tool, args)
+            return result, None
+        if tool == "web_get":
+            prev = cache.web_entry(args)
+            result = self._dispatch_tool(tool, args, revalidate=prev)
+            if prev is not None and result.get("not_modified"):
+                cache.count("hits")
+                return prev, "revalidated"
+            cache.count("misses")
+            cache.store(token, result)
+            return result, "miss"
+        result = self._dispatch_tool(tool, args)
+        cache.store(token, result)
+        return result, "miss"
+
+    def _dispatch_tool(self, tool: str, args: Dict[str, Any], revalidate: Dict[str, Any] | None = None) -> Dict[str, Any]:
         ws = self.config.workspace_root
         if tool == "run_shell":
             timeout = int(args.get("timeout", self.config.tool_timeout))
@@ -167,7 +365,8 @@ class Orchestrator:
         if tool == "list_dir":
             return list_dir(args["path"], workspace_root=ws)
         if tool == "web_get":
-            return web_get(args["url"], max_bytes=int(args.get("max_bytes", 200_000)))
+            prev = revalidate or {}
+            return web_get(args["url"], max_bytes=int(args.get("max_bytes", 200_000)), etag=prev.get("etag"), last_modified=prev.get("last_modified"))
         if tool == "tmux":
             action = (args.get("action") or "").lower()
             name = args.get("name") or "agent"
@@ -201,15 +400,15 @@ class Orchestrator:
         if tool == "replace_in_file":
             return replace_in_file(args.get("path", ""), args.get("find", ""), args.get("replace", ""), workspace_root=ws, count=args.get("count"), regex=bool(args.get("regex", False)))
         if tool == "memory_add":
-            return memory_add(self.config.config_dir, text=args.get("text", ""), tags=args.get("tags"), meta=args.get("meta"))
+            return memory_add(self.config.config_dir, text=args.get("text", ""), tags=args.get("tags"), meta=args.get("meta"), vec_dtype=self.config.memory_vec_dtype, compact_ratio=self.config.memory_compact_ratio, use_ann=self.config.memory_ann)
         if tool == "memory_search":
-            return memory_search(self.config.config_dir, query=args.get("query", ""), top_k=int(args.get("top_k", 5)), tag=args.get("tag"))
+            return memory_search(self.config.config_dir, query=args.get("query", ""), top_k=int(args.get("top_k", 5)), tag=args.get("tag"), keyword_weight=self.config.memory_keyword_weight, ann_nprobe=self.config.memory_ann_nprobe if self.config.memory_ann else 0)
         if tool == "memory_delete":
-            return memory_delete(self.config.config_dir, entry_id=args.get("id", ""))
+            return memory_delete(self.config.config_dir, entry_id=args.get("id", ""), compact_ratio=self.config.memory_compact_ratio)
         if tool == "memory_list":
             return memory_list(self.config.config_dir, limit=int(args.get("limit", 50)), tag=args.get("tag"))
         if tool == "memory_update":
-            return memory_update(self.config.config_dir, entry_id=args.get("id", ""), text=args.get("text"), tags=args.get("tags"), meta=args.get("meta"))
+            return memory_update(self.config.config_dir, entry_id=args.get("id", ""), text=args.get("text"), tags=args.get("tags"), meta=args.get("meta"), compact_ratio=self.config.memory_compact_ratio)
         if tool == "plan":
             action = (args.get("action") or "").lower()
             if action == "create":
@@ -290,85 +489,186 @@ class Orchestrator:
                     pass
         return {"error": f"unknown action {action}"}
 
+    def _llm_kwargs(self) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {
+            "model": self.config.model,
+            "request_timeout": self.config.request_timeout,
+            "reasoning": self.config.reasoning_mode != "off",
+            "reasoning_effort": self.config.reasoning_effort,
+        }
+        if self._tool_specs:
+            kwargs["tools"] = self._tool_specs
+        if self._response_format:
+            kwargs["response_format"] = self._response_format
+        self.counters["llm_calls"] += 1
+        return kwargs
+
+    def _reprompt(self, counter: str, message: str) -> None:
+        """Append a correction turn and record it, to measure wasted LLM calls."""
+        self.counters[counter] += 1
+        metrics.LLM_REPROMPTS.inc(reason=counter)
+        log_jsonl(self.config.log_dir, "llm", {"direction": "reprompt", "reason": counter, "json_mode": self.config.json_mode, "counters": dict(self.counters)})
+        self.append_user(message)
+
+    def _observe_llm(self, started: float, first_token: float | None, text: str, raw: Any) -> None:
+        labels = {"provider": self.config.provider, "model": self.config.model}
+        now = time.monotonic()
+        metrics.LLM_SECONDS.observe(now - started, stream="1" if first_token is not None else "0", **labels)
+        if first_token is not None:
+            metrics.LLM_TTFT.observe(first_token - started, **labels)
+        usage = metrics.usage_tokens(raw)
+        if usage is None:
+            stats = self.last_context_stats or {}
+            usage = (stats.get("tokens_after", 0), estimate_tokens(text or "", self.config.model))
+        metrics.LLM_TOKENS.inc(usage[0], direction="in", **labels)
+        metrics.LLM_TOKENS.inc(usage[1], direction="out", **labels)
+
+    def _response_object(self, text: str, tool_calls: Optional[List[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Protocol object for a model response: native tool calls, protocol JSON, or plain text in native mode."""
+        if tool_calls:
+            return {"type": "tools", "calls": tool_calls}
+        obj = extract_json_object(text)
+        if self._tool_specs and (not obj or obj.get("type") not in PROTOCOL_TYPES) and text.strip():
+            return {"type": "final", "content": text.strip()}
+        return obj
+
+    def _context_messages(self) -> List[Message]:
+        """Messages for the next provider call, trimmed to the context budget."""
+        msgs, stats = self.context.fit(self.messages, self.config.model, self._requests)
+        self.last_context_stats = stats
+        if stats["saved"]:
+            log_jsonl(self.config.log_dir, "context", {"model": self.config.model, "budget": self.context.budget, **stats})
+        return msgs
+
+    def _log_tool(self, tool: str, args: Dict[str, Any], result: Dict[str, Any], cache_status: str | None) -> None:
+        entry = {"tool": tool, "args": args, "result": result}
+        if self.tool_cache is not None:
+            entry["cache"] = cache_status
+            entry["cache_counters"] = dict(self.tool_cache.counters)
+        log_jsonl(self.config.log_dir, "tool", entry)
+
+    def _execute_logged(self, tool: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        result, cache_status = self._cached_execute(tool, args)
+        self._log_tool(tool, args, result, cache_status)
+        return result
+
+    def _tool_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=max(1, self.config.tool_workers), thread_name_prefix="agentic-tool")
+        return self._executor
+
+    def _run_tool_calls(self, calls: List[Dict[str, Any]], sink: EventSink, feedback: Optional[List[str]] = None) -> bool:
+        """Execute one turn's tool calls and feed all results back as a single message.
+
+        Consecutive read-only calls that need no approval run concurrently on the
+        worker pool; everything else runs one at a time in the order given.
+        Returns False when a call was deferred for approval; the remaining calls
+        and collected results are kept in the pending slot for resolve_approval.
+        """
+        feedback = [] if feedback is None else feedback
+        i = 0
+        while i < len(calls):
+            group = []
+            while i < len(calls) and is_read_only(calls[i]["tool"], calls[i]["args"]) and not self.needs_approval(calls[i]["tool"], calls[i]["args"])[0]:
+                group.append(calls[i])
+                i += 1
+            if len(group) > 1:
+                for c in group:
+                    sink.on_tool_call(c["tool"], c["id"], c["args"], c["note"])
+                pool = self._tool_executor()
+                futures = [pool.submit(self._cached_execute, c["tool"], c["args"]) for c in group]
+                for c, fut in zip(group, futures):
+                    result, cache_status = fut.result()
+                    self._log_tool(c["tool"], c["args"], result, cache_status)
+                    sink.on_tool_result(c["id"], result)
+                    feedback.append(self._format_tool_result(c["id"], result))
+                continue
+            # A lone read-only call takes the regular path below
+            i -= len(group)
+            call = calls[i]
+            i += 1
+            tool, tool_id, args = call["tool"], call["id"], call["args"]
+            sink.on_tool_call(tool, tool_id, args, call["note"])
+            need, reason = self.needs_approval(tool, args)
+            if need:
+                token = str(uuid.uuid4())
+                asked = time.monotonic()
+                decision = sink.on_approval_required(tool, tool_id, reason, args, token=token)
+                if decision is APPROVAL_DEFER:
+                    self._pending = {"token": token, "tool": tool, "tool_id": tool_id, "args": args, "rest": calls[i:], "feedback": feedback, "asked": asked}
+                    return False
+                metrics.APPROVAL_WAIT.observe(time.monotonic() - asked, outcome="approved" if decision else "denied")
+                if not decision:
+                    feedback.append(f"Tool {tool} was denied by user. Provide alternative or ask clarification.")
+                    continue
+            result = self._execute_logged(tool, args)
+            sink.on_tool_result(tool_id, result)
+            feedback.append(self._format_tool_result(tool_id, result))
+        if feedback:
+            self.append_user("\n".join(feedback))
+        return True
+
     def run(self, task: str, sink: EventSink | None = None) -> str:
         return self.chat_once(f"Task: {task}", sink=sink)
 
     def chat_once(self, user_input: str, sink: EventSink | None = None) -> str:
         sink = sink or NullSink()
-        self.append_user(user_input)
+        self._append_request(user_input)
         final_output = ""
         for step in range(1, self.config.max_steps + 1):
-            output = self.provider.generate(
-                self.messages,
-                model=self.config.model,
-                request_timeout=self.config.request_timeout,
-                reasoning=self.config.reasoning_mode != "off",
-                reasoning_effort=self.config.reasoning_effort,
-            )
+            messages = self._context_messages()
+            started = time.monotonic()
+            output = self.provider.generate(messages, **self._llm_kwargs())
             # Normalize
             if isinstance(output, dict):
                 text = output.get("content", "")
                 reasoning_text = output.get("reasoning")
                 raw = output.get("raw")
+                tool_calls = output.get("tool_calls")
             else:
                 text = str(output or "")
                 reasoning_text = None
                 raw = None
+                tool_calls = None
+            self._observe_llm(started, None, text, raw)
             log_jsonl(self.config.log_dir, "llm", {"direction": "assistant", "text": text, "reasoning": reasoning_text, "raw": raw})
             sink.on_reasoning(reasoning_text)
             if raw is not None:
                 sink.on_raw(raw)
             sink.on_assistant_raw(text or "")
-            obj = extract_json_object(text or "")
+            obj = self._response_object(text or "", tool_calls)
             if not obj:
                 # Ask model to correct to JSON
-                self.append_user("Please respond with valid JSON per protocol.")
+                self._reprompt("json_reprompts", "Please respond with valid JSON per protocol.")
                 continue
             if obj.get("type") == "final":
                 final_output = str(obj.get("content", ""))
                 sink.on_final(final_output)
                 break
-            if obj.get("type") == "tool":
-                tool = obj.get("tool")
-                tool_id = obj.get("id") or f"t{step}"
-                args = obj.get("args") or {}
-                note = obj.get("note")
-                sink.on_tool_call(tool, tool_id, args, note)
-                need, reason = self.needs_approval(tool, args)
-                if need:
-                    token = str(uuid.uuid4())
-                    decision = sink.on_approval_required(tool, tool_id, reason, args, token=token)
-                    if decision is APPROVAL_DEFER:
-                        # Store pending approval and break to let UI handle it
-                        self._pending = {"token": token, "tool": tool, "tool_id": tool_id, "args": args}
-                        break
-                    if not decision:
-                        self.append_user(f"Tool {tool} was denied by user. Provide alternative or ask clarification.")
-                        continue
-                result = self.execute_tool(tool, args)
-                log_jsonl(self.config.log_dir, "tool", {"tool": tool, "args": args, "result": result})
-                sink.on_tool_result(tool_id, result)
-                self.append_tool_result(tool_id, result)
+            if obj.get("type") in {"tool", "tools"}:
+                calls = parse_tool_calls(obj, step)
+                if not calls:
+                    self._reprompt("protocol_reprompts", "Invalid response. type=tools needs a non-empty calls array.")
+                    continue
+                if not self._run_tool_calls(calls, sink):
+                    # Pending approval stored; let UI handle it
+                    break
                 continue
             # Unknown type; ask to comply
-            self.append_user("Invalid response. Use type=tool or type=final JSON.")
+            self._reprompt("protocol_reprompts", "Invalid response. Use type=tool or type=final JSON.")
         return final_output
 
     def chat_stream(self, user_input: str, sink: EventSink | None = None) -> str:
         sink = sink or NullSink()
         self._cancel_requested = False  # reset cancel flag for this run
-        self.append_user(user_input)
+        self._append_request(user_input)
         final_output = ""
         for step in range(1, self.config.max_steps + 1):
             gen = None
             if hasattr(self.provider, "generate_stream"):
-                gen = self.provider.generate_stream(
-                    self.messages,
-                    model=self.config.model,
-                    request_timeout=self.config.request_timeout,
-                    reasoning=self.config.reasoning_mode != "off",
-                    reasoning_effort=self.config.reasoning_effort,
-                )
+                messages = self._context_messages()
+                started = time.monotonic()
+                gen = self.provider.generate_stream(messages, **self._llm_kwargs())
             if gen is None:
                 # Fallback to non-stream path for this step
                 return self.chat_once(user_input if step == 1 else "", sink)
@@ -376,6 +676,13 @@ class Orchestrator:
             full_text: List[str] = []
             full_reason: List[str] = []
             raw_last = None
+            text = None
+            reasoning_text = None
+            tool_calls = None
+            early = False
+            first_token: float | None = None
+            scanner = JSONStreamScanner()
+            final_streamer = FinalContentStreamer()
 
             # Early cancel check
             if self._cancel_requested:
@@ -396,9 +703,23 @@ class Orchestrator:
                 if not isinstance(ev, dict):
                     continue
                 if ev.get("event") == "delta":
+                    if first_token is None:
+                        first_token = time.monotonic()
                     if ev.get("text"):
                         full_text.append(ev.get("text"))
-                        # Don't stream assistant JSON body
+                        if self._tool_specs:
+                            # Native tool calling: text is the answer itself
+                            sink.on_stream_text(ev.get("text"))
+                        else:
+                            # Don't stream assistant JSON body, only a final answer's decoded content
+                            piece = final_streamer.feed(ev.get("text"))
+                            if piece:
+                                sink.on_stream_text(piece)
+                            # Dispatch as soon as the object is complete
+                            obj = scanner.feed(ev.get("text"))
+                            if obj is not None and obj.get("type") in PROTOCOL_TYPES:
+                                early = True
+                                break
                     if ev.get("reasoning"):
                         full_reason.append(ev.get("reasoning"))
                         sink.on_stream_reasoning(ev.get("reasoning"))
@@ -406,45 +727,41 @@ class Orchestrator:
                     raw_last = ev.get("raw")
                     text = ev.get("content", "")
                     reasoning_text = ev.get("reasoning")
-                    if not text:
-                        text = "".join(full_text)
-                    if reasoning_text is None and full_reason:
-                        reasoning_text = "".join(full_reason)
-                    log_jsonl(self.config.log_dir, "llm", {"direction": "assistant", "text": text, "reasoning": reasoning_text, "raw": raw_last})
-                    sink.on_reasoning(reasoning_text)
-                    if raw_last is not None:
-                        sink.on_raw(raw_last)
-                    sink.on_assistant_raw(text or "")
-                    obj = extract_json_object(text or "")
-                    if not obj:
-                        self.append_user("Please respond with valid JSON per protocol.")
-                        break
-                    if obj.get("type") == "final":
-                        final_output = str(obj.get("content", ""))
-                        sink.on_final(final_output)
-                        return final_output
-                    if obj.get("type") == "tool":
-                        tool = obj.get("tool")
-                        tool_id = obj.get("id") or f"t{step}"
-                        args = obj.get("args") or {}
-                        note = obj.get("note")
-                        sink.on_tool_call(tool, tool_id, args, note)
-                        need, reason = self.needs_approval(tool, args)
-                        if need:
-                            token = str(uuid.uuid4())
-                            decision = sink.on_approval_required(tool, tool_id, reason, args, token=token)
-                            if decision is APPROVAL_DEFER:
-                                self._pending = {"token": token, "tool": tool, "tool_id": tool_id, "args": args}
-                                return ""
-                            if not decision:
-                                self.append_user(f"Tool {tool} was denied by user. Provide alternative or ask clarification.")
-                                break
-                        result = self.execute_tool(tool, args)
-                        log_jsonl(self.config.log_dir, "tool", {"tool": tool, "args": args, "result": result})
-                        sink.on_tool_result(tool_id, result)
-                        self.append_tool_result(tool_id, result)
-                        # Continue loop to next step with tool result in context
-                        break
+                    tool_calls = ev.get("tool_calls")
+                    break
+            if early:
+                # Skip the tail of the generation (whitespace, trailing commentary)
+                try:
+                    gen.close()
+                except Exception:
+                    pass
+            if not text:
+                text = "".join(full_text)
+            if reasoning_text is None and full_reason:
+                reasoning_text = "".join(full_reason)
+            self._observe_llm(started, first_token or time.monotonic(), text, raw_last)
+            log_jsonl(self.config.log_dir, "llm", {"direction": "assistant", "text": text, "reasoning": reasoning_text, "raw": raw_last, "early": early})
+            sink.on_reasoning(reasoning_text)
+            if raw_last is not None:
+                sink.on_raw(raw_last)
+            sink.on_assistant_raw(text or "")
+            obj = scanner.result if early else self._response_object(text or "", tool_calls)
+            if not obj:
+                self._reprompt("json_reprompts", "Please respond with valid JSON per protocol.")
+                continue
+            if obj.get("type") == "final":
+                final_output = str(obj.get("content", ""))
+                sink.on_final(final_output)
+                return final_output
+            if obj.get("type") in {"tool", "tools"}:
+                calls = parse_tool_calls(obj, step)
+                if not calls:
+                    self._reprompt("protocol_reprompts", "Invalid response. type=tools needs a non-empty calls array.")
+                    continue
+                if not self._run_tool_calls(calls, sink):
+                    return ""
+                # Continue loop to next step with tool results in context
+                continue
         return final_output
 
     def has_pending_approval(self) -> bool:
@@ -464,15 +781,25 @@ class Orchestrator:
         tool = pending["tool"]
         tool_id = pending["tool_id"]
         args = pending["args"]
+        feedback = pending.get("feedback") or []
+        rest = pending.get("rest") or []
+        metrics.APPROVAL_WAIT.observe(time.monotonic() - pending["asked"], outcome="approved" if approve else "denied")
         if not approve:
-            self.append_user(f"Tool {tool} was denied by user. Provide alternative or ask clarification.")
+            feedback.append(f"Tool {tool} was denied by user. Provide alternative or ask clarification.")
+            self._run_tool_calls(rest, sink, feedback)
             return {"approved": False}
-        result = self.execute_tool(tool, args)
-        log_jsonl(self.config.log_dir, "tool", {"tool": tool, "args": args, "result": result})
+        result = self._execute_logged(tool, args)
         sink.on_tool_result(tool_id, result)
-        self.append_tool_result(tool_id, result)
+        feedback.append(self._format_tool_result(tool_id, result))
+        self._run_tool_calls(rest, sink, feedback)
         return {"approved": True, "result": result}
 
     def request_cancel(self) -> None:
         """Signal the current streaming operation to cancel asap."""
         self._cancel_requested = True
+
+    def close(self) -> None:
+        """Release the tool worker pool; the orchestrator can still be used afterwards."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
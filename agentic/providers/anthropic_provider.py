@@ -1,16 +1,17 @@
 from __future__ import annotations
 
 import json
-import urllib.request
 from typing import List, Dict, Optional, Any
 
-from .base import Message
+from .base import Message, ToolSpec
+from .transport import HTTPTransport, shared_transport
 
 
 class AnthropicProvider:
-    def __init__(self, api_key: str, base_url: Optional[str] = None) -> None:
+    def __init__(self, api_key: str, base_url: Optional[str] = None, transport: Optional[HTTPTransport] = None) -> None:
         self.api_key = api_key
         self.base_url = base_url.rstrip("/") if base_url else "https://api.anthropic.com"
+        self.transport = transport or shared_transport()
 
     def _convert_messages(self, messages: List[Message]):
         # Anthropic expects no explicit system message in the list; it has a separate field.
@@ -30,6 +31,8 @@ class AnthropicProvider:
         request_timeout: int = 120,
         reasoning: Optional[bool] = None,
         reasoning_effort: Optional[str] = None,
+        tools: Optional[List[ToolSpec]] = None,
+        response_format: Optional[Dict[str, Any]] = None,  # no Messages API equivalent; ignored
     ) -> Dict[str, Any]:
         system, msgs = self._convert_messages(messages)
         url = f"{self.base_url}/v1/messages"
@@ -41,28 +44,131 @@ class AnthropicProvider:
         # Anthropic 'thinking' models may return thinking blocks automatically; no explicit flag here.
         if system:
             body["system"] = system
+        if tools:
+            body["tools"] = [{"name": t["name"], "description": t.get("description", ""), "input_schema": t["parameters"]} for t in tools]
         data = json.dumps(body).encode("utf-8")
-        req = urllib.request.Request(
-            url,
-            data=data,
-            headers={
-                "x-api-key": self.api_key,
-                "anthropic-version": "2023-06-01",
-                "Content-Type": "application/json",
-            },
-            method="POST",
-        )
-        with urllib.request.urlopen(req, timeout=request_timeout) as resp:
+        headers = {
+            "x-api-key": self.api_key,
+            "anthropic-version": "2023-06-01",
+            "Content-Type": "application/json",
+        }
+        with self.transport.request("POST", url, body=data, headers=headers, timeout=request_timeout) as resp:
             payload = json.loads(resp.read().decode("utf-8"))
         content = ""
         reasoning_texts: List[str] = []
+        tool_calls = []
         try:
             blocks = payload.get("content") or []
             for b in blocks:
                 if b.get("type") == "text":
                     content += b.get("text", "")
                 if b.get("type") in {"thinking", "reasoning"}:
-                    reasoning_texts.append(b.get("text", ""))
+                    reasoning_texts.append(b.get("thinking") or b.get("text", ""))
+                if b.get("type") == "tool_use":
+                    tool_calls.append({"id": b.get("id"), "tool": b.get("name"), "args": b.get("input") or {}})
         except Exception:
             content = json.dumps(payload)
-        return {"content": content, "reasoning": "\n".join(reasoning_texts) if reasoning_texts else None, "raw": payload}
+        return {"content": content, "reasoning": "\n".join(reasoning_texts) if reasoning_texts else None, "raw": payload, "tool_calls": tool_calls}
+
+    def generate_stream(
+        self,
+        messages: List[Message],
+        model: str,
+        request_timeout: int = 120,
+        reasoning: Optional[bool] = None,
+        reasoning_effort: Optional[str] = None,
+        tools: Optional[List[ToolSpec]] = None,
+        response_format: Optional[Dict[str, Any]] = None,  # no Messages API equivalent; ignored
+    ):
+        system, msgs = self._convert_messages(messages)
+        url = f"{self.base_url}/v1/messages"
+        body = {
+            "model": model,
+            "max_tokens": 2048,
+            "messages": msgs,
+            "stream": True,
+        }
+        if system:
+            body["system"] = system
+        if tools:
+            body["tools"] = [{"name": t["name"], "description": t.get("description", ""), "input_schema": t["parameters"]} for t in tools]
+        data = json.dumps(body).encode("utf-8")
+        headers = {
+            "x-api-key": self.api_key,
+            "anthropic-version": "2023-06-01",
+            "Content-Type": "application/json",
+        }
+        content_acc = []
+        reasoning_acc = []
+        # Rebuilt Messages API response, reported as raw in the final event
+        message: Dict[str, Any] = {}
+        blocks: Dict[int, Dict[str, Any]] = {}
+        usage: Dict[str, Any] = {}
+        try:
+            with self.transport.request("POST", url, body=data, headers=headers, timeout=request_timeout) as resp:
+                # SSE: "event: <type>" / "data: <json>" lines; the JSON repeats the type
+                while True:
+                    line = resp.readline()
+                    if not line:
+                        break
+                    if not line.startswith(b"data:"):
+                        continue
+                    try:
+                        evt = json.loads(line[len(b"data:"):].strip().decode("utf-8"))
+                    except Exception:
+                        # Skipped, but reported so a dropped frame does not go unnoticed
+                        message.setdefault("error", {"type": "invalid_event", "message": line.decode("utf-8", "replace").strip()[:200]})
+                        continue
+                    etype = evt.get("type")
+                    if etype == "message_start":
+                        message = dict(evt.get("message") or {})
+                        usage.update(message.get("usage") or {})
+                    elif etype == "content_block_start":
+                        blocks[evt.get("index", len(blocks))] = dict(evt.get("content_block") or {})
+                    elif etype == "content_block_delta":
+                        d = evt.get("delta") or {}
+                        block = blocks.setdefault(evt.get("index", 0), {"type": "text", "text": ""})
+                        if d.get("type") == "text_delta" and d.get("text"):
+                            text = d["text"]
+                            block["text"] = block.get("text", "") + text
+                            content_acc.append(text)
+                            yield {"event": "delta", "text": text}
+                        elif d.get("type") == "thinking_delta" and d.get("thinking"):
+                            r = d["thinking"]
+                            block["thinking"] = block.get("thinking", "") + r
+                            reasoning_acc.append(r)
+                            yield {"event": "delta", "reasoning": r}
+                        elif d.get("type") == "input_json_delta":
+                            block["partial_json"] = block.get("partial_json", "") + d.get("partial_json", "")
+                        elif d.get("type") == "signature_delta":
+                            block["signature"] = block.get("signature", "") + d.get("signature", "")
+                    elif etype == "message_delta":
+                        message.update(evt.get("delta") or {})
+                        usage.update(evt.get("usage") or {})
+                    elif etype == "error":
+                        message["error"] = evt.get("error")
+                        break
+                    elif etype == "message_stop":
+                        break
+        except Exception as e:
+            message["error"] = {"type": "transport_error", "message": str(e)}
+        tool_calls = []
+        for i in sorted(blocks):
+            b = blocks[i]
+            if b.get("type") != "tool_use":
+                continue
+            args = b.get("input") or {}
+            partial = b.pop("partial_json", "")
+            if partial:
+                try:
+                    args = json.loads(partial)
+                except Exception:
+                    args = {}
+                b["input"] = args
+            tool_calls.append({"id": b.get("id"), "tool": b.get("name"), "args": args})
+        raw = None
+        if message or blocks:
+            raw = {**message, "content": [blocks[i] for i in sorted(blocks)], "usage": usage}
+        final_text = "".join(content_acc)
+        final_reasoning = "".join(reasoning_acc) if reasoning_acc else None
+        yield {"event": "final", "content": final_text, "reasoning": final_reasoning, "raw": raw, "tool_calls": tool_calls}
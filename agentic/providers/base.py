@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import json
 from typing import List, Dict, Any, Protocol, Optional
 
 
 Message = Dict[str, str]  # {role: system|user|assistant, content: str}
+ToolSpec = Dict[str, Any]  # {name, description, parameters: JSON Schema}
 
 
 class Provider(Protocol):
@@ -14,12 +16,17 @@ class Provider(Protocol):
         request_timeout: int = 120,
         reasoning: Optional[bool] = None,
         reasoning_effort: Optional[str] = None,
+        tools: Optional[List[ToolSpec]] = None,
+        response_format: Optional[Dict[str, Any]] = None,
     ) -> Any:
         ...
 
     # Optional streaming interface; yields dict events with keys:
     # {"event":"delta", "text":"...", "reasoning":"..."}
-    # and a final event: {"event":"final", "content":"...", "reasoning": "...", "raw": ...}
+    # and a final event: {"event":"final", "content":"...", "reasoning": "...", "raw": ..., "tool_calls": [...]}
+    # Both methods accept tools=[ToolSpec] to enable native tool calling, and
+    # response_format={"type":"json"} or {"type":"json_schema","name":...,"schema":{...}}
+    # to constrain output to JSON where the backend supports it.
     def generate_stream(
         self,
         messages: List[Message],
@@ -27,5 +34,78 @@ class Provider(Protocol):
         request_timeout: int = 120,
         reasoning: Optional[bool] = None,
         reasoning_effort: Optional[str] = None,
+        tools: Optional[List[ToolSpec]] = None,
+        response_format: Optional[Dict[str, Any]] = None,
     ) -> Any:
         ...
+
+
+# Native tool calling. Tools are passed to providers as neutral specs
+# {"name", "description", "parameters": <JSON Schema>} and parsed tool calls come
+# back as {"id", "tool", "args"} under the "tool_calls" key of the result/final event.
+
+
+def openai_tools(tools: List[ToolSpec]) -> List[Dict[str, Any]]:
+    """Tool specs in the OpenAI-compatible (OpenAI/OpenRouter/LM Studio/Ollama) format."""
+    return [
+        {"type": "function", "function": {"name": t["name"], "description": t.get("description", ""), "parameters": t["parameters"]}}
+        for t in tools
+    ]
+
+
+def openai_response_format(fmt: Dict[str, Any], json_object: bool = True) -> Dict[str, Any]:
+    """OpenAI-compatible response_format; servers without json_object get a permissive schema."""
+    if fmt.get("type") == "json_schema":
+        return {"type": "json_schema", "json_schema": {"name": fmt.get("name", "response"), "schema": fmt["schema"]}}
+    if json_object:
+        return {"type": "json_object"}
+    return {"type": "json_schema", "json_schema": {"name": "response", "schema": {"type": "object"}}}
+
+
+def _parse_arguments(arguments: Any) -> Dict[str, Any]:
+    if isinstance(arguments, dict):
+        return arguments
+    if isinstance(arguments, str) and arguments.strip():
+        try:
+            obj = json.loads(arguments)
+            return obj if isinstance(obj, dict) else {}
+        except Exception:
+            return {}
+    return {}
+
+
+def parse_openai_tool_calls(calls: Any) -> List[Dict[str, Any]]:
+    out = []
+    for c in calls or []:
+        if not isinstance(c, dict):
+            continue
+        fn = c.get("function") or {}
+        if fn.get("name"):
+            out.append({"id": c.get("id"), "tool": fn["name"], "args": _parse_arguments(fn.get("arguments"))})
+    return out
+
+
+class ToolCallAccumulator:
+    """Merges streamed OpenAI-style tool_call deltas (keyed by index) into complete calls."""
+
+    def __init__(self) -> None:
+        self._calls: Dict[int, Dict[str, Any]] = {}
+
+    def add(self, deltas: Any) -> None:
+        for i, d in enumerate(deltas or []):
+            if not isinstance(d, dict):
+                continue
+            call = self._calls.setdefault(d.get("index", i), {"id": None, "function": {"name": "", "arguments": ""}})
+            if d.get("id"):
+                call["id"] = d["id"]
+            fn = d.get("function") or {}
+            if fn.get("name"):
+                call["function"]["name"] += fn["name"]
+            args = fn.get("arguments")
+            if isinstance(args, dict):
+                call["function"]["arguments"] = args
+            elif args:
+                call["function"]["arguments"] += args
+
+    def result(self) -> List[Dict[str, Any]]:
+        return parse_openai_tool_calls([self._calls[i] for i in sorted(self._calls)])
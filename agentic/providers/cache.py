@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from ..utils import JSONStreamScanner
+from .base import Message
+
+SWEEP_EVERY = 256  # stores between full scans for expired entries and other writers' files
+LOW_WATER = 0.9  # eviction trims to this fraction of max_bytes, so the next stores don't rescan
+
+
+class ResponseCache:
+    """On-disk LLM response cache: one JSON file per key under a directory.
+
+    Entries older than max_age seconds are dropped; when the directory grows
+    past max_bytes the least recently used entries (by mtime, refreshed on
+    every hit) are removed first, down to LOW_WATER of the limit. The
+    directory's size is tracked in memory between scans, so a store only
+    scans it when over the limit or every SWEEP_EVERY stores.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = 256 * 1024 * 1024, max_age: float = 7 * 86400) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "evicted": 0}
+        self._bytes: Optional[int] = None  # unknown until the first scan
+        self._entries = 0
+        self._since_scan = 0
+
+    @staticmethod
+    def make_key(parts: Dict[str, Any]) -> str:
+        data = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            st = path.stat()
+            if self.max_age > 0 and time.time() - st.st_mtime > self.max_age:
+                if self._unlink(path):
+                    self._forget(st.st_size)
+                raise FileNotFoundError
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)  # LRU: a hit makes the entry recent again
+        except (OSError, ValueError):
+            with self._lock:
+                self.counters["misses"] += 1
+            return None
+        with self._lock:
+            self.counters["hits"] += 1
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        path = self._path(key)
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        try:
+            old: Optional[int] = path.stat().st_size
+        except OSError:
+            old = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        with self._lock:
+            self.counters["stores"] += 1
+            self._since_scan += 1
+            if self._bytes is not None:
+                self._bytes += len(data) - (old or 0)
+                self._entries += old is None
+            due = self._bytes is None or self._since_scan >= SWEEP_EVERY or 0 < self.max_bytes < self._bytes
+        if due:
+            self.evict()
+
+    def _forget(self, size: int) -> None:
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes -= size
+                self._entries -= 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.counters, "entries": self._entries, "bytes": self._bytes or 0}
+
+    def evict(self) -> int:
+        now = time.time()
+        entries = []
+        total = 0
+        removed = 0
+        for p in self.directory.glob("*/*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            if self.max_age > 0 and now - st.st_mtime > self.max_age:
+                removed += self._unlink(p)
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+        kept = len(entries)
+        if self.max_bytes > 0 and total > self.max_bytes:
+            target = self.max_bytes * LOW_WATER
+            for _, size, p in sorted(entries, key=lambda e: e[0]):
+                if total <= target:
+                    break
+                if self._unlink(p):
+                    removed += 1
+                    kept -= 1
+                total -= size
+        with self._lock:
+            self.counters["evicted"] += removed
+            self._bytes = total
+            self._entries = kept
+            self._since_scan = 0
+        return removed
+
+    @staticmethod
+    def _unlink(p: Path) -> int:
+        try:
+            p.unlink()
+            return 1
+        except OSError:
+            return 0
+
+
+class CachingProvider:
+    """Wraps a provider and serves repeated requests from a ResponseCache.
+
+    Providers run at temperature 0, so an identical request (provider, base
+    URL, model, reasoning settings, tools, response format and messages) is
+    answered from disk. Cached streams are replayed as delta events followed
+    by the final event. A stream closed early by the orchestrator (the
+    protocol object was already complete) is stored up to that object.
+    """
+
+    REPLAY_CHUNK = 64
+
+    def __init__(self, inner: Any, cache: ResponseCache, name: str = "") -> None:
+        self.inner = inner
+        self.cache = cache
+        self.name = name or type(inner).__name__
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self.inner, item)
+
+    def _key(self, messages: List[Message], model: str, kwargs: Dict[str, Any]) -> str:
+        return self.cache.make_key({
+            "provider": self.name,
+            "base_url": getattr(self.inner, "base_url", None),
+            "model": model,
+            "messages": messages,
+            **{k: v for k, v in kwargs.items() if k != "request_timeout"},
+        })
+
+    @staticmethod
+    def _cacheable(entry: Dict[str, Any]) -> bool:
+        # Failed requests surface as empty results; don't pin them
+        return bool(entry.get("content") or entry.get("tool_calls"))
+
+    def generate(self, messages: List[Message], model: str, **kwargs: Any) -> Any:
+        key = self._key(messages, model, kwargs)
+        entry = self.cache.get(key)
+        if entry is not None:
+            return entry
+        out = self.inner.generate(messages, model, **kwargs)
+        if isinstance(out, dict) and self._cacheable(out):
+            self.cache.put(key, out)
+        return out
+
+    def generate_stream(self, messages: List[Message], model: str, **kwargs: Any) -> Any:
+        key = self._key(messages, model, kwargs)
+        entry = self.cache.get(key)
+        if entry is not None:
+            return self._replay(entry)
+        gen = self.inner.generate_stream(messages, model, **kwargs)
+        if gen is None:
+            return None
+        return self._record(key, gen)
+
+    def _replay(self, entry: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        if entry.get("reasoning"):
+            yield {"event": "delta", "reasoning": entry["reasoning"]}
+        text = entry.get("content") or ""
+        for i in range(0, len(text), self.REPLAY_CHUNK):
+            yield {"event": "delta", "text": text[i:i + self.REPLAY_CHUNK]}
+        yield {"event": "final", **entry}
+
+    def _record(self, key: str, gen: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        text: List[str] = []
+        reasoning: List[str] = []
+        try:
+            for ev in gen:
+                if ev.get("event") == "final":
+                    entry = {k: ev.get(k) for k in ("content", "reasoning", "raw", "tool_calls")}
+                    if self._cacheable(entry):
+                        self.cache.put(key, entry)
+                elif ev.get("event") == "delta":
+                    if ev.get("text"):
+                        text.append(ev["text"])
+                    if ev.get("reasoning"):
+                        reasoning.append(ev["reasoning"])
+                yield ev
+        except GeneratorExit:
+            gen.close()
+            # Early dispatch stops reading once the protocol object closes;
+            # keep what was consumed if it holds a complete object.
+            scanner = JSONStreamScanner()
+            if scanner.feed("".join(text)) is not None:
+                self.cache.put(key, {"content": "".join(text), "reasoning": "".join(reasoning) or None, "raw": None, "tool_calls": []})
+            raise
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 import json
-import urllib.request
 from typing import List, Optional, Dict, Any
 
-from .base import Message
+from .base import Message, ToolSpec, ToolCallAccumulator, openai_response_format, openai_tools, parse_openai_tool_calls
+from .transport import HTTPTransport, shared_transport
 
 
 class LMStudioProvider:
@@ -13,8 +13,9 @@ class LMStudioProvider:
     No API key required. Expects /v1/chat/completions.
     """
 
-    def __init__(self, base_url: Optional[str] = None) -> None:
+    def __init__(self, base_url: Optional[str] = None, transport: Optional[HTTPTransport] = None) -> None:
         self.base_url = (base_url or "http://localhost:1234").rstrip("/")
+        self.transport = transport or shared_transport()
 
     def generate(
         self,
@@ -23,6 +24,8 @@ class LMStudioProvider:
         request_timeout: int = 120,
         reasoning: Optional[bool] = None,
         reasoning_effort: Optional[str] = None,
+        tools: Optional[List[ToolSpec]] = None,
+        response_format: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         url = f"{self.base_url}/v1/chat/completions"
         body = {
@@ -38,26 +41,27 @@ class LMStudioProvider:
             use_reasoning = any(x in (model or "").lower() for x in ["o3", "o4", "reason", "think"])
         if use_reasoning:
             body["reasoning"] = {"effort": (reasoning_effort or "medium")}
+        if tools:
+            body["tools"] = openai_tools(tools)
+        if response_format:
+            body["response_format"] = openai_response_format(response_format, json_object=False)
         data = json.dumps(body).encode("utf-8")
-        req = urllib.request.Request(
-            url,
-            data=data,
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
-        with urllib.request.urlopen(req, timeout=request_timeout) as resp:
+        headers = {"Content-Type": "application/json"}
+        with self.transport.request("POST", url, body=data, headers=headers, timeout=request_timeout) as resp:
             payload = json.loads(resp.read().decode("utf-8"))
         content = ""
         reasoning_text = None
+        tool_calls = []
         try:
             msg = payload["choices"][0]["message"]
             content = msg.get("content") or ""
+            tool_calls = parse_openai_tool_calls(msg.get("tool_calls"))
             # LM Studio may include a "reasoning" string
             if isinstance(msg.get("reasoning"), str):
                 reasoning_text = msg.get("reasoning")
         except Exception:
             content = json.dumps(payload)
-        return {"content": content, "reasoning": reasoning_text, "raw": payload}
+        return {"content": content, "reasoning": reasoning_text, "raw": payload, "tool_calls": tool_calls}
 
     def generate_stream(
         self,
@@ -66,6 +70,8 @@ class LMStudioProvider:
         request_timeout: int = 120,
         reasoning: Optional[bool] = None,
         reasoning_effort: Optional[str] = None,
+        tools: Optional[List[ToolSpec]] = None,
+        response_format: Optional[Dict[str, Any]] = None,
     ):
         url = f"{self.base_url}/v1/chat/completions"
         body = {
@@ -81,20 +87,20 @@ class LMStudioProvider:
             use_reasoning = any(x in (model or "").lower() for x in ["o3", "o4", "reason", "think"])
         if use_reasoning:
             body["reasoning"] = {"effort": (reasoning_effort or "medium")}
+        if tools:
+            body["tools"] = openai_tools(tools)
+        if response_format:
+            body["response_format"] = openai_response_format(response_format, json_object=False)
         data = json.dumps(body).encode("utf-8")
-        req = urllib.request.Request(
-            url,
-            data=data,
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
+        headers = {"Content-Type": "application/json"}
         content_acc = []
+        calls_acc = ToolCallAccumulator()
         reasoning_acc = []
         raw_last = None
         final_reasoning = None
         last_reasoning_len = 0
         try:
-            with urllib.request.urlopen(req, timeout=request_timeout) as resp:
+            with self.transport.request("POST", url, body=data, headers=headers, timeout=request_timeout) as resp:
                 while True:
                     line = resp.readline()
                     if not line:
@@ -117,6 +123,8 @@ class LMStudioProvider:
                                     final_reasoning = msg.get("reasoning")
                                 # do not emit content as delta here to avoid duplication; let final handle
                             d = choice.get("delta") or {}
+                            if d.get("tool_calls"):
+                                calls_acc.add(d["tool_calls"])
                             if d.get("content"):
                                 text = d.get("content")
                                 content_acc.append(text)
@@ -140,4 +148,4 @@ class LMStudioProvider:
         final_text = "".join(content_acc)
         if final_reasoning is None and reasoning_acc:
             final_reasoning = "".join(reasoning_acc)
-        yield {"event": "final", "content": final_text, "reasoning": final_reasoning, "raw": raw_last}
+        yield {"event": "final", "content": final_text, "reasoning": final_reasoning, "raw": raw_last, "tool_calls": calls_acc.result()}
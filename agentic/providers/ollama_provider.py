@@ -1,15 +1,16 @@
 from __future__ import annotations
 
 import json
-import urllib.request
 from typing import List, Dict, Any
 
-from .base import Message
+from .base import Message, ToolSpec, openai_tools, parse_openai_tool_calls
+from .transport import HTTPTransport, shared_transport
 
 
 class OllamaProvider:
-    def __init__(self, base_url: str = "http://localhost:11434") -> None:
+    def __init__(self, base_url: str = "http://localhost:11434", transport: HTTPTransport | None = None) -> None:
         self.base_url = base_url.rstrip("/")
+        self.transport = transport or shared_transport()
 
     def generate(
         self,
@@ -18,6 +19,8 @@ class OllamaProvider:
         request_timeout: int = 120,
         reasoning: None | bool = None,
         reasoning_effort: None | str = None,
+        tools: List[ToolSpec] | None = None,
+        response_format: Dict[str, Any] | None = None,
     ) -> Dict[str, Any]:
         url = f"{self.base_url}/api/chat"
         body = {
@@ -25,21 +28,22 @@ class OllamaProvider:
             "messages": messages,
             "stream": False,
         }
+        if tools:
+            body["tools"] = openai_tools(tools)
+        if response_format:
+            body["format"] = response_format["schema"] if response_format.get("type") == "json_schema" else "json"
         data = json.dumps(body).encode("utf-8")
-        req = urllib.request.Request(
-            url,
-            data=data,
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
-        with urllib.request.urlopen(req, timeout=request_timeout) as resp:
+        headers = {"Content-Type": "application/json"}
+        with self.transport.request("POST", url, body=data, headers=headers, timeout=request_timeout) as resp:
             payload = json.loads(resp.read().decode("utf-8"))
         content = ""
+        tool_calls = []
         try:
             content = payload["message"]["content"] or ""
+            tool_calls = parse_openai_tool_calls(payload["message"].get("tool_calls"))
         except Exception:
             content = json.dumps(payload)
-        return {"content": content, "reasoning": None, "raw": payload}
+        return {"content": content, "reasoning": None, "raw": payload, "tool_calls": tool_calls}
 
     def generate_stream(
         self,
@@ -48,6 +52,8 @@ class OllamaProvider:
         request_timeout: int = 120,
         reasoning: None | bool = None,
         reasoning_effort: None | str = None,
+        tools: List[ToolSpec] | None = None,
+        response_format: Dict[str, Any] | None = None,
     ):
         import time
         url = f"{self.base_url}/api/chat"
@@ -56,17 +62,17 @@ class OllamaProvider:
             "messages": messages,
             "stream": True,
         }
+        if tools:
+            body["tools"] = openai_tools(tools)
+        if response_format:
+            body["format"] = response_format["schema"] if response_format.get("type") == "json_schema" else "json"
         data = json.dumps(body).encode("utf-8")
-        req = urllib.request.Request(
-            url,
-            data=data,
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
+        headers = {"Content-Type": "application/json"}
         content_acc = []
+        tool_calls = []
         raw_last = None
         try:
-            with urllib.request.urlopen(req, timeout=request_timeout) as resp:
+            with self.transport.request("POST", url, body=data, headers=headers, timeout=request_timeout) as resp:
                 # Ollama streams JSON objects separated by newlines
                 while True:
                     line = resp.readline()
@@ -82,9 +88,11 @@ class OllamaProvider:
                         text = msg.get("content")
                         content_acc.append(text)
                         yield {"event": "delta", "text": text}
+                    if msg.get("tool_calls"):
+                        tool_calls.extend(parse_openai_tool_calls(msg.get("tool_calls")))
                     if evt.get("done"):
                         break
         except Exception:
             pass
         final_text = "".join(content_acc)
-        yield {"event": "final", "content": final_text, "reasoning": None, "raw": raw_last}
+        yield {"event": "final", "content": final_text, "reasoning": None, "raw": raw_last, "tool_calls": tool_calls}
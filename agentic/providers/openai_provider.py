@@ -1,16 +1,17 @@
 from __future__ import annotations
 
 import json
-import urllib.request
 from typing import List, Dict, Optional, Any
 
-from .base import Message
+from .base import Message, ToolSpec, ToolCallAccumulator, openai_response_format, openai_tools, parse_openai_tool_calls
+from .transport import HTTPTransport, shared_transport
 
 
 class OpenAIProvider:
-    def __init__(self, api_key: str, base_url: Optional[str] = None) -> None:
+    def __init__(self, api_key: str, base_url: Optional[str] = None, transport: Optional[HTTPTransport] = None) -> None:
         self.api_key = api_key
         self.base_url = base_url.rstrip("/") if base_url else "https://api.openai.com"
+        self.transport = transport or shared_transport()
 
     def generate(
         self,
@@ -19,6 +20,8 @@ class OpenAIProvider:
         request_timeout: int = 120,
         reasoning: Optional[bool] = None,
         reasoning_effort: Optional[str] = None,
+        tools: Optional[List[ToolSpec]] = None,
+        response_format: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         url = f"{self.base_url}/v1/chat/completions"
         body = {
@@ -33,25 +36,26 @@ class OpenAIProvider:
             use_reasoning = any(x in (model or "").lower() for x in ["o3", "o4", "reason"])
         if use_reasoning:
             body["reasoning"] = {"effort": (reasoning_effort or "medium")}
+        if tools:
+            body["tools"] = openai_tools(tools)
+        if response_format:
+            body["response_format"] = openai_response_format(response_format)
         data = json.dumps(body).encode("utf-8")
-        req = urllib.request.Request(
-            url,
-            data=data,
-            headers={
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-            },
-            method="POST",
-        )
-        with urllib.request.urlopen(req, timeout=request_timeout) as resp:
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        with self.transport.request("POST", url, body=data, headers=headers, timeout=request_timeout) as resp:
             payload = json.loads(resp.read().decode("utf-8"))
         # Extract content and optional reasoning
         content = ""
         reasoning_text = None
+        tool_calls = []
         try:
             choice = payload.get("choices", [{}])[0]
             msg = (choice.get("message") or {})
             content = msg.get("content") or ""
+            tool_calls = parse_openai_tool_calls(msg.get("tool_calls"))
             # heuristic keys for reasoning traces
             rc = msg.get("reasoning") or msg.get("reasoning_content") or choice.get("reasoning_content")
             if isinstance(rc, list):
@@ -60,7 +64,7 @@ class OpenAIProvider:
                 reasoning_text = rc
         except Exception:
             content = json.dumps(payload)
-        return {"content": content, "reasoning": reasoning_text, "raw": payload}
+        return {"content": content, "reasoning": reasoning_text, "raw": payload, "tool_calls": tool_calls}
 
     def generate_stream(
         self,
@@ -69,6 +73,8 @@ class OpenAIProvider:
         request_timeout: int = 120,
         reasoning: Optional[bool] = None,
         reasoning_effort: Optional[str] = None,
+        tools: Optional[List[ToolSpec]] = None,
+        response_format: Optional[Dict[str, Any]] = None,
     ):
         import io
         url = f"{self.base_url}/v1/chat/completions"
@@ -85,21 +91,21 @@ class OpenAIProvider:
             use_reasoning = any(x in (model or "").lower() for x in ["o3", "o4", "reason"])
         if use_reasoning:
             body["reasoning"] = {"effort": (reasoning_effort or "medium")}
+        if tools:
+            body["tools"] = openai_tools(tools)
+        if response_format:
+            body["response_format"] = openai_response_format(response_format)
         data = json.dumps(body).encode("utf-8")
-        req = urllib.request.Request(
-            url,
-            data=data,
-            headers={
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-            },
-            method="POST",
-        )
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
         content_acc = []
+        calls_acc = ToolCallAccumulator()
         reasoning_acc = []
         raw_last = None
         try:
-            with urllib.request.urlopen(req, timeout=request_timeout) as resp:
+            with self.transport.request("POST", url, body=data, headers=headers, timeout=request_timeout) as resp:
                 buf = b""
                 while True:
                     chunk = resp.readline()
@@ -114,6 +120,8 @@ class OpenAIProvider:
                             raw_last = delta
                             choice = (delta.get("choices") or [{}])[0]
                             d = choice.get("delta") or {}
+                            if d.get("tool_calls"):
+                                calls_acc.add(d["tool_calls"])
                             if "content" in d and d["content"]:
                                 text = d["content"]
                                 content_acc.append(text)
@@ -135,4 +143,4 @@ class OpenAIProvider:
             pass
         final_text = "".join(content_acc)
         final_reasoning = "".join(reasoning_acc) if reasoning_acc else None
-        yield {"event": "final", "content": final_text, "reasoning": final_reasoning, "raw": raw_last}
+        yield {"event": "final", "content": final_text, "reasoning": final_reasoning, "raw": raw_last, "tool_calls": calls_acc.result()}
@@ -1,18 +1,19 @@
 from __future__ import annotations
 
 import json
-import urllib.request
 from typing import List, Dict, Optional, Any
 
-from .base import Message
+from .base import Message, ToolSpec, ToolCallAccumulator, openai_response_format, openai_tools, parse_openai_tool_calls
+from .transport import HTTPTransport, shared_transport
 
 
 class OpenRouterProvider:
-    def __init__(self, api_key: str, base_url: Optional[str] = None, referer: Optional[str] = None, app_name: Optional[str] = None) -> None:
+    def __init__(self, api_key: str, base_url: Optional[str] = None, referer: Optional[str] = None, app_name: Optional[str] = None, transport: Optional[HTTPTransport] = None) -> None:
         self.api_key = api_key
         self.base_url = base_url.rstrip("/") if base_url else "https://openrouter.ai/api"
         self.referer = referer
         self.app_name = app_name
+        self.transport = transport or shared_transport()
 
     def generate(
         self,
@@ -21,6 +22,8 @@ class OpenRouterProvider:
         request_timeout: int = 120,
         reasoning: Optional[bool] = None,
         reasoning_effort: Optional[str] = None,
+        tools: Optional[List[ToolSpec]] = None,
+        response_format: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         url = f"{self.base_url}/v1/chat/completions"
         body = {
@@ -35,6 +38,10 @@ class OpenRouterProvider:
             use_reasoning = any(x in (model or "").lower() for x in ["o3", "o4", "reason"])
         if use_reasoning:
             body["reasoning"] = {"effort": (reasoning_effort or "medium")}
+        if tools:
+            body["tools"] = openai_tools(tools)
+        if response_format:
+            body["response_format"] = openai_response_format(response_format)
         data = json.dumps(body).encode("utf-8")
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -44,15 +51,16 @@ class OpenRouterProvider:
             headers["HTTP-Referer"] = self.referer
         if self.app_name:
             headers["X-Title"] = self.app_name
-        req = urllib.request.Request(url, data=data, headers=headers, method="POST")
-        with urllib.request.urlopen(req, timeout=request_timeout) as resp:
+        with self.transport.request("POST", url, body=data, headers=headers, timeout=request_timeout) as resp:
             payload = json.loads(resp.read().decode("utf-8"))
         content = ""
         reasoning_text = None
+        tool_calls = []
         try:
             choice = payload.get("choices", [{}])[0]
             msg = (choice.get("message") or {})
             content = msg.get("content") or ""
+            tool_calls = parse_openai_tool_calls(msg.get("tool_calls"))
             rc = msg.get("reasoning") or msg.get("reasoning_content") or choice.get("reasoning_content")
             if isinstance(rc, list):
                 reasoning_text = "\n".join([x.get("text", "") for x in rc if isinstance(x, dict)])
@@ -60,7 +68,7 @@ class OpenRouterProvider:
                 reasoning_text = rc
         except Exception:
             content = json.dumps(payload)
-        return {"content": content, "reasoning": reasoning_text, "raw": payload}
+        return {"content": content, "reasoning": reasoning_text, "raw": payload, "tool_calls": tool_calls}
 
     def generate_stream(
         self,
@@ -69,6 +77,8 @@ class OpenRouterProvider:
         request_timeout: int = 120,
         reasoning: Optional[bool] = None,
         reasoning_effort: Optional[str] = None,
+        tools: Optional[List[ToolSpec]] = None,
+        response_format: Optional[Dict[str, Any]] = None,
     ):
         url = f"{self.base_url}/v1/chat/completions"
         body = {
@@ -84,6 +94,10 @@ class OpenRouterProvider:
             use_reasoning = any(x in (model or "").lower() for x in ["o3", "o4", "reason"])
         if use_reasoning:
             body["reasoning"] = {"effort": (reasoning_effort or "medium")}
+        if tools:
+            body["tools"] = openai_tools(tools)
+        if response_format:
+            body["response_format"] = openai_response_format(response_format)
         data = json.dumps(body).encode("utf-8")
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -93,12 +107,12 @@ class OpenRouterProvider:
             headers["HTTP-Referer"] = self.referer
         if self.app_name:
             headers["X-Title"] = self.app_name
-        req = urllib.request.Request(url, data=data, headers=headers, method="POST")
         content_acc = []
+        calls_acc = ToolCallAccumulator()
         reasoning_acc = []
         raw_last = None
         try:
-            with urllib.request.urlopen(req, timeout=request_timeout) as resp:
+            with self.transport.request("POST", url, body=data, headers=headers, timeout=request_timeout) as resp:
                 while True:
                     line = resp.readline()
                     if not line:
@@ -112,6 +126,8 @@ class OpenRouterProvider:
                             raw_last = delta
                             choice = (delta.get("choices") or [{}])[0]
                             d = choice.get("delta") or {}
+                            if d.get("tool_calls"):
+                                calls_acc.add(d["tool_calls"])
                             if d.get("content"):
                                 text = d.get("content")
                                 content_acc.append(text)
@@ -132,4 +148,4 @@ class OpenRouterProvider:
             pass
         final_text = "".join(content_acc)
         final_reasoning = "".join(reasoning_acc) if reasoning_acc else None
-        yield {"event": "final", "content": final_text, "reasoning": final_reasoning, "raw": raw_last}
+        yield {"event": "final", "content": final_text, "reasoning": final_reasoning, "raw": raw_last, "tool_calls": calls_acc.result()}
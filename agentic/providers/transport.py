@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import http.client
+import io
+import ssl
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .. import __version__
+
+
+PoolKey = Tuple[str, str, int]
+
+
+class PooledResponse:
+    """File-like HTTP response that hands its connection back to the pool when done.
+
+    Supports the subset the providers use: read, readline, status, headers and
+    use as a context manager.
+    """
+
+    DRAIN_LIMIT = 64 * 1024
+    DRAIN_TIMEOUT = 0.5
+
+    def __init__(self, transport: "HTTPTransport", key: PoolKey, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse) -> None:
+        self._transport = transport
+        self._key = key
+        self._conn: Optional[http.client.HTTPConnection] = conn
+        self._resp = resp
+        self.status = resp.status
+        self.reason = resp.reason
+        self.headers = resp.headers
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return self._resp.read(amt)
+
+    def readline(self, limit: int = -1) -> bytes:
+        return self._resp.readline(limit)
+
+    def getheader(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        return self._resp.getheader(name, default)
+
+    def close(self, drain: bool = False) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        resp = self._resp
+        if drain and not resp.isclosed() and not resp.will_close:
+            # Streams that stop at a sentinel ([DONE], done=true) leave the chunked
+            # trailer unread; it is normally already buffered.
+            try:
+                if conn.sock is not None:
+                    conn.sock.settimeout(self.DRAIN_TIMEOUT)
+                while not resp.isclosed() and resp.read(self.DRAIN_LIMIT):
+                    pass
+            except Exception:
+                pass
+        self._transport._release(self._key, conn, reusable=resp.isclosed() and not resp.will_close)
+
+    def __enter__(self) -> "PooledResponse":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # Abandoned mid-stream (e.g. generator closed): don't wait for the rest
+        self.close(drain=exc_type is None)
+
+
+class HTTPTransport:
+    """Keep-alive HTTP(S) client with per-host connection pools.
+
+    Idle connections are kept up to max_per_host per host and evicted after
+    idle_timeout seconds. A request that fails on a reused connection before a
+    response arrives (the server closed it while idle) is retried once on a
+    fresh connection. When a proxy is configured for the URL, urllib is used so
+    the usual proxy environment variables keep working.
+    """
+
+    RETRYABLE = (ConnectionError, http.client.BadStatusLine, http.client.CannotSendRequest)
+
+    def __init__(self, max_per_host: int = 4, idle_timeout: float = 60.0) -> None:
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self._idle: Dict[PoolKey, List[Tuple[http.client.HTTPConnection, float]]] = {}
+        self._lock = threading.Lock()
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        self._counters: Dict[str, int] = {
+            "requests": 0,
+            "connections_opened": 0,
+            "connections_reused": 0,
+            "idle_evicted": 0,
+            "discarded": 0,
+            "retries": 0,
+            "proxied": 0,
+        }
+
+    def configure(self, max_per_host: Optional[int] = None, idle_timeout: Optional[float] = None) -> None:
+        if max_per_host is not None:
+            self.max_per_host = max_per_host
+        if idle_timeout is not None:
+            self.idle_timeout = idle_timeout
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self._counters)
+            out["idle"] = sum(len(v) for v in self._idle.values())
+        return out
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    def _new_connection(self, key: PoolKey, timeout: float) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        self._count("connections_opened")
+        if scheme == "https":
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _acquire(self, key: PoolKey, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        now = time.monotonic()
+        conn = None
+        with self._lock:
+            idle = self._idle.get(key) or []
+            fresh = [(c, t) for c, t in idle if now - t <= self.idle_timeout]
+            expired = [c for c, t in idle if now - t > self.idle_timeout]
+            if fresh:
+                conn, _ = fresh.pop()
+                self._counters["connections_reused"] += 1
+            if key in self._idle:
+                self._idle[key] = fresh
+            self._counters["idle_evicted"] += len(expired)
+        for c in expired:
+            c.close()
+        if conn is None:
+            return self._new_connection(key, timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _release(self, key: PoolKey, conn: http.client.HTTPConnection, reusable: bool) -> None:
+        if reusable and conn.sock is not None:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_per_host:
+                    idle.append((conn, time.monotonic()))
+                    return
+        self._count("discarded")
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            pools, self._idle = self._idle, {}
+        for idle in pools.values():
+            for c, _ in idle:
+                c.close()
+
+    def _use_proxy(self, scheme: str, host: str) -> bool:
+        proxies = urllib.request.getproxies()
+        return bool(proxies.get(scheme)) and not urllib.request.proxy_bypass(host)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 120,
+    ) -> Any:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        host = parts.hostname or ""
+        port = parts.port or (443 if scheme == "https" else 80)
+        hdrs = {"User-Agent": f"agentic/{__version__}", "Accept-Encoding": "identity"}
+        hdrs.update(headers or {})
+        self._count("requests")
+        if self._use_proxy(scheme, host):
+            self._count("proxied")
+            req = urllib.request.Request(url, data=body, headers=hdrs, method=method)
+            return urllib.request.urlopen(req, timeout=timeout)
+        key = (scheme, host, port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        for attempt in (0, 1):
+            conn, reused = self._acquire(key, timeout)
+            try:
+                conn.request(method, path, body=body, headers=hdrs)
+                resp = conn.getresponse()
+            except self.RETRYABLE:
+                conn.close()
+                if reused and attempt == 0:
+                    self._count("retries")
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            break
+        if resp.status >= 400:
+            data = resp.read()
+            self._release(key, conn, reusable=not resp.will_close)
+            raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, io.BytesIO(data))
+        return PooledResponse(self, key, conn, resp)
+
+_shared: Optional[HTTPTransport] = None
+_shared_lock = threading.Lock()
+
+
+def shared_transport() -> HTTPTransport:
+    """Process-wide transport used by all providers unless one is passed in."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = HTTPTransport()
+        return _shared
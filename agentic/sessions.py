@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from .orchestrator import Orchestrator
+
+
+SESSION_COOKIE = "agentic_sid"
+SESSION_HEADER = "X-Agentic-Session"
+_SID_RE = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+
+def valid_session_id(sid: Optional[str]) -> bool:
+    return bool(sid) and bool(_SID_RE.match(sid or ""))
+
+
+class Session:
+    """One operator's conversation: its own Orchestrator plus UI state.
+
+    lock serializes runs (chat, approve) on the session; cancel does not take it.
+    """
+
+    def __init__(self, sid: str, orch: Orchestrator) -> None:
+        self.id = sid
+        self.orch = orch
+        self.auto_approve = False
+        self.channel: Any = None  # webserver.EventChannel, created on first stream
+        self.results: Any = None  # webserver.ToolResultStore for large tool results
+        self.lock = threading.Lock()
+        self.created = time.monotonic()
+        self.last_used = self.created
+
+    def touch(self) -> None:
+        self.last_used = time.monotonic()
+
+    @property
+    def busy(self) -> bool:
+        return self.lock.locked()
+
+
+class SessionPoolFull(Exception):
+    pass
+
+
+class SessionPool:
+    """Maps session IDs to Sessions with idle-timeout and LRU eviction.
+
+    Sessions idle for longer than idle_timeout seconds are dropped. When
+    max_sessions are live, creating another evicts the least recently used
+    idle session; if every session is busy, SessionPoolFull is raised.
+    """
+
+    def __init__(self, factory: Callable[[], Orchestrator], max_sessions: int = 64, idle_timeout: float = 1800) -> None:
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {"created": 0, "evicted_idle": 0, "evicted_lru": 0}
+
+    def get(self, sid: Optional[str]) -> Session:
+        """Return the session for sid, creating it (under sid if valid) when unknown."""
+        with self._lock:
+            evicted = self._expire()
+            sess = self._sessions.get(sid) if sid else None
+            if sess is None:
+                if len(self._sessions) >= self.max_sessions:
+                    evicted += self._evict_lru()
+                sess = Session(sid if valid_session_id(sid) else secrets.token_urlsafe(16), self.factory())
+                self._sessions[sess.id] = sess
+                self.counters["created"] += 1
+            self._sessions.move_to_end(sess.id)
+            sess.touch()
+        for s in evicted:
+            s.orch.close()
+        return sess
+
+    def peek(self, sid: Optional[str]) -> Optional[Session]:
+        with self._lock:
+            return self._sessions.get(sid) if sid else None
+
+    def _expire(self) -> List[Session]:
+        if self.idle_timeout <= 0:
+            return []
+        now = time.monotonic()
+        out = [s for s in self._sessions.values() if not s.busy and now - s.last_used > self.idle_timeout]
+        for s in out:
+            del self._sessions[s.id]
+        self.counters["evicted_idle"] += len(out)
+        return out
+
+    def _evict_lru(self) -> List[Session]:
+        for s in self._sessions.values():  # oldest first
+            if not s.busy:
+                del self._sessions[s.id]
+                self.counters["evicted_lru"] += 1
+                return [s]
+        raise SessionPoolFull(f"all {len(self._sessions)} sessions are busy")
+
+    def snapshot(self) -> List[Session]:
+        with self._lock:
+            return list(self._sessions.values())
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.counters, "live": len(self._sessions), "busy": sum(1 for s in self._sessions.values() if s.busy)}
+
+    def close(self) -> None:
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), OrderedDict()
+        for s in sessions:
+            s.orch.close()
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import copy
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .tools.fs import _resolve_in_workspace
+from .tools.git_tools import classify_git_risk
+
+
+# git subcommands whose output only depends on refs and objects. status, diff,
+# blame and ls-files also read the working tree, which nothing cheap validates,
+# and are not cached.
+GIT_REF_COMMANDS = {"log", "show", "branch", "rev-parse", "describe", "shortlog"}
+PATH_WRITERS = {"write_file": ("path",), "replace_in_file": ("path",), "delete_path": ("path",), "make_dir": ("path",), "move_path": ("src", "dst"), "copy_path": ("dst",)}
+MEMORY_WRITERS = {"memory_add", "memory_delete", "memory_update"}
+# Non read-only tools that cannot change anything cached here
+NO_LOCAL_EFFECT = {"web_get", "web_search", "browser_headless", "plan", "memory_search", "memory_list"}
+
+
+def _stat_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class ToolResultCache:
+    """Per-session memoization of read-only tool results.
+
+    Each entry carries a cheap validator taken before the tool ran: mtime and
+    size of the file for read_file, the memory file for memory
+    tools, and HEAD plus the refs it resolves through for git commands that
+    only read refs and objects. A lookup whose
+    validator no longer matches is a miss. web_get entries are revalidated by
+    the caller with If-None-Match/If-Modified-Since. Write tools drop entries
+    for the paths they touch; tools with unknown side effects (shell, tmux
+    send, MCP, ...) drop every local entry. list_dir is not cached: its
+    result carries the children's sizes, which the directory's own stat does
+    not cover, and checking every child costs as much as listing again.
+    Results are copied on the way in and out, so callers may modify them.
+    """
+
+    def __init__(self, workspace_root: Path, config_dir: Path, max_entries: int = 256) -> None:
+        self.workspace_root = workspace_root
+        self.config_dir = config_dir
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {"hits": 0, "misses": 0, "stale": 0, "invalidated": 0}
+
+    @staticmethod
+    def _key(tool: str, args: Dict[str, Any]) -> str:
+        return tool + ":" + json.dumps(args, sort_keys=True, ensure_ascii=False, default=str)
+
+    def _git_dir(self, args: Dict[str, Any]) -> Optional[Path]:
+        cwd = Path(args.get("cwd") or self.workspace_root)
+        for d in (cwd, *cwd.parents):
+            if (d / ".git").is_dir():
+                return d / ".git"
+        return None
+
+    def _target(self, tool: str, args: Dict[str, Any]) -> Optional[Tuple[Optional[Path], Any]]:
+        """(path the result depends on, validator) for cacheable calls, else None."""
+        try:
+            if tool == "read_file":
+                p = _resolve_in_workspace(args["path"], self.workspace_root)
+                return p, _stat_signature(p)
+            if tool in {"memory_search", "memory_list"}:
+                p = self.config_dir / "memory.jsonl"
+                return p, _stat_signature(p)
+            if tool == "git":
+                argv = (args.get("args") or "").split()
+                if not argv or argv[0] not in GIT_REF_COMMANDS or classify_git_risk(args.get("args", "")) != "safe":
+                    return None
+                git_dir = self._git_dir(args)
+                if git_dir is None:
+                    return None
+                return git_dir.parent, self._ref_signature(git_dir)
+            if tool == "web_get":
+                return None, None
+        except (KeyError, OSError, PermissionError):
+            return None
+        return None
+
+    @staticmethod
+    def _ref_signature(git_dir: Path) -> Tuple[Any, ...]:
+        # HEAD is a symbolic ref and unchanged when its branch advances: stat
+        # the branch file, packed-refs, and the heads/tags directories (a ref
+        # update renames a lock file in, so other branches and tags show too)
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+        sigs = [head, _stat_signature(git_dir / "packed-refs"), _stat_signature(git_dir / "refs" / "heads"), _stat_signature(git_dir / "refs" / "tags")]
+        if head.startswith("ref:"):
+            sigs.append(_stat_signature(git_dir / head[4:].strip()))
+        return tuple(sigs)
+
+    def lookup(self, tool: str, args: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Any]:
+        """Return (cached result or None, token to pass to store)."""
+        target = self._target(tool, args)
+        if target is None:
+            return None, None
+        key = self._key(tool, args)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and tool != "web_get":
+                if entry["validator"] == target[1]:
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return copy.deepcopy(entry["result"]), None
+                del self._entries[key]
+                self.counters["stale"] += 1
+            if tool != "web_get":
+                self.counters["misses"] += 1
+        return None, (key, target)
+
+    def web_entry(self, args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(self._key("web_get", args))
+            return copy.deepcopy(entry["result"]) if entry else None
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def store(self, token: Any, result: Dict[str, Any]) -> None:
+        if token is None or not isinstance(result, dict) or result.get("error"):
+            return
+        key, (path, validator) = token
+        if key.startswith("web_get:") and not (result.get("etag") or result.get("last_modified")):
+            return
+        with self._lock:
+            self._entries[key] = {"path": path, "validator": validator, "result": copy.deepcopy(result)}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _drop(self, pred) -> None:
+        with self._lock:
+            keys = [k for k, e in self._entries.items() if pred(k, e)]
+            for k in keys:
+                del self._entries[k]
+            self.counters["invalidated"] += len(keys)
+
+    def invalidate(self, tool: str, args: Dict[str, Any]) -> None:
+        """Drop entries a (non read-only) tool call may have made stale."""
+        if tool in NO_LOCAL_EFFECT or (tool == "git" and classify_git_risk(args.get("args", "")) == "safe"):
+            return
+        if tool in PATH_WRITERS:
+            touched: List[Path] = []
+            for name in PATH_WRITERS[tool]:
+                try:
+                    touched.append(_resolve_in_workspace(args.get(name, ""), self.workspace_root))
+                except (OSError, PermissionError):
+                    continue
+
+            def affected(key: str, entry: Dict[str, Any]) -> bool:
+                if key.startswith("git:"):
+                    return True
+                p = entry["path"]
+                return p is not None and any(p == t or p in t.parents or t in p.parents for t in touched)
+
+            self._drop(affected)
+        elif tool in MEMORY_WRITERS:
+            self._drop(lambda k, e: k.startswith(("memory_search:", "memory_list:")))
+        else:
+            self._drop(lambda k, e: not k.startswith("web_get:"))
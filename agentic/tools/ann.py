@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import random
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .vector_store import VectorReader, np
+
+# Without numpy, the batched exact search is faster than probing lists
+AVAILABLE = np is not None
+
+MIN_ROWS = 5000  # below this, exact search is fast enough and stays exact
+TRAIN_PER_LIST = 32  # k-means sample size per list
+ITERATIONS = 8
+REBUILD_GROWTH = 4  # retrain once the sidecar is this many times the size it was trained on
+SAVE_EVERY = 256  # incremental inserts before the file is rewritten (or 1/8 of the rows, if more)
+CHUNK = 65536
+
+
+class IVFIndex:
+    """Inverted-file approximate index over the rows of memory.vec.
+
+    Spherical k-means (unit centroids, dot-product assignment) splits the
+    rows into about 2*sqrt(n) lists; a query only looks at the rows of the
+    nprobe lists whose centroids score best, and the caller scores those
+    exactly. New rows are assigned to their nearest list as they arrive.
+    Rows of deleted or replaced entries stay listed (the memory log's
+    tombstones say they are dead, and callers drop them) until the sidecar
+    is compacted: that changes its identity, which forces a rebuild, as
+    does growing well past the size the centroids were trained on.
+
+    Training happens inside sync(), on the query path: the first search past
+    MIN_ROWS, and the first after a compaction or REBUILD_GROWTH-fold growth,
+    pays for k-means and the assignment of every row (about 0.5s for 10k
+    rows and 2-3s for 100k; see scripts/bench_memory_ann.py). Later searches
+    only assign the rows added since.
+
+    Requires numpy (see AVAILABLE).
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._clear()
+        if AVAILABLE:
+            self._load()
+
+    def _clear(self) -> None:
+        self.source: Optional[Tuple[int, ...]] = None  # VectorReader.ident the rows belong to
+        self.covered = 0  # rows 0..covered-1 are assigned
+        self.trained = 0
+        self.centroids: List[List[float]] = []
+        self.lists: List[List[int]] = []
+        self._dirty = 0
+        self._prepare()
+
+    def _prepare(self) -> None:
+        if not AVAILABLE:
+            return
+        self._mat = np.asarray(self.centroids, dtype=np.float32) if self.centroids else None
+
+    # scoring
+
+    def _centroid_scores(self, vec: Sequence[float]):
+        return self._mat @ np.asarray(vec, dtype=np.float32)
+
+    def _nearest(self, vec: Sequence[float]) -> int:
+        return int(np.argmax(self._centroid_scores(vec)))
+
+    def candidates(self, q: Sequence[float], nprobe: int) -> List[int]:
+        """Rows in the nprobe lists closest to q."""
+        with self._lock:
+            if not self.centroids:
+                return []
+            scores = self._centroid_scores(q)
+            nprobe = min(max(1, nprobe), len(self.lists))
+            best = np.argpartition(-scores, nprobe - 1)[:nprobe].tolist()
+            rows: List[int] = []
+            for i in best:
+                rows.extend(self.lists[i])
+            return rows
+
+    # building and updates
+
+    def sync(self, reader: VectorReader) -> None:
+        """Bring the index up to date with the sidecar reader maps."""
+        with self._lock:
+            if not self._current(reader):
+                self._load()  # another process may have rebuilt it already
+            if not self._current(reader) or (self.trained and reader.rows > REBUILD_GROWTH * self.trained):
+                self._build(reader)
+            elif reader.rows > self.covered:
+                self._assign(reader, self.covered, reader.rows)
+            if self._save_due():
+                self._save()
+
+    def _current(self, reader: VectorReader) -> bool:
+        return bool(self.centroids) and self.source == reader.ident and reader.rows >= self.covered
+
+    def insert(self, row: int, vec: Sequence[float], source: Optional[Tuple[int, ...]]) -> None:
+        """Assign one freshly appended row; anything out of step is left for sync()."""
+        with self._lock:
+            if not self.centroids or source != self.source or row != self.covered:
+                return
+            self.lists[self._nearest(vec)].append(row)
+            self.covered += 1
+            self._dirty += 1
+            if self._save_due():
+                self._save()
+
+    def _save_due(self) -> bool:
+        # insert() runs under memory_add's log lock; scaling with size keeps the
+        # O(rows) rewrite amortized O(1) per insert. Unsaved rows are reassigned
+        # by sync() after a restart.
+        return self._dirty >= max(SAVE_EVERY, self.covered // 8)
+
+    def _build(self, reader: VectorReader) -> None:
+        n = reader.rows
+        self._clear()
+        if n == 0:
+            return
+        rng = random.Random(n)
+        k = max(1, min(n, int(2 * math.sqrt(n))))
+        sample_rows = sorted(rng.sample(range(n), min(n, k * TRAIN_PER_LIST)))
+        sample = [reader.vector(r) for r in sample_rows]
+        self.centroids = self._kmeans(sample, k, rng)
+        self.lists = [[] for _ in range(k)]
+        self.source = reader.ident
+        self.trained = n
+        self._prepare()
+        self._assign(reader, 0, n)
+        self._save()
+
+    def _kmeans(self, sample: List[List[float]], k: int, rng: random.Random) -> List[List[float]]:
+        data = np.asarray(sample, dtype=np.float32)
+        cents = data[rng.sample(range(len(sample)), k)].copy()
+        for _ in range(ITERATIONS):
+            assign = np.argmax(data @ cents.T, axis=1)
+            sums = np.zeros_like(cents)
+            np.add.at(sums, assign, data)
+            norms = np.linalg.norm(sums, axis=1)
+            filled = norms > 0  # an empty list keeps its previous centroid
+            cents[filled] = sums[filled] / norms[filled, None]
+        return cents.tolist()
+
+    def _assign(self, reader: VectorReader, start: int, stop: int) -> None:
+        for lo in range(start, stop, CHUNK):
+            hi = min(stop, lo + CHUNK)
+            assign = np.argmax(reader.array(lo, hi) @ self._mat.T, axis=1)
+            # group the chunk's rows by list, keeping row order within each
+            order = np.argsort(assign, kind="stable")
+            bounds = np.searchsorted(assign[order], np.arange(len(self.lists) + 1))
+            for i in np.flatnonzero(np.diff(bounds)):
+                self.lists[i].extend((order[bounds[i]:bounds[i + 1]] + lo).tolist())
+        self.covered = stop
+        self._dirty += stop - start
+
+    # persistence
+
+    def _save(self) -> None:
+        data = {
+            "v": 1,
+            "source": list(self.source) if self.source else None,
+            "covered": self.covered,
+            "trained": self.trained,
+            "centroids": [[round(x, 6) for x in c] for c in self.centroids],
+            "lists": self.lists,
+        }
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            f.write(json.dumps(data, separators=(",", ":")))  # dumps uses the C encoder, dump does not
+        os.replace(tmp, self.path)
+        self._dirty = 0
+
+    def _load(self) -> None:
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("v") != 1 or not data.get("source"):
+                return
+            source = tuple(data["source"])
+            covered, trained = int(data["covered"]), int(data["trained"])
+            centroids, lists = data["centroids"], data["lists"]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return
+        self.source, self.covered, self.trained = source, covered, trained
+        self.centroids, self.lists = centroids, lists
+        self._dirty = 0
+        self._prepare()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sizes = [len(x) for x in self.lists]
+            return {"lists": len(sizes), "rows": self.covered, "trained": self.trained, "largest_list": max(sizes, default=0)}
+
+
+_INDEXES: Dict[Path, IVFIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def open_ann(path: Path) -> IVFIndex:
+    """The process-wide IVFIndex for path."""
+    path = Path(path).resolve()
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(path)
+        if index is None:
+            index = _INDEXES[path] = IVFIndex(path)
+        return index
@@ -1,15 +1,23 @@
 from __future__ import annotations
 
-import json
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple
 import hashlib
+import heapq
 import math
 
+from . import ann
+from .memory_index import InvertedIndex
+from .memory_log import MemoryLog, open_log
+from .vector_store import VectorFile
+
 
 MEM_FILE = "memory.jsonl"
+VEC_FILE = "memory.vec"
+INDEX_FILE = "memory.idx"
+ANN_FILE = "memory.ann"
 DIM = 256
 
 
@@ -22,6 +30,11 @@ def _mem_path(config_dir: Path) -> Path:
     return (config_dir / MEM_FILE).resolve()
 
 
+def _vectors(config_dir: Path, dtype: str = "float32") -> VectorFile:
+    # dtype only applies when the sidecar is created
+    return VectorFile(_mem_path(config_dir).with_name(VEC_FILE), DIM, dtype)
+
+
 def _tokenize(text: str) -> List[str]:
     return [t.lower() for t in text.split() if t.strip()]
 
@@ -45,8 +58,49 @@ def _cos(a: List[float], b: List[float]) -> float:
     return float(sum(x * y for x, y in zip(a, b)))
 
 
-def memory_add(config_dir: Path, text: str, tags: Optional[List[str]] = None, meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+def _log(config_dir: Path, compact_ratio: Optional[float] = None) -> MemoryLog:
     path = _mem_path(config_dir)
+    log = open_log(path, on_compact=lambda entries: _compact_vectors(config_dir, entries), observer=InvertedIndex(path.with_name(INDEX_FILE)))
+    if compact_ratio is not None:
+        log.compact_ratio = compact_ratio
+    return log
+
+
+def _ann(config_dir: Path) -> ann.IVFIndex:
+    return ann.open_ann(_mem_path(config_dir).with_name(ANN_FILE))
+
+
+def _compact_vectors(config_dir: Path, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Runs under the log lock while it compacts: moves legacy inline "vec"
+    lists to the sidecar and, once most sidecar rows are orphaned, rewrites it too."""
+    vf = _vectors(config_dir)
+    for e in entries:
+        vec = e.pop("vec", None)
+        if vec is not None and "row" not in e:
+            e["row"] = vf.append(vec if isinstance(vec, list) and len(vec) == DIM else _embed_local(e.get("text", "")))
+    with vf.reader() as r:
+        if r.rows <= 2 * len(entries) + 64:
+            return entries
+        live = [e for e in entries if isinstance(e.get("row"), int) and 0 <= e["row"] < r.rows]
+        vectors = [r.vector(e["row"]) for e in live]
+    for e in entries:
+        e.pop("row", None)  # entries without a stored vector get re-embedded on search
+    for i, e in enumerate(live):
+        e["row"] = i
+    vf.rewrite(vectors)
+    return entries
+
+
+def _load_store(config_dir: Path) -> Tuple[MemoryLog, List[Dict[str, Any]]]:
+    log = _log(config_dir)
+    entries = log.entries()
+    if any("vec" in e for e in entries):
+        log.compact()  # one-time migration of the inline-vector format
+        entries = log.entries()
+    return log, entries
+
+
+def memory_add(config_dir: Path, text: str, tags: Optional[List[str]] = None, meta: Optional[Dict[str, Any]] = None, vec_dtype: str = "float32", compact_ratio: Optional[float] = None, use_ann: bool = False) -> Dict[str, Any]:
     entry = {
         "id": str(uuid.uuid4()),
         "ts": _ts(),
@@ -54,96 +108,98 @@ def memory_add(config_dir: Path, text: str, tags: Optional[List[str]] = None, me
         "tags": tags or [],
         "meta": meta or {},
     }
-    entry["vec"] = _embed_local(text)
-    with path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    log = _log(config_dir, compact_ratio)
+    vec = _embed_local(text)
+    with log.locked():
+        # The vector goes to the binary sidecar; the log line only references its row
+        vf = _vectors(config_dir, vec_dtype)
+        entry["row"] = vf.append(vec)
+        log.put(entry)
+        if use_ann and ann.AVAILABLE:
+            _ann(config_dir).insert(entry["row"], vec, vf.ident())
     return {"id": entry["id"], "ts": entry["ts"], "tags": entry["tags"]}
 
 
-def _load_entries(path: Path) -> List[Dict[str, Any]]:
-    if not path.exists():
-        return []
-    entries = []
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-                entries.append(obj)
-            except Exception:
-                continue
-    return entries
+def _select(log: MemoryLog, tag: Optional[str]) -> List[Dict[str, Any]]:
+    # Caller holds the log lock; a tag filter is answered from its postings
+    if not tag:
+        return log.entries()
+    return [e for e in (log.get(i) for i in log.observer.tagged(tag)) if e is not None]
 
 
 def memory_list(config_dir: Path, limit: int = 50, tag: Optional[str] = None) -> Dict[str, Any]:
-    path = _mem_path(config_dir)
-    entries = _load_entries(path)
-    if tag:
-        entries = [e for e in entries if tag in (e.get("tags") or [])]
-    entries = entries[-limit:]
-    return {"count": len(entries), "items": [{k: e[k] for k in ("id", "ts", "tags", "text")} for e in entries]}
+    log, _ = _load_store(config_dir)
+    with log.locked(exclusive=False):
+        entries = _select(log, tag)[-limit:]
+    return {"count": len(entries), "items": [{k: e.get(k) for k in ("id", "ts", "tags", "text")} for e in entries]}
 
 
-def memory_delete(config_dir: Path, entry_id: str) -> Dict[str, Any]:
-    path = _mem_path(config_dir)
-    entries = _load_entries(path)
-    new_entries = [e for e in entries if e.get("id") != entry_id]
-    if len(new_entries) == len(entries):
+def memory_delete(config_dir: Path, entry_id: str, compact_ratio: Optional[float] = None) -> Dict[str, Any]:
+    if not _log(config_dir, compact_ratio).delete(entry_id):
         return {"deleted": False, "reason": "not found"}
-    tmp = path.with_suffix(".tmp")
-    with tmp.open("w", encoding="utf-8") as f:
-        for e in new_entries:
-            f.write(json.dumps(e, ensure_ascii=False) + "\n")
-    tmp.replace(path)
     return {"deleted": True, "id": entry_id}
 
 
-def memory_search(config_dir: Path, query: str, top_k: int = 5, tag: Optional[str] = None) -> Dict[str, Any]:
-    path = _mem_path(config_dir)
-    entries = _load_entries(path)
-    if tag:
-        entries = [e for e in entries if tag in (e.get("tags") or [])]
-    if not entries:
-        return {"results": []}
+def memory_search(config_dir: Path, query: str, top_k: int = 5, tag: Optional[str] = None, keyword_weight: float = 0.5, ann_nprobe: int = 0) -> Dict[str, Any]:
+    """Rank by keyword_weight * BM25 (scaled to the best hit) + the rest * cosine.
+
+    Candidates are the best vector matches plus the best keyword matches
+    from the postings; each candidate gets both scores before fusing. With
+    ann_nprobe > 0 and a large store, vector matches come from that many
+    IVF lists instead of every row (numpy only; otherwise the search stays exact).
+    """
+    log, _ = _load_store(config_dir)
+    # Map the sidecar under the lock so a concurrent compaction cannot renumber rows under us
+    with log.locked(exclusive=False):
+        entries = _select(log, tag)
+        if not entries:
+            return {"results": []}
+        keyword = log.observer.search(query, [e["id"] for e in entries] if tag else None) if keyword_weight > 0 else {}
+        reader = _vectors(config_dir).reader()
     q = _embed_local(query)
-    scored = []
-    for e in entries:
-        v = e.get("vec")
-        if not isinstance(v, list):
-            e["vec"] = _embed_local(e.get("text", ""))
-            v = e["vec"]
-        s = _cos(q, v)
-        scored.append((s, e))
-    scored.sort(key=lambda x: x[0], reverse=True)
+    pool = max(top_k * 4, 20)
+    with reader as r:
+        stored = [e for e in entries if isinstance(e.get("row"), int) and 0 <= e["row"] < r.rows]
+        probe = stored
+        if ann_nprobe > 0 and ann.AVAILABLE and len(stored) >= ann.MIN_ROWS:
+            index = _ann(config_dir)
+            index.sync(r)
+            near = set(index.candidates(q, ann_nprobe))
+            probe = [e for e in stored if e["row"] in near]
+        cosine = {probe[i]["id"]: s for s, i in r.top_k(q, [e["row"] for e in probe], pool)}
+        by_id = {e["id"]: e for e in entries}
+        for entry_id in heapq.nlargest(pool, keyword, key=keyword.__getitem__):
+            e = by_id.get(entry_id)
+            if e is not None and entry_id not in cosine and isinstance(e.get("row"), int) and 0 <= e["row"] < r.rows:
+                cosine[entry_id] = r.dot(e["row"], q)
+    if len(stored) < len(entries):
+        # entries whose vector is missing from the sidecar are embedded on the fly
+        ids = {id(e) for e in stored}
+        for e in entries:
+            if id(e) not in ids:
+                cosine[e["id"]] = _cos(q, _embed_local(e.get("text", "")))
+    best = max(keyword.values(), default=0.0) or 1.0
+    scored = [((1 - keyword_weight) * s + keyword_weight * keyword.get(i, 0.0) / best, by_id[i]) for i, s in cosine.items() if i in by_id]
     out = []
-    for s, e in scored[:top_k]:
+    for s, e in heapq.nlargest(top_k, scored, key=lambda x: x[0]):
         out.append({"id": e.get("id"), "score": float(s), "ts": e.get("ts"), "tags": e.get("tags"), "text": e.get("text")})
     return {"results": out}
 
 
-def memory_update(config_dir: Path, entry_id: str, text: Optional[str] = None, tags: Optional[List[str]] = None, meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    path = _mem_path(config_dir)
-    entries = _load_entries(path)
-    found = False
-    for e in entries:
-        if e.get("id") == entry_id:
-            if text is not None:
-                e["text"] = text
-                e["vec"] = _embed_local(text)
-            if tags is not None:
-                e["tags"] = tags
-            if meta is not None:
-                e["meta"] = meta
-            found = True
-            break
-    if not found:
-        return {"updated": False, "reason": "not found"}
-    tmp = path.with_suffix(".tmp")
-    with tmp.open("w", encoding="utf-8") as f:
-        for e in entries:
-            f.write(json.dumps(e, ensure_ascii=False) + "\n")
-    tmp.replace(path)
+def memory_update(config_dir: Path, entry_id: str, text: Optional[str] = None, tags: Optional[List[str]] = None, meta: Optional[Dict[str, Any]] = None, compact_ratio: Optional[float] = None) -> Dict[str, Any]:
+    log = _log(config_dir, compact_ratio)
+    with log.locked():
+        current = log.get(entry_id)
+        if current is None:
+            return {"updated": False, "reason": "not found"}
+        e = dict(current)
+        if text is not None:
+            e["text"] = text
+            e.pop("vec", None)
+            e["row"] = _vectors(config_dir).append(_embed_local(text))
+        if tags is not None:
+            e["tags"] = tags
+        if meta is not None:
+            e["meta"] = meta
+        log.put(e)
     return {"updated": True, "id": entry_id}
-
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+SAVE_EVERY = 64  # changes applied before the snapshot is rewritten (or 1/8 of the entries, if more)
+
+_WORD = re.compile(r"\w+")
+# hostnames, unit names, paths, versions: kept whole in addition to their parts
+_IDENT = re.compile(r"\w[\w.:/@-]*\w")
+
+
+def _is_cjk(ch: str) -> bool:
+    return "\u1100" <= ch <= "\u11ff" or "\u3040" <= ch <= "\u30ff" or "\u3130" <= ch <= "\u318f" or "\u4e00" <= ch <= "\u9fff" or "\uac00" <= ch <= "\ud7a3"
+
+
+def analyze(text: str) -> Counter:
+    """Index terms with their counts.
+
+    Besides the lowercased words, each word contributes character n-grams
+    ("~" prefixed): bigrams for Hangul/CJK, so a stem still matches when a
+    particle is attached (서버 in 서버에서), and trigrams otherwise, so
+    partial identifiers match.
+    """
+    low = text.lower()
+    terms: Counter = Counter()
+    for m in _IDENT.finditer(low):
+        tok = m.group()
+        if not tok.replace("_", "").isalnum():
+            terms[tok] += 1
+    for w in _WORD.findall(low):
+        terms[w] += 1
+        n = 2 if _is_cjk(w[0]) else 3
+        for i in range(len(w) - n + 1):
+            terms["~" + w[i:i + n]] += 1
+    return terms
+
+
+class InvertedIndex:
+    """BM25 postings and tag postings over the live entries of a MemoryLog.
+
+    The log feeds it every record it reads (see MemoryLog's observer), so it
+    stays current incrementally. It is saved as a JSON snapshot tagged with
+    the log's head bytes and the log offset it covers; when the log is
+    opened again the snapshot is loaded and only later records are applied.
+    A compacted log has a new head, so its index is rebuilt from scratch.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._clear(b"")
+
+    def _clear(self, head: bytes) -> None:
+        self.head = head
+        self.covered = 0  # log offset up to which records have been applied
+        self._ids: List[Optional[str]] = []
+        self._num: Dict[str, int] = {}
+        self._len: Dict[int, int] = {}
+        self._total = 0
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._tags: Dict[str, Set[int]] = {}
+        self._dirty = 0
+        self._stale = False  # the file on disk is for another log
+
+    # MemoryLog observer protocol
+
+    def reset(self, head: bytes) -> None:
+        self._clear(head)
+        if head and not self._load(head):
+            self._stale = True  # save once rebuilt
+
+    def apply(self, end: int, entry_id: str, entry: Optional[Dict[str, Any]], prev: Optional[Dict[str, Any]]) -> None:
+        if end <= self.covered:
+            return  # already in the loaded snapshot
+        num = self._num.get(entry_id)
+        if num is not None and prev is not None:
+            self._remove(num, prev)
+        if entry is None:
+            if num is not None:
+                self._ids[num] = None
+                del self._num[entry_id]
+        else:
+            if num is None:
+                num = self._num[entry_id] = len(self._ids)
+                self._ids.append(entry_id)
+            self._add(num, entry)
+        self.covered = end
+        self._dirty += 1
+
+    def flush(self) -> None:
+        # Scaling with size keeps saving amortized O(1) per change; the unsaved
+        # tail is replayed from the log on the next open
+        if self._dirty >= max(SAVE_EVERY, len(self._num) // 8) or self._stale:
+            self.save()
+
+    # maintenance
+
+    @staticmethod
+    def _terms(entry: Dict[str, Any]) -> Counter:
+        return analyze(str(entry.get("text") or ""))
+
+    @staticmethod
+    def _tag_list(entry: Dict[str, Any]) -> Iterable[str]:
+        tags = entry.get("tags") or []
+        return {str(t) for t in tags} if isinstance(tags, list) else ()
+
+    def _add(self, num: int, entry: Dict[str, Any]) -> None:
+        terms = self._terms(entry)
+        for t, tf in terms.items():
+            self._postings.setdefault(t, {})[num] = tf
+        dl = sum(terms.values())
+        self._len[num] = dl
+        self._total += dl
+        for tag in self._tag_list(entry):
+            self._tags.setdefault(tag, set()).add(num)
+
+    def _remove(self, num: int, entry: Dict[str, Any]) -> None:
+        for t in self._terms(entry):
+            docs = self._postings.get(t)
+            if docs is not None:
+                docs.pop(num, None)
+                if not docs:
+                    del self._postings[t]
+        self._total -= self._len.pop(num, 0)
+        for tag in self._tag_list(entry):
+            docs = self._tags.get(tag)
+            if docs is not None:
+                docs.discard(num)
+                if not docs:
+                    del self._tags[tag]
+
+    # queries
+
+    def tagged(self, tag: str) -> List[str]:
+        """Ids carrying tag, in insertion order."""
+        return [self._ids[n] for n in sorted(self._tags.get(tag, ()))]  # type: ignore[misc]
+
+    def search(self, query: str, ids: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """BM25 score of every entry (optionally only those in ids) matching a query term."""
+        n_docs = len(self._num)
+        if not n_docs:
+            return {}
+        allowed = {self._num[i] for i in ids if i in self._num} if ids is not None else None
+        avgdl = self._total / n_docs or 1.0
+        scores: Dict[int, float] = {}
+        for t in analyze(query):
+            docs = self._postings.get(t)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for num, tf in docs.items():
+                if allowed is not None and num not in allowed:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._len[num] / avgdl)
+                scores[num] = scores.get(num, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return {self._ids[n]: s for n, s in scores.items()}  # type: ignore[misc]
+
+    # persistence
+
+    def save(self) -> None:
+        if not self.head:
+            return
+        # Postings are stored flat as [num, tf, num, tf, ...]
+        data = {
+            "v": 1,
+            "head": self.head.hex(),
+            "covered": self.covered,
+            "ids": self._ids,
+            "len": {str(n): dl for n, dl in self._len.items()},
+            "postings": {t: [x for item in docs.items() for x in item] for t, docs in self._postings.items()},
+            "tags": {tag: sorted(docs) for tag, docs in self._tags.items()},
+        }
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            f.write(json.dumps(data, ensure_ascii=False, separators=(",", ":")))  # dumps uses the C encoder, dump does not
+        os.replace(tmp, self.path)
+        self._dirty = 0
+        self._stale = False
+
+    def _load(self, head: bytes) -> bool:
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("v") != 1 or data.get("head") != head.hex():
+                return False
+            ids = data["ids"]
+            lens = {int(n): dl for n, dl in data["len"].items()}
+            postings = {t: dict(zip(flat[::2], flat[1::2])) for t, flat in data["postings"].items()}
+            tags = {tag: set(docs) for tag, docs in data["tags"].items()}
+            covered = int(data["covered"])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return False
+        self._ids = ids
+        self._num = {i: n for n, i in enumerate(ids) if i is not None}
+        self._len = lens
+        self._total = sum(lens.values())
+        self._postings = postings
+        self._tags = tags
+        self.covered = covered
+        return True
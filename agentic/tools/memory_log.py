@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import json
+import os
+import secrets
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - no cross-process locking on this platform
+    fcntl = None
+
+
+TOMBSTONE = "del"
+HEADER = "compacted"
+COMPACT_MIN_RECORDS = 64
+
+
+def _ts() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class MemoryLog:
+    """Append-only JSONL log of entry upserts and tombstones.
+
+    A line without "op" is the full current state of its entry; a later line
+    for the same id replaces it and {"op": "del", "id": ...} removes it, so
+    every edit is one appended line. The id -> (offset, entry) index is
+    rebuilt when the log is first read and then kept up to date by reading
+    only what was appended since. Writers hold an exclusive flock on a
+    sibling .lock file, readers a shared one; compaction replaces the file,
+    which other processes notice by its inode and re-read.
+
+    An observer (see InvertedIndex) is told about every record as it is read:
+    reset(head) whenever reading starts over, apply(end, id, entry or None
+    for a tombstone, previous entry) per record and flush() after each read.
+
+    Once more than compact_ratio of the records are superseded or deleted,
+    a background thread rewrites the log with only the live entries, passing
+    them through on_compact first (under the same lock).
+    """
+
+    def __init__(self, path: Path, compact_ratio: float = 0.5, on_compact: Optional[Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]] = None, observer: Any = None) -> None:
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.compact_ratio = compact_ratio
+        self.on_compact = on_compact
+        self.observer = observer
+        self._mutex = threading.RLock()
+        self._depth = 0
+        self._lock_fd: Optional[int] = None
+        self._exclusive = False
+        self._index: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self._records = 0
+        self._end = 0
+        self._ident: Optional[Tuple[int, int]] = None
+        self._compacting = False
+        self._head = b""
+
+    @contextmanager
+    def locked(self, exclusive: bool = True) -> Iterator["MemoryLog"]:
+        """Hold the log lock (re-entrant within a process) with the index refreshed."""
+        with self._mutex:
+            if self._depth and exclusive and not self._exclusive:
+                raise RuntimeError("cannot write to the memory log while holding it for reading")
+            if self._depth == 0:
+                self._exclusive = exclusive
+            if self._depth == 0 and fcntl is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                except BaseException:
+                    os.close(fd)
+                    raise
+                self._lock_fd = fd
+            self._depth += 1
+            try:
+                self._refresh()
+                yield self
+            finally:
+                self._depth -= 1
+                if self._depth == 0 and self._lock_fd is not None:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+                    os.close(self._lock_fd)
+                    self._lock_fd = None
+
+    def _reset(self) -> None:
+        self._index = {}
+        self._records = 0
+        self._end = 0
+        self._ident = None
+        self._head = b""
+        if self.observer is not None:
+            self.observer.reset(b"")
+
+    def _refresh(self) -> None:
+        try:
+            f = self.path.open("rb")
+        except FileNotFoundError:
+            self._reset()
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            ident = (st.st_dev, st.st_ino)
+            # Compaction starts the file with a unique header line, so a reused
+            # inode still shows up as a different file
+            if ident != self._ident or st.st_size < self._end or f.read(len(self._head)) != self._head:
+                self._reset()
+                self._ident = ident
+            if st.st_size == self._end:
+                return
+            f.seek(self._end)
+            data = f.read()
+        # Only whole lines; a torn last line is picked up once it is complete
+        usable = data[:data.rfind(b"\n") + 1]
+        if self._end == 0:
+            self._head = usable[:64]
+            if self.observer is not None:
+                self.observer.reset(self._head)
+        offset = self._end
+        for raw in usable.splitlines(keepends=True):
+            self._apply(offset, raw)
+            offset += len(raw)
+        self._end = offset
+        if self.observer is not None:
+            self.observer.flush()
+
+    def _apply(self, offset: int, raw: bytes) -> None:
+        line = raw.strip()
+        if not line:
+            return
+        try:
+            rec = json.loads(line)
+        except Exception:
+            return
+        if not isinstance(rec, dict) or not isinstance(rec.get("id"), str) or rec.get("op") == HEADER:
+            return
+        rec_id = rec["id"]
+        self._records += 1
+        prev = self._index.get(rec_id)
+        if rec.get("op") == TOMBSTONE:
+            self._index.pop(rec_id, None)
+            rec = None
+        else:
+            self._index[rec_id] = (offset, rec)  # an update keeps the entry's position
+        if self.observer is not None:
+            self.observer.apply(offset + len(raw), rec_id, rec, prev[1] if prev else None)
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Live entries in insertion order; treat them as read-only."""
+        with self.locked(exclusive=False):
+            return [e for _, e in self._index.values()]
+
+    def get(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        with self.locked(exclusive=False):
+            item = self._index.get(entry_id)
+            return item[1] if item else None
+
+    def _append(self, rec: Dict[str, Any]) -> None:
+        with self.locked():
+            with self.path.open("ab") as f:
+                f.write((json.dumps(rec, ensure_ascii=False) + "\n").encode("utf-8"))
+            self._refresh()
+        self._maybe_compact()
+
+    def put(self, entry: Dict[str, Any]) -> None:
+        """Insert or replace entry (matched by its "id")."""
+        self._append(entry)
+
+    def delete(self, entry_id: str) -> bool:
+        with self.locked():
+            if entry_id not in self._index:
+                return False
+            self._append({"op": TOMBSTONE, "id": entry_id, "ts": _ts()})
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self.locked(exclusive=False):
+            live = len(self._index)
+            dead = self._records - live
+            return {"live": live, "dead": dead, "bytes": self._end, "dead_ratio": dead / self._records if self._records else 0.0}
+
+    def needs_compaction(self) -> bool:
+        with self._mutex:
+            dead = self._records - len(self._index)
+            return self._records >= COMPACT_MIN_RECORDS and dead > self.compact_ratio * self._records
+
+    def _maybe_compact(self) -> None:
+        with self._mutex:
+            if self._compacting or not self.needs_compaction():
+                return
+            self._compacting = True
+        # Not a daemon: a short-lived CLI process finishes the rewrite before exiting
+        threading.Thread(target=self._background_compact, name="agentic-memory-compact").start()
+
+    def _background_compact(self) -> None:
+        try:
+            # Writes that land while compacting do not start another thread
+            self.compact()
+            while self.needs_compaction():
+                self.compact()
+        except Exception:
+            pass  # the next write tries again
+        finally:
+            with self._mutex:
+                self._compacting = False
+
+    def compact(self) -> None:
+        """Rewrite the log with one line per live entry."""
+        with self.locked():
+            entries = [dict(e) for _, e in self._index.values()]
+            if self.on_compact is not None:
+                entries = self.on_compact(entries)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                f.write(json.dumps({"op": HEADER, "id": secrets.token_hex(8), "ts": _ts()}) + "\n")
+                for e in entries:
+                    f.write(json.dumps(e, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self._refresh()
+
+
+_LOGS: Dict[Path, MemoryLog] = {}
+_LOGS_LOCK = threading.Lock()
+
+
+def open_log(path: Path, **kwargs: Any) -> MemoryLog:
+    """The process-wide MemoryLog for path, so its index survives between calls."""
+    path = Path(path).resolve()
+    with _LOGS_LOCK:
+        log = _LOGS.get(path)
+        if log is None:
+            log = _LOGS[path] = MemoryLog(path, **kwargs)
+        return log
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import heapq
+import mmap
+import operator
+import os
+import secrets
+import struct
+import sys
+from itertools import repeat
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+try:  # optional: batched scoring is much faster with numpy
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+MAGIC = b"AGVEC1\0\0"
+HEADER = struct.Struct("<8sIII12x")  # magic, dim, dtype code, generation; 32 bytes
+DTYPES = {"float32": 1, "int8": 2}
+_LITTLE = sys.byteorder == "little"
+
+
+class VectorFile:
+    """Fixed-width vector rows in a binary sidecar file, read through mmap.
+
+    float32 rows are dim little-endian floats. int8 rows are a float32 scale
+    followed by dim signed bytes (value = byte * scale), a quarter of the
+    size at a small precision cost. Rows are only ever appended; a row's
+    number is its position, so metadata elsewhere can refer to it.
+    """
+
+    def __init__(self, path: Path, dim: int, dtype: str = "float32") -> None:
+        self.path = Path(path)
+        self.dim = dim
+        self.dtype = dtype
+        self.generation = 0  # random per created/rewritten file (0 in older files)
+        self._read_header()
+
+    def _read_header(self) -> None:
+        try:
+            with self.path.open("rb") as f:
+                raw = f.read(HEADER.size)
+        except FileNotFoundError:
+            return
+        if len(raw) < HEADER.size:
+            return
+        magic, dim, code, generation = HEADER.unpack(raw)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a vector file")
+        # An existing file keeps the layout it was created with
+        self.dim = dim
+        self.dtype = next(k for k, v in DTYPES.items() if v == code)
+        self.generation = generation
+
+    @property
+    def row_size(self) -> int:
+        return self.dim * 4 if self.dtype == "float32" else 4 + self.dim
+
+    def encode(self, vec: Sequence[float]) -> bytes:
+        if len(vec) != self.dim:
+            raise ValueError(f"expected {self.dim} dims, got {len(vec)}")
+        if self.dtype == "float32":
+            return struct.pack(f"<{self.dim}f", *vec)
+        peak = max((abs(x) for x in vec), default=0.0) or 1.0
+        scale = peak / 127.0
+        return struct.pack("<f", scale) + struct.pack(f"{self.dim}b", *(int(round(x / scale)) for x in vec))
+
+    def _header(self) -> bytes:
+        self.generation = secrets.randbits(32) or 1
+        return HEADER.pack(MAGIC, self.dim, DTYPES[self.dtype], self.generation)
+
+    def _ensure(self) -> None:
+        if self.path.exists() and self.path.stat().st_size >= HEADER.size:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            self._read_header()  # created concurrently
+            return
+        try:
+            os.write(fd, self._header())
+        finally:
+            os.close(fd)
+
+    def append(self, vec: Sequence[float]) -> int:
+        """Append one vector and return its row number."""
+        self._ensure()
+        data = self.encode(vec)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        try:
+            # One O_APPEND write: concurrent writers never interleave rows,
+            # and the offset afterwards tells which row is ours
+            os.write(fd, data)
+            end = os.lseek(fd, 0, os.SEEK_CUR)
+        finally:
+            os.close(fd)
+        return (end - HEADER.size) // self.row_size - 1
+
+    def rewrite(self, vectors: Iterable[Sequence[float]]) -> None:
+        """Replace the file with vectors as rows 0..n-1."""
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp.open("wb") as f:
+            f.write(self._header())
+            for vec in vectors:
+                f.write(self.encode(vec))
+        os.replace(tmp, self.path)
+
+    def ident(self) -> Optional[Tuple[int, int, int]]:
+        """Identity matching VectorReader.ident, or None if there is no file yet."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_dev, st.st_ino, self.generation)
+
+    def reader(self) -> "VectorReader":
+        return VectorReader(self)
+
+
+class VectorReader:
+    """Read-only mmap view of a VectorFile; use as a context manager."""
+
+    def __init__(self, vf: VectorFile) -> None:
+        self.dim = vf.dim
+        self.dtype = vf.dtype
+        self.row_size = vf.row_size
+        self.rows = 0
+        self.ident: Optional[Tuple[int, int, int]] = None  # (dev, inode, generation): changes when the file is replaced
+        self._mm: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+        try:
+            with vf.path.open("rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size > HEADER.size:
+                    self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    st = os.fstat(f.fileno())
+                    self.ident = (st.st_dev, st.st_ino, HEADER.unpack_from(self._mm)[3])
+        except FileNotFoundError:
+            return
+        if self._mm is not None:
+            self.rows = (len(self._mm) - HEADER.size) // self.row_size
+            self._view = memoryview(self._mm)
+
+    def __enter__(self) -> "VectorReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def vector(self, row: int) -> List[float]:
+        off = HEADER.size + row * self.row_size
+        if self.dtype == "float32":
+            if _LITTLE:
+                return list(self._view[off:off + self.row_size].cast("f"))
+            return list(struct.unpack_from(f"<{self.dim}f", self._mm, off))
+        (scale,) = struct.unpack_from("<f", self._mm, off)
+        return [x * scale for x in self._view[off + 4:off + 4 + self.dim].cast("b")]
+
+    def dot(self, row: int, q: Sequence[float]) -> float:
+        """Dot product of row with q straight from the mapped bytes."""
+        off = HEADER.size + row * self.row_size
+        if self.dtype == "float32":
+            if _LITTLE:
+                return float(sum(map(operator.mul, q, self._view[off:off + self.row_size].cast("f"))))
+            return float(sum(map(operator.mul, q, struct.unpack_from(f"<{self.dim}f", self._mm, off))))
+        (scale,) = struct.unpack_from("<f", self._mm, off)
+        return float(scale * sum(map(operator.mul, q, self._view[off + 4:off + 4 + self.dim].cast("b"))))
+
+    def array(self, start: int = 0, stop: Optional[int] = None):
+        """Rows start..stop as a float32 numpy array (int8 rows dequantized). Needs numpy."""
+        stop = self.rows if stop is None else min(stop, self.rows)
+        n = max(0, stop - start)
+        if n == 0:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        off = HEADER.size + start * self.row_size
+        # astype copies, so nothing keeps the mapping exported after this returns
+        if self.dtype == "float32":
+            return np.frombuffer(self._mm, dtype="<f4", count=n * self.dim, offset=off).reshape(n, self.dim).astype(np.float32)
+        rec = np.frombuffer(self._mm, dtype=np.dtype([("scale", "<f4"), ("v", "i1", (self.dim,))]), count=n, offset=off)
+        return rec["v"].astype(np.float32) * rec["scale"][:, None]
+
+    def top_k(self, q: Sequence[float], rows: Sequence[int], k: int) -> List[Tuple[float, int]]:
+        """The k best (score, i) pairs, highest first, where score is rows[i] dotted with q."""
+        if k <= 0 or not rows:
+            return []
+        scores = self._scores_numpy(q, rows) if np is not None else self._scores(q, rows)
+        if np is not None:
+            if k < len(scores):
+                idx = np.argpartition(-scores, k - 1)[:k]
+            else:
+                idx = np.arange(len(scores))
+            # stable on ties so equal scores keep their input order
+            idx = idx[np.lexsort((idx, -scores[idx]))]
+            return [(float(scores[i]), int(i)) for i in idx]
+        best = heapq.nlargest(k, range(len(scores)), key=scores.__getitem__)
+        return [(float(scores[i]), i) for i in best]
+
+    def _scores_numpy(self, q: Sequence[float], rows: Sequence[int]):
+        qv = np.asarray(q, dtype=np.float32)
+        idx = np.asarray(rows, dtype=np.intp)
+        subset = len(idx) * 4 < self.rows  # gather a small subset first, else score all and pick
+        if self.dtype == "float32":
+            mat = np.frombuffer(self._mm, dtype="<f4", count=self.rows * self.dim, offset=HEADER.size).reshape(self.rows, self.dim)
+            scale = None
+        else:
+            rec = np.frombuffer(self._mm, dtype=np.dtype([("scale", "<f4"), ("v", "i1", (self.dim,))]), count=self.rows, offset=HEADER.size)
+            mat, scale = rec["v"], rec["scale"]
+        if subset:
+            mat = mat[idx]
+            scale = None if scale is None else scale[idx]
+        # Hashed bag-of-words queries are sparse: accumulating the few
+        # strided columns they touch reads far less than a full matvec
+        out = np.zeros(len(mat), dtype=np.float32)
+        for j in np.flatnonzero(qv):
+            out += qv[j] * mat[:, j]
+        if scale is not None:
+            out *= scale
+        return out if subset else out[idx]
+
+    def _scores(self, q: Sequence[float], rows: Sequence[int]) -> List[float]:
+        if not _LITTLE or len(rows) * 4 < self.rows:
+            return [self.dot(row, q) for row in rows]
+        # Column at a time over the whole mapping: one C-level pass per
+        # non-zero query dimension instead of a Python call per row
+        body = self._view[HEADER.size:HEADER.size + self.rows * self.row_size]
+        acc: List[float] = [0.0] * self.rows
+        if self.dtype == "float32":
+            flat = body.cast("f")
+            for j, w in enumerate(q):
+                if w:
+                    acc = list(map(operator.add, acc, map(operator.mul, flat[j::self.dim], repeat(w))))
+        else:
+            flat = body.cast("b")
+            for j, w in enumerate(q):
+                if w:
+                    acc = list(map(operator.add, acc, map(operator.mul, flat[4 + j::self.row_size], repeat(w))))
+            scales = bytearray(4 * self.rows)
+            for b in range(4):
+                scales[b::4] = body[b::self.row_size].tobytes()
+            acc = list(map(operator.mul, acc, memoryview(scales).cast("f")))
+        flat.release()
+        body.release()
+        return [acc[row] for row in rows]
@@ -1,12 +1,24 @@
 from __future__ import annotations
 
+import urllib.error
 import urllib.request
 from typing import Dict, Any
 
 
-def web_get(url: str, max_bytes: int = 200_000, timeout: int = 30) -> Dict[str, Any]:
+def web_get(
+    url: str,
+    max_bytes: int = 200_000,
+    timeout: int = 30,
+    etag: str | None = None,
+    last_modified: str | None = None,
+) -> Dict[str, Any]:
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
     try:
-        with urllib.request.urlopen(url, timeout=timeout) as resp:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=timeout) as resp:
             data = resp.read(max_bytes + 1)
             truncated = len(data) > max_bytes
             if truncated:
@@ -17,7 +29,12 @@ def web_get(url: str, max_bytes: int = 200_000, timeout: int = 30) -> Dict[str,
                 "status": getattr(resp, "status", None),
                 "truncated": truncated,
                 "content": text,
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
             }
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return {"url": url, "status": 304, "not_modified": True}
+        return {"url": url, "error": str(e)}
     except Exception as e:
         return {"url": url, "error": str(e)}
-
@@ -31,3 +31,153 @@ def summarize(text: str, limit: int = 2000) -> str:
         return text
     return text[:limit] + "...<truncated>"
 
+
+class JSONStreamScanner:
+    """Finds the first complete top-level JSON object in text fed chunk by chunk.
+
+    Tracks brace depth outside of string literals so a streamed response can be
+    acted on as soon as the object's closing brace arrives. A "{" in prose is
+    dropped as a candidate as soon as it is clearly not JSON (a brace not
+    followed by a key, a string not followed by ":", ",", "}" or "]") or its
+    braces close on something that does not parse; scanning then resumes just
+    after it, so stray quotes and braces before the real object are harmless.
+    """
+
+    def __init__(self) -> None:
+        self.result: Optional[Dict[str, Any]] = None
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._start = 0
+        self._in_str = False
+        self._escape = False
+        self._expect = ""  # what the next non-space character must be, if constrained
+
+    def _abandon(self) -> None:
+        self._depth = 0
+        self._in_str = False
+        self._escape = False
+        self._expect = ""
+
+    def feed(self, chunk: str) -> Optional[Dict[str, Any]]:
+        if self.result is not None:
+            return self.result
+        self._text += chunk
+        text = self._text
+        i = self._pos
+        while i < len(text):
+            ch = text[i]
+            i += 1
+            if self._in_str:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_str = False
+                    self._expect = ":,}]"
+                continue
+            if self._expect and not ch.isspace():
+                if ch not in self._expect:
+                    self._abandon()
+                    i = self._start + 1
+                    continue
+                self._expect = ""
+            if ch == '"':
+                self._in_str = self._depth > 0
+            elif ch == "{":
+                if self._depth == 0:
+                    self._start = i - 1
+                self._depth += 1
+                self._expect = '"}'
+            elif ch == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        obj = json.loads(text[self._start:i])
+                    except Exception:
+                        obj = None
+                    if isinstance(obj, dict):
+                        self.result = obj
+                        return obj
+                    self._abandon()
+                    i = self._start + 1
+        if self._depth == 0:
+            # Nothing open; drop scanned prose
+            self._text = ""
+            self._pos = 0
+        else:
+            self._pos = len(text)
+        return None
+
+
+_FINAL_PREFIX_RE = re.compile(r'\{\s*"type"\s*:\s*"final"\s*,\s*"content"\s*:\s*"')
+
+
+class FinalContentStreamer:
+    """Decodes the content string of a {"type":"final","content":"..."} response as it streams.
+
+    feed() returns the newly decoded text (possibly empty). Escape sequences split
+    across chunks are held back until complete.
+    """
+
+    def __init__(self) -> None:
+        self.started = False
+        self.done = False
+        self._buf = ""
+
+    def feed(self, chunk: str) -> str:
+        if self.done:
+            return ""
+        self._buf += chunk
+        if not self.started:
+            m = _FINAL_PREFIX_RE.search(self._buf)
+            if not m:
+                # Keep a possibly incomplete prefix for the next chunk
+                idx = self._buf.rfind("{")
+                self._buf = self._buf[idx:] if idx >= 0 else ""
+                return ""
+            self.started = True
+            self._buf = self._buf[m.end():]
+        buf = self._buf
+        n = len(buf)
+        i = 0
+        end = None
+        while i < n:
+            ch = buf[i]
+            if ch == '"':
+                end = i
+                break
+            if ch != "\\":
+                i += 1
+                continue
+            if i + 1 >= n:
+                break
+            if buf[i + 1] != "u":
+                i += 2
+                continue
+            if i + 6 > n:
+                break
+            try:
+                code = int(buf[i + 2:i + 6], 16)
+            except ValueError:
+                code = 0
+            if 0xD800 <= code <= 0xDBFF:
+                # High surrogate: wait for the low half
+                if i + 12 > n:
+                    break
+                i += 12
+                continue
+            i += 6
+        cut = end if end is not None else i
+        piece = buf[:cut]
+        try:
+            text = json.loads('"' + piece + '"', strict=False)
+        except Exception:
+            text = piece
+        if end is not None:
+            self.done = True
+            self._buf = ""
+        else:
+            self._buf = buf[cut:]
+        return text
@@ -1,11 +1,24 @@
 from __future__ import annotations
 
+import gzip
+import hashlib
 import json
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from http.cookies import SimpleCookie
 from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
-from typing import Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlparse
 
-from .events import EventRecorder
+from .events import APPROVAL_DEFER, EventRecorder
+from .jobs import JobManager, JobQueueFull
+from . import metrics
 from .orchestrator import Orchestrator
+from .providers.cache import ResponseCache
+from .providers.transport import shared_transport
+from .sessions import SESSION_COOKIE, SESSION_HEADER, Session, SessionPool, SessionPoolFull, valid_session_id
 
 
 INDEX_HTML = """
@@ -26,6 +39,7 @@ INDEX_HTML = """
     .btn:hover{border-color:var(--accent)}
     .badge{padding:2px 8px;border:1px solid var(--border);border-radius:999px;font-size:12px;color:var(--muted)}
     #log{background:var(--panel);border:1px solid var(--border);border-radius:12px;padding:16px;height:60vh;overflow:auto;font-family:ui-monospace,Menlo,Consolas,monospace}
+    .vrow{display:flow-root}
     .line{display:grid;grid-template-columns:120px 1fr;gap:10px;align-items:start;padding:6px 4px;border-radius:6px}
     .line .label{color:var(--muted);text-transform:lowercase;letter-spacing:.2px}
     .line .content{white-space:pre-wrap}
@@ -62,87 +76,136 @@ INDEX_HTML = """
     </div>
   </div>
   <script>
+    // One server-side session (conversation) per tab
+    const SID = sessionStorage.getItem('agentic_sid') || (()=>{
+      const s = (crypto.randomUUID ? crypto.randomUUID() : Date.now().toString(36)+Math.random().toString(36).slice(2)).replace(/[^A-Za-z0-9_-]/g,'');
+      sessionStorage.setItem('agentic_sid', s); return s;
+    })();
+    function api(url, opts){ opts = opts||{}; opts.headers = Object.assign({'X-Agentic-Session': SID}, opts.headers||{}); return fetch(url, opts); }
     const log = document.getElementById('log');
     const input = document.getElementById('input');
     const sendBtn = document.getElementById('sendBtn');
     let sending = false;
     input.addEventListener('keydown', (e)=>{ if(e.key==='Enter'){ if(!sending) send(); }});
-    function append(line, cls){
-      const div=document.createElement('div'); div.className='line evt '+(cls||'');
-      const lab=document.createElement('span'); lab.className='label';
-      const cont=document.createElement('span'); cont.className='content';
-      const idx=line.indexOf('> ');
-      if(idx>0){ lab.textContent=line.slice(0, idx+1); cont.textContent=line.slice(idx+2); }
-      else { lab.textContent=''; cont.textContent=line; }
-      div.appendChild(lab); div.appendChild(cont); log.appendChild(div); log.scrollTop=log.scrollHeight;
+    // Virtualized log: every entry is a plain record in rows; only records near
+    // the viewport have a DOM node. Spacers stand in for the rest, using each
+    // record's last measured height.
+    const ROW_EST = 28, OVERSCAN = 800;
+    const rows = [];
+    const topPad = document.createElement('div'), view = document.createElement('div'), bottomPad = document.createElement('div');
+    log.appendChild(topPad); log.appendChild(view); log.appendChild(bottomPad);
+    let mounted = [], stick = true;
+    const resized = window.ResizeObserver ? new ResizeObserver(()=>schedule()) : null;
+    log.addEventListener('scroll', ()=>{ stick = log.scrollTop + log.clientHeight >= log.scrollHeight - 8; schedule(); }, {passive:true});
+    window.addEventListener('resize', ()=>schedule());
+    // Incoming events are queued and applied once per animation frame
+    const inbox = [];
+    let frameQueued = false;
+    function schedule(){
+      if(frameQueued) return; frameQueued = true;
+      if(document.hidden){ setTimeout(frame, 250); } else { requestAnimationFrame(frame); }
     }
-    function appendApproval(ev){
-      const card=document.createElement('div'); card.className='approval';
-      const head=document.createElement('div'); head.style.display='flex'; head.style.justifyContent='space-between'; head.style.alignItems='center';
-      const title=document.createElement('div'); title.textContent='Approval required'; head.appendChild(title);
-      const actions=document.createElement('div');
-      const yes=document.createElement('button'); yes.className='btn primary'; yes.textContent='Approve'; yes.onclick=()=>approve(ev.token,true,card);
-      const no=document.createElement('button'); no.className='btn'; no.style.marginLeft='6px'; no.textContent='Deny'; no.onclick=()=>approve(ev.token,false,card);
-      actions.appendChild(yes); actions.appendChild(no); head.appendChild(actions);
-      const meta=document.createElement('div'); meta.style.marginTop='6px'; meta.textContent=`tool=${ev.tool} reason=${ev.reason}`;
-      const pre=document.createElement('pre'); pre.textContent=JSON.stringify(ev.args, null, 2);
-      card.appendChild(head); card.appendChild(meta); card.appendChild(pre);
-      log.appendChild(card); log.scrollTop=log.scrollHeight;
+    function later(fn){ inbox.push(fn); schedule(); }
+    function frame(){
+      frameQueued = false;
+      const batch = inbox.splice(0, inbox.length);
+      batch.forEach(fn=>fn());
+      layout();
     }
-    async function approve(token, ok, holder){
-      holder.textContent = holder.textContent + ` => sending decision...`;
-      showBusy(ok ? '검색 중...' : '거부 처리 중...');
-      const resp = await fetch('/api/approve', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({token, approve: ok})});
-      const data = await resp.json();
-      hideBusy();
-      renderEvents(data.events||[]);
+    function addRow(r){ r.h = r.h || ROW_EST; rows.push(r); schedule(); return r; }
+    function removeRow(r){ const i=rows.indexOf(r); if(i>=0){ rows.splice(i,1); } schedule(); }
+    function touch(r){ r.dirty = true; schedule(); }
+    function build(r){ const el=document.createElement('div'); el.className='vrow'; el.appendChild(RENDER[r.kind](r)); el.__row=r; r.dirty=false; return el; }
+    function layout(){
+      for(const r of mounted){ if(r.el && r.el.isConnected){ r.h = r.el.offsetHeight || r.h; } }
+      let total = 0; for(const r of rows){ total += r.h; }
+      const vh = log.clientHeight;
+      const top = stick ? Math.max(0, total - vh) : log.scrollTop;
+      let first = 0, acc = 0;
+      while(first < rows.length && acc + rows[first].h < top - OVERSCAN){ acc += rows[first].h; first++; }
+      const before = acc;
+      let last = first;
+      while(last < rows.length && acc < top + vh + OVERSCAN){ acc += rows[last].h; last++; }
+      const next = rows.slice(first, last);
+      const keep = new Set(next);
+      for(const r of mounted){ if(!keep.has(r) && r.el){ if(resized) resized.unobserve(r.el); r.el=null; } }
+      const els = next.map(r=>{
+        if(!r.el || r.dirty){ const el=build(r); if(r.el && resized) resized.unobserve(r.el); r.el=el; if(resized) resized.observe(el); }
+        return r.el;
+      });
+      if(els.length !== view.childNodes.length || els.some((el,i)=>view.childNodes[i]!==el)){ view.replaceChildren(...els); }
+      mounted = next;
+      topPad.style.height = before+'px';
+      bottomPad.style.height = (total - acc)+'px';
+      if(stick){ log.scrollTop = log.scrollHeight; }
     }
-    function appendDetails(title, obj){
-      const d=document.createElement('details');
-      const s=document.createElement('summary'); s.textContent=title; d.appendChild(s);
-      const pre=document.createElement('pre'); pre.textContent=JSON.stringify(obj, null, 2);
-      d.appendChild(pre); log.appendChild(d); log.scrollTop=log.scrollHeight;
+    function el(tag, cls, text){ const e=document.createElement(tag); if(cls) e.className=cls; if(text!==undefined) e.textContent=text; return e; }
+    function lineEl(cls, label, text){ const div=el('div','line evt '+(cls||'')); div.appendChild(el('span','label',label)); div.appendChild(el('span','content',text)); return div; }
+    function foldable(r, title, text, cls){
+      const d=el('details', cls); d.open=!!r.open; d.addEventListener('toggle', ()=>{ if(r.open!==d.open){ r.open=d.open; touch(r); } });
+      d.appendChild(el('summary', '', title));
+      if(r.open){ d.appendChild(el('pre','',text())); }
+      return d;
     }
-    function appendReasoningDetails(text){
-      const row=document.createElement('div'); row.className='line evt';
-      const lab=document.createElement('span'); lab.className='label'; lab.textContent='reasoning>';
-      const body=document.createElement('div');
-      const det=document.createElement('details'); det.open=false;
-      const sum=document.createElement('summary'); sum.textContent='reasoning (click to expand)';
-      const pre=document.createElement('pre'); pre.textContent=text||'';
-      det.appendChild(sum); det.appendChild(pre); body.appendChild(det);
-      row.appendChild(lab); row.appendChild(body);
-      log.appendChild(row); log.scrollTop=log.scrollHeight;
+    const RENDER = {
+      line: r=>lineEl(r.cls, r.label, r.text),
+      details: r=>foldable(r, r.title, ()=>JSON.stringify(r.obj, null, 2)),
+      reasoning: r=>{ const row=el('div','line evt'); row.appendChild(el('span','label','reasoning>')); const body=el('div'); body.appendChild(foldable(r, 'reasoning (click to expand)', ()=>r.text)); row.appendChild(body); return row; },
+      busy: r=>{ const b=el('div','status'); b.appendChild(el('span','spinner')); b.appendChild(el('span','',r.text)); return b; },
+      approval: r=>{
+        const ev=r.ev, card=el('div','approval');
+        if(r.status){ card.textContent=`Approval required tool=${ev.tool} reason=${ev.reason}`+r.status; return card; }
+        const head=el('div'); head.style.display='flex'; head.style.justifyContent='space-between'; head.style.alignItems='center';
+        head.appendChild(el('div','','Approval required'));
+        const actions=el('div');
+        const yes=el('button','btn primary','Approve'); yes.onclick=()=>approve(ev.token,true,r);
+        const no=el('button','btn','Deny'); no.style.marginLeft='6px'; no.onclick=()=>approve(ev.token,false,r);
+        actions.appendChild(yes); actions.appendChild(no); head.appendChild(actions);
+        const meta=el('div','',`tool=${ev.tool} reason=${ev.reason}`); meta.style.marginTop='6px';
+        card.appendChild(head); card.appendChild(meta); card.appendChild(el('pre','',JSON.stringify(ev.args, null, 2)));
+        return card;
+      },
+      tool: r=>{
+        // Collapsed rows carry only the summary; the body is built when opened
+        const d=el('details','evt tool'); d.open=!!r.open; d.addEventListener('toggle', ()=>{ if(r.open!==d.open){ r.open=d.open; touch(r); } });
+        const summary=el('summary','line'); summary.appendChild(el('span','label','tool>')); summary.appendChild(el('span','content',`${r.tool} ${(r.note||'').replace(/\s+/g, ' ')}`));
+        d.appendChild(summary);
+        if(!r.open) return d;
+        d.appendChild(el('pre','','args: '+JSON.stringify(r.args, null, 2)));
+        r.results.forEach(res=>renderToolResult(d, r, res));
+        return d;
+      },
+    };
+    function append(line, cls){
+      const idx=line.indexOf('> ');
+      if(idx>0){ return addRow({kind:'line', cls, label:line.slice(0, idx+1), text:line.slice(idx+2)}); }
+      return addRow({kind:'line', cls, label:'', text:line});
     }
-    let busyEl = null;
-    function showBusy(text){
-      if(busyEl){ hideBusy(); }
-      busyEl = document.createElement('div'); busyEl.className='status';
-      const sp=document.createElement('span'); sp.className='spinner';
-      const tx=document.createElement('span'); tx.textContent=text||'처리 중...';
-      busyEl.appendChild(sp); busyEl.appendChild(tx); log.appendChild(busyEl); log.scrollTop=log.scrollHeight;
+    function appendApproval(ev){ addRow({kind:'approval', ev, status:''}); }
+    function approve(token, ok, r){
+      if(sending) return;
+      r.status = ok ? ' => approved' : ' => denied'; touch(r);
+      // The approved call and the rest of the task stream like a normal turn
+      beginSession();
+      setSending(true);
+      openStream('/api/approve_stream?token='+encodeURIComponent(token)+'&approve='+(ok?'1':'0')+'&sid='+encodeURIComponent(SID));
     }
-    function hideBusy(){ if(busyEl && busyEl.parentElement){ busyEl.parentElement.removeChild(busyEl); } busyEl=null; }
-    // Streaming session state and helpers
+    function appendDetails(title, obj){ addRow({kind:'details', title, obj}); }
+    function appendReasoningDetails(text){ addRow({kind:'reasoning', text:text||''}); }
+    let busyRow = null;
+    function showBusy(text){ if(busyRow){ hideBusy(); } busyRow = addRow({kind:'busy', text:text||'처리 중...'}); }
+    function hideBusy(){ if(busyRow){ removeRow(busyRow); } busyRow=null; }
+    // Streaming session state and helpers; tool rows by call id
     let sess = null;
-    function beginSession(){ sess = {assistantEl:null, reasoningEl:null, raw:null, reasoningBuf:'', src:null}; }
-    function ensureAssistantEl(){ if(!sess.assistantEl){ const div=document.createElement('div'); div.className='line evt'; const lab=document.createElement('span'); lab.className='label'; lab.textContent='assistant>'; const cont=document.createElement('span'); cont.className='content'; div.appendChild(lab); div.appendChild(cont); log.appendChild(div); sess.assistantEl=cont; } return sess.assistantEl; }
-    function ensureReasoningEl(){ if(!sess.reasoningEl){ const div=document.createElement('div'); div.className='line evt'; const lab=document.createElement('span'); lab.className='label'; lab.textContent='reasoning>'; const cont=document.createElement('span'); cont.className='content'; div.appendChild(lab); div.appendChild(cont); log.appendChild(div); sess.reasoningEl=cont; } return sess.reasoningEl; }
+    const toolRows = {};
+    function beginSession(){ sess = {assistantRow:null, reasoningRow:null, raw:null, reasoningBuf:'', src:null}; }
+    function ensureAssistantRow(){ if(!sess.assistantRow){ sess.assistantRow = addRow({kind:'line', cls:'', label:'assistant>', text:''}); } return sess.assistantRow; }
+    function ensureReasoningRow(){ if(!sess.reasoningRow){ sess.reasoningRow = addRow({kind:'line', cls:'', label:'reasoning>', text:''}); } return sess.reasoningRow; }
     function collapseReasoning(){
-      if(!sess || !sess.reasoningEl) return;
-      const text = sess.reasoningBuf || (sess.reasoningEl.textContent||'').replace(/^reasoning>\s*/, '');
-      const container = sess.reasoningEl.parentElement;
-      const row=document.createElement('div'); row.className='line evt';
-      const lab=document.createElement('span'); lab.className='label'; lab.textContent='reasoning>';
-      const body=document.createElement('div');
-      const det=document.createElement('details'); det.open = false; const sum=document.createElement('summary'); sum.textContent='reasoning (click to expand)'; const pre=document.createElement('pre'); pre.textContent=text; det.appendChild(sum); det.appendChild(pre);
-      body.appendChild(det); row.appendChild(lab); row.appendChild(body);
-      if (container && container.parentElement) {
-        container.parentElement.replaceChild(row, container);
-      } else {
-        log.appendChild(row);
-      }
-      sess.reasoningEl = null;
+      if(!sess || !sess.reasoningRow) return;
+      const r = sess.reasoningRow;
+      r.kind = 'reasoning'; r.text = sess.reasoningBuf || r.text; r.open = false; touch(r);
+      sess.reasoningRow = null;
     }
     function endSession(){ if(sess && sess.raw){ appendDetails('raw payload', sess.raw); } sess=null; }
     function setSending(on){
@@ -161,92 +224,107 @@ INDEX_HTML = """
     }
     async function stop(){
       if(!sending) return;
-      try { await fetch('/api/cancel', {method:'POST'}); } catch(e){}
+      try { await api('/api/cancel', {method:'POST'}); } catch(e){}
       try { if(sess && sess.src){ sess.src.close(); } } catch(e){}
       setSending(false);
       collapseReasoning();
       endSession();
     }
+    function addToolCall(d, open){
+      toolRows[d.id] = addRow({kind:'tool', tool:d.tool, note:d.note, args:d.args, open, results:[]});
+    }
+    function addToolResult(d){
+      const r = toolRows[d.id];
+      if(!r){ append('[result] '+(d.handle ? d.preview : JSON.stringify(d.result)).slice(0,1000), 'res'); return; }
+      r.results.push(d.handle ? {handle:d.handle, size:d.size, next:d.next, text:d.preview} : {result:d.result});
+      touch(r);
+    }
+    function renderToolResult(details, r, res){
+      if(!res.handle){ details.appendChild(el('pre','','result: '+JSON.stringify(res.result, null, 2))); return; }
+      // Large result: preview now, the rest in ranges on demand. Offsets and
+      // sizes are the server's (code points, not UTF-16 units): send back its next
+      details.appendChild(el('pre','','result: '+res.text));
+      if(res.next >= res.size) return;
+      const more=el('button','btn',`더 보기 (${res.next}/${res.size})`);
+      more.disabled=!!res.loading;
+      more.onclick=async ()=>{
+        res.loading=true; more.disabled=true;
+        try{
+          const resp=await api(`/api/tool_result/${encodeURIComponent(SID)}/${encodeURIComponent(res.handle)}?offset=${res.next}&len=65536`);
+          const j=await resp.json();
+          if(!resp.ok){ res.next=res.size; res.text+=' ['+(j.error||'error')+']'; }
+          else { res.text+=j.data; res.next=j.eof ? res.size : j.next; }
+        }catch(e){ more.textContent='error'; }
+        res.loading=false; touch(r);
+      };
+      details.appendChild(more);
+    }
     function renderEvents(events){
       events.forEach(ev=>{
         if(ev.type==='assistant_raw'){ /* suppress noisy raw assistant JSON in UI */ }
         if(ev.type==='reasoning'){ appendReasoningDetails(ev.text||''); }
-        if(ev.type==='tool_call'){
-          const d=ev;
-          const details=document.createElement('details'); details.className='evt tool'; details.id='tool-'+(d.id||''); details.open=true;
-          const summary=document.createElement('summary'); summary.className='line';
-          const lab=document.createElement('span'); lab.className='label'; lab.textContent='tool>';
-          const cont=document.createElement('span'); cont.className='content'; cont.textContent=`${d.tool} ${(d.note||'').replace(/\s+/g, ' ')}`;
-          summary.appendChild(lab); summary.appendChild(cont);
-          const pre=document.createElement('pre'); pre.textContent='args: '+JSON.stringify(d.args, null, 2);
-          details.appendChild(summary); details.appendChild(pre);
-          log.appendChild(details); log.scrollTop=log.scrollHeight;
-        }
-        if(ev.type==='tool_result'){
-          const d=ev;
-          const details=document.getElementById('tool-'+(d.id||''));
-          if(details){ const pre=document.createElement('pre'); pre.textContent='result: '+JSON.stringify(d.result, null, 2); details.appendChild(pre); }
-          else { append('[result] '+JSON.stringify(d.result).slice(0,1000), 'res'); }
-        }
+        if(ev.type==='tool_call'){ addToolCall(ev, true); }
+        if(ev.type==='tool_result'){ addToolResult(ev); }
         if(ev.type==='raw'){ appendDetails('raw payload', ev.data); }
         if(ev.type==='approval') { if(ev.auto){ append(`[approval auto] ${ev.tool}`,'tool'); } else { appendApproval(ev); } }
         if(ev.type==='final') append('assistant> '+(ev.content||''), 'final');
       });
     }
     async function refreshAuto(){
-      const resp = await fetch('/api/auto_approve');
+      const resp = await api('/api/auto_approve');
       const data = await resp.json();
       document.getElementById('auto').textContent = 'auto-approve: '+(data.auto_approve?'ON':'OFF');
     }
     async function toggleAuto(){
-      const resp = await fetch('/api/auto_approve', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({auto_approve: true})});
+      const resp = await api('/api/auto_approve', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({auto_approve: true})});
       const cur = await resp.json();
       const newVal = !cur.auto_approve;
-      const resp2 = await fetch('/api/auto_approve', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({auto_approve: newVal})});
+      const resp2 = await api('/api/auto_approve', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({auto_approve: newVal})});
       await refreshAuto();
     }
     async function send(){
       if(sending) return;
-      const text = input.value.trim(); if(!text) return; input.value=''; append('you> '+text);
-      // Open SSE stream
+      const text = input.value.trim(); if(!text) return; input.value=''; stick=true; append('you> '+text);
       beginSession();
       setSending(true);
-      const src = new EventSource('/api/chat_stream?q='+encodeURIComponent(text));
+      openStream('/api/chat_stream?q='+encodeURIComponent(text)+'&sid='+encodeURIComponent(SID));
+    }
+    function openStream(url){
+      const src = new EventSource(url);
       if(sess){ sess.src = src; }
-      src.addEventListener('assistant_delta', e=>{
-        const d = JSON.parse(e.data); const el = ensureAssistantEl(); el.textContent += d.text;
-      });
-      src.addEventListener('reasoning_delta', e=>{
-        const d = JSON.parse(e.data); const el = ensureReasoningEl(); el.textContent += d.text; if(sess){ sess.reasoningBuf += d.text; }
-      });
+      // Handlers only parse and queue; the DOM is touched once per frame
+      const on = (name, fn)=>src.addEventListener(name, e=>{ const d = e.data ? JSON.parse(e.data) : {}; later(()=>fn(d)); });
+      on('assistant_delta', d=>{ if(!sess) return; const r = ensureAssistantRow(); r.text += d.text; touch(r); });
+      on('reasoning_delta', d=>{ if(!sess) return; const r = ensureReasoningRow(); r.text += d.text; sess.reasoningBuf += d.text; touch(r); });
       // Buffer raw payload; show after final
-      src.addEventListener('raw', e=>{ const d=JSON.parse(e.data); if(sess){ sess.raw = d; } });
-      src.addEventListener('tool_call', e=>{
+      on('raw', d=>{ if(sess){ sess.raw = d; } });
+      on('tool_call', d=>{
         collapseReasoning();
-        const d=JSON.parse(e.data);
-        const details=document.createElement('details'); details.className='evt tool'; details.id='tool-'+d.id; details.open=false;
-        const summary=document.createElement('summary'); summary.className='line';
-        const lab=document.createElement('span'); lab.className='label'; lab.textContent='tool>';
-        const cont=document.createElement('span'); cont.className='content'; cont.textContent=`${d.tool} ${(d.note||'').replace(/\s+/g, ' ')}`;
-        summary.appendChild(lab); summary.appendChild(cont);
-        const pre=document.createElement('pre'); pre.textContent='args: '+JSON.stringify(d.args, null, 2);
-        details.appendChild(summary); details.appendChild(pre);
-        log.appendChild(details); log.scrollTop=log.scrollHeight;
+        if(sess){ sess.assistantRow = null; }
+        addToolCall(d, false);
       });
-      src.addEventListener('tool_result', e=>{
-        const d=JSON.parse(e.data);
-        const details=document.getElementById('tool-'+d.id);
-        if(details){
-          const pre=document.createElement('pre'); pre.textContent='result: '+JSON.stringify(d.result, null, 2);
-          details.appendChild(pre);
-        }
+      on('tool_result', d=>addToolResult(d));
+      on('approval', d=>appendApproval(d));
+      on('approval_result', d=>{ if(d.error){ append('[approval] '+d.error, 'res'); } });
+      on('reasoning', d=>{ if(!sess) return; const r=ensureReasoningRow(); r.text = d.text||''; sess.reasoningBuf = d.text||''; touch(r); });
+      on('final', d=>{
+        collapseReasoning();
+        // Answer already streamed via assistant_delta: settle it to the authoritative text
+        if(sess && sess.assistantRow){ sess.assistantRow.text = d.content||''; touch(sess.assistantRow); }
+        else { append('assistant> '+(d.content||''), 'final'); }
+        endSession(); setSending(false); try{ src.close(); }catch(e){}
+      });
+      on('reasoning_start', d=>collapseReasoning());
+      on('done', d=>{ setSending(false); try{ src.close(); }catch(e){} });
+      on('gap', d=>append('[stream] 일부 이벤트가 버퍼에서 밀려나 표시되지 않았습니다.'));
+      src.addEventListener('open', e=>later(()=>{ if(sess && sess.reconnecting){ sess.reconnecting=false; hideBusy(); } }));
+      src.addEventListener('error', e=>{
+        if(e.data){ const d=JSON.parse(e.data); later(()=>append('[error] '+(d.error||''), 'res')); }
+        // The server keeps the task running; EventSource reconnects with Last-Event-ID
+        if(src.readyState===EventSource.CONNECTING){ later(()=>{ if(sess && !sess.reconnecting){ sess.reconnecting=true; showBusy('연결 재시도 중...'); } }); return; }
+        try{ src.close(); }catch(e){}
+        later(()=>{ hideBusy(); setSending(false); });
       });
-      src.addEventListener('approval', e=>{ const d=JSON.parse(e.data); appendApproval(d); });
-      src.addEventListener('reasoning', e=>{ const d=JSON.parse(e.data); const el=ensureReasoningEl(); el.textContent = 'reasoning> '+(d.text||''); if(sess){ sess.reasoningBuf = d.text||''; } });
-      src.addEventListener('final', e=>{ const d=JSON.parse(e.data); collapseReasoning(); append('assistant> '+(d.content||''), 'final'); endSession(); setSending(false); try{ src.close(); }catch(e){} });
-      src.addEventListener('reasoning_start', e=>{ collapseReasoning(); });
-      src.addEventListener('done', e=>{ setSending(false); try{ src.close(); }catch(e){} });
-      src.addEventListener('error', e=>{ setSending(false); try{ src.close(); }catch(e){} });
     }
     refreshAuto();
   </script>
@@ -254,187 +332,840 @@ INDEX_HTML = """
 """
 
 
-class Handler(BaseHTTPRequestHandler):
-    orch: Orchestrator = None  # type: ignore
-    auto_approve: bool = False
-
-    def _send(self, code: int, body: Union[str, bytes], content_type: str = "text/html; charset=utf-8") -> None:
-        self.send_response(code)
-        self.send_header("Content-Type", content_type)
-        if isinstance(body, str):
-            data = body.encode("utf-8")
-        else:
-            data = body
-        self.send_header("Content-Length", str(len(data)))
-        self.end_headers()
-        self.wfile.write(data)
+class SSESink(EventRecorder):
+    """Forwards orchestrator events as SSE events through emit(name, obj).
 
-    def do_GET(self) -> None:  # noqa: N802
-        if self.path == "/" or self.path.startswith("/index"):
-            self._send(200, INDEX_HTML)
-            return
-        if self.path.startswith("/api/chat_stream"):
-            # Parse query parameter q
-            try:
-                from urllib.parse import urlparse, parse_qs
-                qs = parse_qs(urlparse(self.path).query)
-                text = (qs.get("q") or [""])[0]
-            except Exception:
-                text = ""
-            self.send_response(200)
-            self.send_header("Content-Type", "text/event-stream")
-            self.send_header("Cache-Control", "no-cache")
-            self.send_header("Connection", "keep-alive")
-            self.end_headers()
+    With a store, tool results longer than preview characters (as indented
+    JSON) are sent as a preview plus a handle for /api/tool_result.
+    """
 
-            def send_event(name: str, obj):
-                try:
-                    data = json.dumps(obj, ensure_ascii=False).encode("utf-8")
-                    self.wfile.write(f"event: {name}\n".encode("utf-8"))
-                    self.wfile.write(b"data: ")
-                    self.wfile.write(data)
-                    self.wfile.write(b"\n\n")
-                    self.wfile.flush()
-                except Exception:
-                    # Client likely disconnected; request backend cancel to stop generation
-                    try:
-                        Handler.orch.request_cancel()
-                    except Exception:
-                        pass
-                    pass
-
-            class SSESink(EventRecorder):
-                def __init__(self):
-                    super().__init__()
-                    self._sent_reasoning = False
-                def on_stream_text(self, t: str):
-                    send_event('assistant_delta', {"text": t})
-                def on_stream_reasoning(self, t: str):
+    def __init__(self, emit: Callable[[str, Any], Any], store: Optional["ToolResultStore"] = None, preview: int = 4096) -> None:
+        super().__init__()
+        self._emit = emit
+        self._sent_reasoning = False
+        self._store = store
+        self._preview = preview
+
+    def send(self, name: str, obj: Any) -> None:
+        self._emit(name, obj)
+
+    def on_stream_text(self, t: str):
+        self.send('assistant_delta', {"text": t})
+
+    def on_stream_reasoning(self, t: str):
+        self._sent_reasoning = True
+        self.send('reasoning_delta', {"text": t})
+
+    def on_assistant_raw(self, t: str):
+        self.send('assistant_raw', {"text": t})
+
+    def on_reasoning(self, txt: str | None):
+        if txt:
+            self._sent_reasoning = True
+            self.send('reasoning', {"text": txt})
+
+    def on_tool_call(self, tool, tool_id, args, note=None):
+        self.send('tool_call', {"tool": tool, "id": tool_id, "args": args, "note": note})
+
+    def on_tool_result(self, tool_id, result):
+        if self._store is not None and self._preview > 0:
+            text = json.dumps(result, ensure_ascii=False, indent=2)
+            if len(text) > self._preview:
+                handle = self._store.put(text)
+                self.send('tool_result', {"id": tool_id, "preview": text[:self._preview], "size": len(text), "next": self._preview, "handle": handle, "truncated": True})
+                return
+        self.send('tool_result', {"id": tool_id, "result": result})
+
+    def on_approval_required(self, tool, tool_id, reason, args, token=None):
+        self.send('approval', {"tool": tool, "id": tool_id, "reason": reason, "args": args, "token": token})
+        return APPROVAL_DEFER
+
+    def on_final(self, content: str):
+        self.send('final', {"content": content})
+
+    def on_raw(self, data):
+        # Forward raw payload and attempt to extract reasoning if missing
+        self.send('raw', data)
+        try:
+            obj = data if isinstance(data, dict) else {}
+            if not self._sent_reasoning:
+                # OpenAI/OpenRouter/LM Studio style
+                ch = (obj.get('choices') or [{}])[0]
+                msg = ch.get('message') or {}
+                r = msg.get('reasoning') or ch.get('reasoning')
+                if isinstance(r, str) and r.strip():
                     self._sent_reasoning = True
-                    send_event('reasoning_delta', {"text": t})
-                def on_assistant_raw(self, t: str):
-                    send_event('assistant_raw', {"text": t})
-                def on_reasoning(self, txt: str | None):
-                    if txt:
-                        self._sent_reasoning = True
-                        send_event('reasoning', {"text": txt})
-                def on_tool_call(self, tool, tool_id, args, note=None):
-                    send_event('tool_call', {"tool": tool, "id": tool_id, "args": args, "note": note})
-                def on_tool_result(self, tool_id, result):
-                    send_event('tool_result', {"id": tool_id, "result": result})
-                def on_approval_required(self, tool, tool_id, reason, args, token=None):
-                    send_event('approval', {"tool": tool, "id": tool_id, "reason": reason, "args": args, "token": token})
-                    from agentic.events import APPROVAL_DEFER
-                    return APPROVAL_DEFER
-                def on_final(self, content: str):
-                    send_event('final', {"content": content})
-                def on_raw(self, data):
-                    # Forward raw payload and attempt to extract reasoning if missing
-                    send_event('raw', data)
-                    try:
-                        obj = data if isinstance(data, dict) else {}
-                        if not self._sent_reasoning:
-                            # OpenAI/OpenRouter/LM Studio style
-                            ch = (obj.get('choices') or [{}])[0]
-                            msg = ch.get('message') or {}
-                            r = msg.get('reasoning') or ch.get('reasoning')
-                            if isinstance(r, str) and r.strip():
-                                self._sent_reasoning = True
-                                send_event('reasoning', {"text": r})
-                    except Exception:
-                        pass
-
-            sink = SSESink()
-            Handler.orch.chat_stream(text, sink=sink)
-            send_event('done', {})
-            return
-        if self.path.startswith("/api/auto_approve"):
-            body = json.dumps({"auto_approve": Handler.auto_approve}).encode("utf-8")
-            self._send(200, body, "application/json")
-            return
-        if self.path == "/api/cancel":
+                    self.send('reasoning', {"text": r})
+        except Exception:
+            pass
+
+
+class WebSink(EventRecorder):
+    def __init__(self, auto_approve: bool) -> None:
+        super().__init__()
+        self.auto_approve = auto_approve
+
+    def on_approval_required(self, tool, tool_id, reason, args, token=None):
+        if self.auto_approve:
+            self.events.append({"type": "approval", "tool": tool, "id": tool_id, "reason": reason, "args": args, "token": token, "auto": True})
+            return True
+        return super().on_approval_required(tool, tool_id, reason, args, token)
+
+
+def sse_frame(name: str, obj: Any) -> bytes:
+    data = json.dumps(obj, ensure_ascii=False)
+    return f"event: {name}\ndata: {data}\n\n".encode("utf-8")
+
+
+def _threading_timer(delay: float, fn: Callable[[], None]) -> Any:
+    t = threading.Timer(delay, fn)
+    t.daemon = True
+    t.start()
+    return t
+
+
+class SSEWriter:
+    """Coalesces consecutive delta events before they become SSE frames.
+
+    assistant_delta/reasoning_delta text is buffered and published as one
+    event once window seconds have passed since the first buffered delta or
+    max_bytes are buffered, whichever comes first; any other event flushes
+    the buffer before it so ordering is kept. publish(name, obj) turns an
+    event into one frame and returns its size in bytes.
+    schedule(delay, fn) arranges the window flush (a thread timer by default).
+    """
+
+    DELTA_EVENTS = {"assistant_delta", "reasoning_delta"}
+
+    def __init__(
+        self,
+        publish: Callable[[str, Any], int],
+        window: float = 0.03,
+        max_bytes: int = 4096,
+        schedule: Callable[[float, Callable[[], None]], Any] = _threading_timer,
+    ) -> None:
+        self._publish = publish
+        self.window = window
+        self.max_bytes = max_bytes
+        self._schedule = schedule
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, List[str]]] = []  # [(event, [text, ...])]
+        self._pending_bytes = 0
+        self._timer_armed = False
+        self.counters: Dict[str, int] = {"events": 0, "frames": 0, "bytes": 0}
+
+    def _send(self, name: str, obj: Any) -> None:
+        # Caller holds the lock, so frames leave in order
+        self.counters["bytes"] += self._publish(name, obj)
+        self.counters["frames"] += 1
+
+    def _flush_locked(self) -> None:
+        pending, self._pending = self._pending, []
+        self._pending_bytes = 0
+        for name, parts in pending:
+            self._send(name, {"text": "".join(parts)})
+
+    def _on_timer(self) -> None:
+        with self._lock:
+            self._timer_armed = False
+            self._flush_locked()
+
+    def event(self, name: str, obj: Any) -> None:
+        with self._lock:
+            self.counters["events"] += 1
+            if name in self.DELTA_EVENTS and self.window > 0:
+                text = str(obj.get("text", ""))
+                if self._pending and self._pending[-1][0] == name:
+                    self._pending[-1][1].append(text)
+                else:
+                    self._pending.append((name, [text]))
+                self._pending_bytes += len(text)
+                if self._pending_bytes >= self.max_bytes:
+                    self._flush_locked()
+                elif not self._timer_armed:
+                    self._timer_armed = True
+                    self._schedule(self.window, self._on_timer)
+                return
+            self._flush_locked()
+            self._send(name, obj)
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+
+Listener = Callable[[Optional[bytes]], Any]
+
+
+class EventChannel:
+    """A session's SSE event log: numbered frames in a ring buffer plus live listeners.
+
+    Runs publish here instead of into a connection, so a run keeps going when
+    its client drops. A client reconnecting with Last-Event-ID gets the frames
+    after that id replayed from the buffer, then follows live. Listeners get
+    None when the run ends. If the last listener leaves during a run and none
+    comes back within grace seconds, on_abandon is called (run cancellation).
+    """
+
+    def __init__(self, capacity: int = 2000, grace: float = 300.0, on_abandon: Optional[Callable[[], None]] = None) -> None:
+        self.grace = grace
+        self.on_abandon = on_abandon
+        self._frames: "deque[Tuple[int, bytes]]" = deque(maxlen=max(1, capacity))
+        self._last_id = 0
+        self._listeners: List[Listener] = []
+        self._lock = threading.Lock()
+        self._detached_at: Optional[float] = None
+        self.running = False
+        self.counters: Dict[str, int] = {"published": 0, "replayed": 0, "resumes": 0, "gaps": 0, "abandoned": 0}
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def publish(self, name: str, obj: Any) -> int:
+        with self._lock:
+            self._last_id += 1
+            frame = f"id: {self._last_id}\n".encode("utf-8") + sse_frame(name, obj)
+            self._frames.append((self._last_id, frame))
+            self.counters["published"] += 1
+            for listener in list(self._listeners):
+                listener(frame)
+        return len(frame)
+
+    def begin_run(self) -> None:
+        with self._lock:
+            self.running = True
+            self._detached_at = None
+
+    def end_run(self) -> None:
+        with self._lock:
+            self.running = False
+            listeners, self._listeners = self._listeners, []
+        for listener in listeners:
+            listener(None)
+
+    def subscribe(self, listener: Listener, after_id: Optional[int] = None) -> None:
+        """Replay frames after after_id (if given), then follow the running run.
+
+        Called with the lock held, so no frame is missed or duplicated between
+        replay and live delivery. Listeners must not block.
+        """
+        with self._lock:
+            if after_id is not None:
+                self.counters["resumes"] += 1
+                oldest = self._frames[0][0] if self._frames else self._last_id + 1
+                if after_id < oldest - 1:
+                    self.counters["gaps"] += 1
+                    listener(sse_frame("gap", {"after": after_id, "oldest": oldest}))
+                for eid, frame in self._frames:
+                    if eid > after_id:
+                        self.counters["replayed"] += 1
+                        listener(frame)
+            else:
+                # Seeds the client's Last-Event-ID so a reconnect resumes from here
+                listener(f"id: {self._last_id}\n\n".encode("utf-8"))
+            if not self.running:
+                listener(None)
+                return
+            self._listeners.append(listener)
+            self._detached_at = None
+
+    def unsubscribe(self, listener: Listener) -> None:
+        with self._lock:
+            if listener not in self._listeners:
+                return
+            self._listeners.remove(listener)
+            if not self.running or self._listeners:
+                return
+            self._detached_at = time.monotonic()
+        if self.grace > 0:
+            _threading_timer(self.grace, self._check_abandoned)
+
+    def _check_abandoned(self) -> None:
+        with self._lock:
+            detached = self._detached_at
+            abandoned = self.running and not self._listeners and detached is not None and time.monotonic() - detached >= self.grace
+            if abandoned:
+                self.counters["abandoned"] += 1
+                self._detached_at = None
+        if abandoned and self.on_abandon is not None:
+            self.on_abandon()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.counters, "last_id": self._last_id, "buffered": len(self._frames), "listeners": len(self._listeners)}
+
+
+class ToolResultStore:
+    """A session's full text of large tool results, served in ranges by handle.
+
+    Bounded by max_chars in total; the oldest results are dropped first.
+    """
+
+    def __init__(self, max_chars: int = 16 * 1024 * 1024) -> None:
+        self.max_chars = max_chars
+        self._items: "OrderedDict[str, str]" = OrderedDict()
+        self._size = 0
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def put(self, text: str) -> str:
+        with self._lock:
+            self._seq += 1
+            handle = f"r{self._seq}"
+            self._items[handle] = text
+            self._size += len(text)
+            while self._size > self.max_chars and len(self._items) > 1:
+                _, old = self._items.popitem(last=False)
+                self._size -= len(old)
+        return handle
+
+    def get(self, handle: str) -> Optional[str]:
+        with self._lock:
+            return self._items.get(handle)
+
+
+class Response:
+    def __init__(self, status: int, body: Union[str, bytes], content_type: str = "text/html; charset=utf-8", headers: Optional[List[Tuple[str, str]]] = None) -> None:
+        self.status = status
+        self.body = body.encode("utf-8") if isinstance(body, str) else body
+        self.content_type = content_type
+        self.headers = headers or []
+
+
+GZIP_MIN_BYTES = 1024
+COMPRESSIBLE_TYPES = ("text/", "application/json")
+
+
+def accepts_gzip(headers: Dict[str, str]) -> bool:
+    for item in headers.get("accept-encoding", "").split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding.strip().lower() in {"gzip", "*"}:
+            q = params.strip()
             try:
-                Handler.orch.request_cancel()
-                body = json.dumps({"canceled": True}).encode("utf-8")
-                self._send(200, body, "application/json")
-            except Exception as e:
-                body = json.dumps({"canceled": False, "error": str(e)}).encode("utf-8")
-                self._send(500, body, "application/json")
+                return not (q.startswith("q=") and float(q[2:] or 0) == 0)
+            except ValueError:
+                return False
+    return False
+
+
+class StaticAsset:
+    """In-memory static body with a strong ETag and a precompressed gzip copy."""
+
+    def __init__(self, body: Union[str, bytes], content_type: str = "text/html; charset=utf-8") -> None:
+        self.body = body.encode("utf-8") if isinstance(body, str) else body
+        self.content_type = content_type
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+        self.gzipped = gzip.compress(self.body, compresslevel=9, mtime=0)
+
+    def response(self, headers: Dict[str, str]) -> Response:
+        cache = [("ETag", self.etag), ("Cache-Control", "no-cache"), ("Vary", "Accept-Encoding")]
+        tags = {t.strip() for t in headers.get("if-none-match", "").split(",")}
+        if self.etag in tags or "*" in tags:
+            return Response(304, b"", self.content_type, cache)
+        if accepts_gzip(headers):
+            return Response(200, self.gzipped, self.content_type, cache + [("Content-Encoding", "gzip")])
+        return Response(200, self.body, self.content_type, cache)
+
+
+INDEX_ASSET = StaticAsset(INDEX_HTML)
+# SSE routes; a request carrying Last-Event-ID resumes instead of starting a run
+STREAM_ROUTES = {"/api/chat_stream", "/api/approve_stream", "/api/events"}
+SSE_HEARTBEAT = 15.0  # seconds between keep-alive comments on a quiet stream
+
+
+def compress_response(resp: Response, headers: Dict[str, str]) -> Response:
+    """gzip a dynamic response body when the client accepts it and it is worth it."""
+    if (
+        len(resp.body) < GZIP_MIN_BYTES
+        or not resp.content_type.startswith(COMPRESSIBLE_TYPES)
+        or any(k.lower() == "content-encoding" for k, _ in resp.headers)
+        or not accepts_gzip(headers)
+    ):
+        return resp
+    body = gzip.compress(resp.body, compresslevel=5)
+    return Response(resp.status, body, resp.content_type, resp.headers + [("Content-Encoding", "gzip"), ("Vary", "Accept-Encoding")])
+
+
+def _spawn_thread(fn: Callable[[], None]) -> None:
+    threading.Thread(target=fn, name="agentic-run", daemon=True).start()
+
+
+class StreamResponse:
+    """An SSE response backed by the session's EventChannel.
+
+    With run set, open() starts that run detached from the connection (the
+    session's run lock is already held and is released when it finishes);
+    without it, open() resumes after after_id. The transport passes a
+    non-blocking listener that receives frames and then None at the end.
+    """
+
+    def __init__(
+        self,
+        app: "WebApp",
+        session: Session,
+        run: Optional[Callable[[Callable[[str, Any], Any]], None]] = None,
+        after_id: Optional[int] = None,
+        headers: Optional[List[Tuple[str, str]]] = None,
+    ) -> None:
+        self.app = app
+        self.session = session
+        self._run = run
+        self.after_id = after_id
+        self.headers = headers or []
+
+    @property
+    def channel(self) -> EventChannel:
+        return self.session.channel
+
+    @property
+    def starts_run(self) -> bool:
+        return self._run is not None
+
+    def open(
+        self,
+        listener: Listener,
+        spawn: Callable[[Callable[[], None]], Any] = _spawn_thread,
+        schedule: Optional[Callable[[float, Callable[[], None]], Any]] = None,
+    ) -> None:
+        if self._run is None:
+            self.channel.subscribe(listener, self.after_id)
             return
-        self._send(404, b"Not Found")
+        self.channel.begin_run()
+        self.channel.subscribe(listener)
+        spawn(lambda: self._execute(schedule or _threading_timer))
 
-    def do_POST(self) -> None:  # noqa: N802
-        if self.path == "/api/chat":
-            length = int(self.headers.get("Content-Length", "0"))
-            data = self.rfile.read(length)
+    def close(self, listener: Listener) -> None:
+        self.channel.unsubscribe(listener)
+
+    def _execute(self, schedule: Callable[[float, Callable[[], None]], Any]) -> None:
+        cfg = self.session.orch.config
+        writer = SSEWriter(self.channel.publish, window=cfg.sse_coalesce_ms / 1000.0, max_bytes=cfg.sse_coalesce_bytes, schedule=schedule)
+        try:
+            self._run(writer.event)
+        except Exception as e:
+            writer.event("error", {"error": str(e)})
+            writer.event("done", {})
+        finally:
+            writer.close()
+            self.app.record_stream(writer.counters)
+            self.channel.end_run()
+            self.session.lock.release()
+            self.session.touch()
+
+
+class WebApp:
+    """Transport-neutral request handling shared by the threaded and asyncio servers.
+
+    handle() takes the method, path (with query), lower-cased headers and body
+    and returns a Response or a StreamResponse. Blocking work (chat, approve)
+    happens inside handle() or a StreamResponse's detached run, never in the transport.
+    """
+
+    def __init__(self, sessions: SessionPool, jobs: Optional[JobManager] = None, llm_cache: Optional[ResponseCache] = None) -> None:
+        self.sessions = sessions
+        self.jobs = jobs
+        self.llm_cache = llm_cache
+        self._stats_lock = threading.Lock()
+        # SSE events produced by runs vs frames actually written
+        self.sse_counters: Dict[str, int] = {"streams": 0, "events": 0, "frames": 0, "bytes": 0}
+
+    def record_stream(self, counters: Dict[str, int]) -> None:
+        with self._stats_lock:
+            self.sse_counters["streams"] += 1
+            for k, v in counters.items():
+                self.sse_counters[k] = self.sse_counters.get(k, 0) + v
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            sse = dict(self.sse_counters)
+        replay: Dict[str, int] = {}
+        for sess in self.sessions.snapshot():
+            if sess.channel is not None:
+                for k, v in sess.channel.stats().items():
+                    if k != "last_id":
+                        replay[k] = replay.get(k, 0) + v
+        out = {"sessions": self.sessions.stats(), "sse": sse, "replay": replay, "http": shared_transport().stats()}
+        if self.jobs is not None:
+            out["jobs"] = self.jobs.stats()
+        if self.llm_cache is not None:
+            out["llm_cache"] = self.llm_cache.stats()
+        return out
+
+    def metrics_text(self) -> str:
+        """Process-wide metrics plus gauges sampled from this app's sessions and jobs."""
+        sessions = self.sessions.stats()
+        listeners = 0
+        for sess in self.sessions.snapshot():
+            if sess.channel is not None:
+                listeners += sess.channel.stats()["listeners"]
+        out = [
+            metrics.REGISTRY.render(),
+            metrics.render_gauge("agentic_sessions_active", "Live web sessions.", [({}, sessions["live"])]),
+            metrics.render_gauge("agentic_sessions_busy", "Web sessions with a run in progress.", [({}, sessions["busy"])]),
+            metrics.render_gauge("agentic_sse_clients", "Connected SSE clients.", [({}, listeners)]),
+        ]
+        if self.jobs is not None:
+            jobs = self.jobs.stats()
+            out.append(metrics.render_gauge("agentic_jobs", "Background jobs by state.", [({"state": k}, jobs[k]) for k in ("queued", "running", "needs_approval")]))
+        http = shared_transport().stats()
+        out.append(metrics.render_gauge("agentic_http_client_events_total", "Outgoing LLM HTTP requests and connection pool activity.", [({"event": k}, v) for k, v in http.items() if k != "idle"], kind="counter"))
+        out.append(metrics.render_gauge("agentic_http_client_idle_connections", "Idle keep-alive connections in the LLM HTTP pool.", [({}, http["idle"])]))
+        if self.llm_cache is not None:
+            cache = self.llm_cache.stats()
+            out.append(metrics.render_gauge("agentic_llm_cache_events_total", "LLM response cache lookups, stores and evictions.", [({"event": k}, cache[k]) for k in ("hits", "misses", "stores", "evicted")], kind="counter"))
+            out.append(metrics.render_gauge("agentic_llm_cache_bytes", "Size of the LLM response cache directory as of its last scan plus later stores.", [({}, cache["bytes"])]))
+        return "".join(out)
+
+    def close(self) -> None:
+        if self.jobs is not None:
+            self.jobs.close()
+        self.sessions.close()
+
+    @staticmethod
+    def json_response(status: int, obj: Any, headers: Optional[List[Tuple[str, str]]] = None) -> Response:
+        return Response(status, json.dumps(obj, ensure_ascii=False).encode("utf-8"), "application/json", headers)
+
+    def _channel(self, sess: Session) -> EventChannel:
+        if sess.channel is None:
+            cfg = sess.orch.config
+            sess.channel = EventChannel(cfg.serve_replay_events, cfg.serve_detach_grace, on_abandon=sess.orch.request_cancel)
+        return sess.channel
+
+    @staticmethod
+    def _results(sess: Session) -> ToolResultStore:
+        if sess.results is None:
+            sess.results = ToolResultStore(sess.orch.config.serve_tool_results_mb * 1024 * 1024)
+        return sess.results
+
+    def _tool_result(self, route: str, path: str) -> Response:
+        """/api/tool_result/<session>/<handle>?offset=&len= -> a range of a stored result."""
+        parts = route.split("/")[3:]
+        sess = self.sessions.peek(parts[0]) if len(parts) == 2 else None
+        text = sess.results.get(parts[1]) if sess is not None and sess.results is not None else None
+        if text is None:
+            return self.json_response(404, {"error": "unknown tool result"})
+        qs = parse_qs(urlparse(path).query)
+        offset = self._int_param(qs, "offset", 0, 0, len(text))
+        data = text[offset:offset + self._int_param(qs, "len", 65536, 1, 1024 * 1024)]
+        return self.json_response(200, {
+            "handle": parts[1],
+            "offset": offset,
+            "len": len(data),
+            "next": offset + len(data),  # pass back as offset; it counts code points, not UTF-16 units
+            "size": len(text),
+            "data": data,
+            "eof": offset + len(data) >= len(text),
+        })
+
+    @staticmethod
+    def requested_session_id(path: str, headers: Dict[str, str]) -> Optional[str]:
+        # Per-tab id (query/header) wins over the browser-wide cookie
+        qs = parse_qs(urlparse(path).query)
+        sid = (qs.get("sid") or [None])[0] or headers.get(SESSION_HEADER.lower())
+        if not sid:
+            cookie = SimpleCookie(headers.get("cookie") or "")
+            if SESSION_COOKIE in cookie:
+                sid = cookie[SESSION_COOKIE].value
+        return sid if valid_session_id(sid) else None
+
+    def _session(self, path: str, headers: Dict[str, str]) -> Tuple[Optional[Session], List[Tuple[str, str]], Optional[Response]]:
+        """(session, headers to add, error response)."""
+        sid = self.requested_session_id(path, headers)
+        try:
+            sess = self.sessions.get(sid)
+        except SessionPoolFull as e:
+            return None, [], self.json_response(503, {"error": str(e)})
+        extra = []
+        if sess.id != sid:
+            extra.append(("Set-Cookie", f"{SESSION_COOKIE}={sess.id}; Path=/; HttpOnly; SameSite=Lax"))
+        return sess, extra, None
+
+    def _locked_session(self, path: str, headers: Dict[str, str]) -> Tuple[Optional[Session], List[Tuple[str, str]], Optional[Response]]:
+        sess, extra, err = self._session(path, headers)
+        if sess is not None and not sess.lock.acquire(blocking=False):
+            return None, extra, self.json_response(409, {"error": "session is busy", "session": sess.id}, extra)
+        return sess, extra, err
+
+    def _cancel(self, path: str, headers: Dict[str, str]) -> Response:
+        sess = self.sessions.peek(self.requested_session_id(path, headers))
+        if sess is None:
+            return self.json_response(200, {"canceled": False, "error": "unknown session"})
+        try:
+            sess.orch.request_cancel()
+            return self.json_response(200, {"canceled": True})
+        except Exception as e:
+            return self.json_response(500, {"canceled": False, "error": str(e)})
+
+    @staticmethod
+    def _int_param(qs: Dict[str, List[str]], name: str, default: int, lo: int = 0, hi: int = 1 << 31) -> int:
+        try:
+            return min(hi, max(lo, int((qs.get(name) or [default])[0])))
+        except ValueError:
+            return default
+
+    def _jobs(self, method: str, route: str, path: str, payload: Dict[str, Any]) -> Response:
+        """/api/jobs[/<id>[/events|/cancel|/approve]]."""
+        if self.jobs is None:
+            return self.json_response(404, {"error": "jobs are disabled"})
+        parts = route.rstrip("/").split("/")[3:]  # after /api/jobs
+        qs = parse_qs(urlparse(path).query)
+        if not parts:
+            if method == "GET":
+                status = (qs.get("status") or [None])[0]
+                listing = self.jobs.list(status, self._int_param(qs, "offset", 0), self._int_param(qs, "limit", 50, 1, 500))
+                return self.json_response(200, {**listing, "queue": self.jobs.stats()})
+            try:
+                job = self.jobs.submit(str(payload.get("input", "")), bool(payload.get("auto_approve", False)))
+            except JobQueueFull as e:
+                return self.json_response(429, {"error": str(e), "queue": self.jobs.stats()}, [("Retry-After", "5")])
+            return self.json_response(202, {"job": job.summary()}, [("Location", f"/api/jobs/{job.id}")])
+        job = self.jobs.get(parts[0])
+        if job is None:
+            return self.json_response(404, {"error": "unknown job"})
+        action = parts[1] if len(parts) > 1 else ""
+        if method == "GET" and action == "":
+            return self.json_response(200, {"job": job.summary()})
+        if method == "GET" and action == "events":
+            after = self._int_param(qs, "after", 0)
+            limit = self._int_param(qs, "limit", 100, 1, 1000)
+            events = job.events_after(after, limit + 1)
+            more = len(events) > limit
+            events = events[:limit]
+            return self.json_response(200, {
+                "job": job.id,
+                "status": job.status,
+                "events": events,
+                "next": events[-1]["seq"] if events else after,
+                "more": more,
+            })
+        if method == "POST" and action == "cancel":
+            self.jobs.cancel(job.id)
+            return self.json_response(200, {"job": job.summary()})
+        if method == "POST" and action == "approve":
+            try:
+                resumed = self.jobs.approve(job.id, str(payload.get("token", "")), bool(payload.get("approve", False)))
+            except JobQueueFull as e:
+                return self.json_response(429, {"error": str(e)}, [("Retry-After", "5")])
+            if resumed is None:
+                return self.json_response(409, {"error": "no matching pending approval", "job": job.summary()})
+            return self.json_response(202, {"job": resumed.summary()})
+        return Response(404, b"Not Found")
+
+    def handle(self, method: str, path: str, headers: Dict[str, str], body: bytes = b"") -> Union[Response, StreamResponse]:
+        resp = self._route(method, path, headers, body)
+        if isinstance(resp, Response):
+            return compress_response(resp, headers)
+        return resp
+
+    def _route(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Union[Response, StreamResponse]:
+        route = urlparse(path).path
+        if method == "GET":
+            return self._get(route, path, headers)
+        if method == "POST":
             try:
-                payload = json.loads(data.decode("utf-8"))
+                payload = json.loads(body.decode("utf-8") or "{}") if route != "/api/cancel" else {}
             except Exception:
-                self._send(400, b"Bad JSON", "text/plain")
-                return
+                return Response(400, b"Bad JSON", "text/plain")
+            if not isinstance(payload, dict):
+                return Response(400, b"Bad JSON", "text/plain")
+            return self._post(route, path, headers, payload)
+        return Response(405, b"Method Not Allowed", "text/plain")
+
+    def _get(self, route: str, path: str, headers: Dict[str, str]) -> Union[Response, StreamResponse]:
+        if route == "/" or route.startswith("/index"):
+            return INDEX_ASSET.response(headers)
+        if route in STREAM_ROUTES:
+            qs = parse_qs(urlparse(path).query)
+            last_id = headers.get("last-event-id") or (qs.get("last_event_id") or [None])[0]
+            if last_id is not None or route == "/api/events":
+                # EventSource reconnect (or explicit resume): replay, never start a new run
+                sess, extra, err = self._session(path, headers)
+                if err is not None:
+                    return err
+                try:
+                    after = int(last_id) if last_id is not None else 0
+                except ValueError:
+                    after = 0
+                channel = self._channel(sess)
+                if not channel.running and channel.last_id <= after:
+                    # Nothing to replay or follow; 204 stops EventSource from reconnecting
+                    return Response(204, b"", "text/plain", extra)
+                return StreamResponse(self, sess, after_id=after, headers=extra)
+            sess, extra, err = self._locked_session(path, headers)
+            if err is not None:
+                return err
+            orch = sess.orch
+            self._channel(sess)
+            store = self._results(sess)
+            if route == "/api/approve_stream":
+                token = (qs.get("token") or [""])[0]
+                approve = (qs.get("approve") or [""])[0].lower() in {"1", "true", "yes"}
+
+                def run(emit: Callable[[str, Any], Any]) -> None:
+                    sink = SSESink(emit, store, orch.config.serve_tool_preview)
+                    result = orch.resolve_approval(token, approve, sink=sink)
+                    # The tool result itself went out as a tool_result event
+                    sink.send('approval_result', {"token": token, **{k: v for k, v in result.items() if k != "result"}})
+                    # Same continuation as /api/approve, but streamed
+                    if result.get("approved") and not orch.has_pending_approval():
+                        orch.chat_stream("", sink=sink)
+                    sink.send('done', {})
+            else:
+                text = (qs.get("q") or [""])[0]
+
+                def run(emit: Callable[[str, Any], Any]) -> None:
+                    sink = SSESink(emit, store, orch.config.serve_tool_preview)
+                    orch.chat_stream(text, sink=sink)
+                    sink.send('done', {})
+
+            return StreamResponse(self, sess, run, headers=extra)
+        if route == "/api/auto_approve":
+            sess, extra, err = self._session(path, headers)
+            return err or self.json_response(200, {"auto_approve": sess.auto_approve}, extra)
+        if route == "/api/cancel":
+            return self._cancel(path, headers)
+        if route == "/api/sessions":
+            return self.json_response(200, self.sessions.stats())
+        if route == "/api/stats":
+            return self.json_response(200, self.stats())
+        if route.startswith("/api/tool_result/"):
+            return self._tool_result(route, path)
+        if route == "/metrics":
+            return Response(200, self.metrics_text(), metrics.CONTENT_TYPE)
+        if route == "/api/jobs" or route.startswith("/api/jobs/"):
+            return self._jobs("GET", route, path, {})
+        return Response(404, b"Not Found")
+
+    def _post(self, route: str, path: str, headers: Dict[str, str], payload: Dict[str, Any]) -> Response:
+        if route == "/api/chat":
             text = str(payload.get("input", ""))
-            class WebSink(EventRecorder):
-                def __init__(self, auto_approve: bool) -> None:
-                    super().__init__()
-                    self.auto_approve = auto_approve
-                def on_approval_required(self, tool, tool_id, reason, args, token=None):
-                    if self.auto_approve:
-                        self.events.append({"type": "approval", "tool": tool, "id": tool_id, "reason": reason, "args": args, "token": token, "auto": True})
-                        return True
-                    return super().on_approval_required(tool, tool_id, reason, args, token)
-
-            sink = WebSink(Handler.auto_approve)
-            Handler.orch.chat_once(text, sink=sink)
-            pending = Handler.orch.get_pending_info()
-            body = json.dumps({"events": sink.events, "pending": pending}).encode("utf-8")
-            self._send(200, body, "application/json")
-            return
-        if self.path == "/api/approve":
-            length = int(self.headers.get("Content-Length", "0"))
-            data = self.rfile.read(length)
+            sess, extra, err = self._locked_session(path, headers)
+            if err is not None:
+                return err
             try:
-                payload = json.loads(data.decode("utf-8"))
-            except Exception:
-                self._send(400, b"Bad JSON", "text/plain")
-                return
+                sink = WebSink(sess.auto_approve)
+                sess.orch.chat_once(text, sink=sink)
+                pending = sess.orch.get_pending_info()
+            finally:
+                sess.lock.release()
+                sess.touch()
+            return self.json_response(200, {"events": sink.events, "pending": pending}, extra)
+        if route == "/api/approve":
             token = str(payload.get("token", ""))
             approve = bool(payload.get("approve", False))
-            sink = EventRecorder()
-            result = Handler.orch.resolve_approval(token, approve, sink=sink)
-            # If approved, continue one loop of reasoning
-            if result.get("approved"):
-                Handler.orch.chat_once("", sink=sink)
-            body = json.dumps({"result": result, "events": sink.events, "pending": Handler.orch.get_pending_info()}).encode("utf-8")
-            self._send(200, body, "application/json")
-            return
-        if self.path == "/api/auto_approve":
-            length = int(self.headers.get("Content-Length", "0"))
-            data = self.rfile.read(length)
+            sess, extra, err = self._locked_session(path, headers)
+            if err is not None:
+                return err
+            orch = sess.orch
             try:
-                payload = json.loads(data.decode("utf-8"))
-            except Exception:
-                self._send(400, b"Bad JSON", "text/plain")
-                return
+                sink = EventRecorder()
+                result = orch.resolve_approval(token, approve, sink=sink)
+                # If approved, continue one loop of reasoning (unless another call in the batch awaits approval)
+                if result.get("approved") and not orch.has_pending_approval():
+                    orch.chat_once("", sink=sink)
+                pending = orch.get_pending_info()
+            finally:
+                sess.lock.release()
+                sess.touch()
+            return self.json_response(200, {"result": result, "events": sink.events, "pending": pending}, extra)
+        if route == "/api/auto_approve":
+            sess, extra, err = self._session(path, headers)
+            if err is not None:
+                return err
             val = payload.get("auto_approve")
             if isinstance(val, bool):
-                Handler.auto_approve = val
-            body = json.dumps({"auto_approve": Handler.auto_approve}).encode("utf-8")
-            self._send(200, body, "application/json")
-            return
-        if self.path == "/api/cancel":
-            try:
-                Handler.orch.request_cancel()
-                body = json.dumps({"canceled": True}).encode("utf-8")
-                self._send(200, body, "application/json")
-            except Exception as e:
-                body = json.dumps({"canceled": False, "error": str(e)}).encode("utf-8")
-                self._send(500, body, "application/json")
+                sess.auto_approve = val
+            return self.json_response(200, {"auto_approve": sess.auto_approve}, extra)
+        if route == "/api/cancel":
+            return self._cancel(path, headers)
+        if route == "/api/jobs" or route.startswith("/api/jobs/"):
+            return self._jobs("POST", route, path, payload)
+        return Response(404, b"Not Found")
+
+
+def build_app(orch: Orchestrator) -> WebApp:
+    """WebApp whose sessions and jobs each get their own Orchestrator built like orch."""
+    cfg = orch.config
+
+    def factory() -> Orchestrator:
+        return Orchestrator(orch.provider, cfg)
+
+    jobs = None
+    if cfg.serve_job_workers > 0:
+        jobs = JobManager(factory, workers=cfg.serve_job_workers, max_queue=cfg.serve_job_queue, max_retained=cfg.serve_job_retain)
+    cache = getattr(orch.provider, "cache", None)
+    return WebApp(SessionPool(factory, max_sessions=cfg.serve_max_sessions, idle_timeout=cfg.serve_session_idle), jobs, cache if isinstance(cache, ResponseCache) else None)
+
+
+class Handler(BaseHTTPRequestHandler):
+    app: WebApp = None  # type: ignore
+    # Keep-alive for API calls; idle connections give their thread back after timeout
+    protocol_version = "HTTP/1.1"
+    timeout = 60
+
+    def _respond(self, method: str) -> None:
+        body = b""
+        if method == "POST":
+            body = self.rfile.read(int(self.headers.get("Content-Length", "0")))
+        headers = {k.lower(): v for k, v in self.headers.items()}
+        resp = Handler.app.handle(method, self.path, headers, body)
+        if isinstance(resp, StreamResponse):
+            self._stream(resp)
             return
-        self._send(404, b"Not Found")
+        self.send_response(resp.status)
+        self.send_header("Content-Type", resp.content_type)
+        self.send_header("Content-Length", str(len(resp.body)))
+        for k, v in resp.headers:
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(resp.body)
+
+    def _stream(self, resp: StreamResponse) -> None:
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            # No Content-Length: the stream ends when the connection closes
+            self.send_header("Connection", "close")
+            self.close_connection = True
+            for k, v in resp.headers:
+                self.send_header(k, v)
+            self.end_headers()
+        except Exception:
+            if resp.starts_run:
+                resp.session.lock.release()
+            raise
+
+        frames: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        resp.open(frames.put)
+        try:
+            while True:
+                try:
+                    frame = frames.get(timeout=SSE_HEARTBEAT)
+                except queue.Empty:
+                    frame = b": ping\n\n"  # also detects a client that went away
+                if frame is None:
+                    break
+                self.wfile.write(frame)
+                self.wfile.flush()
+        except Exception:
+            pass
+        finally:
+            resp.close(frames.put)
+
+    def do_GET(self) -> None:  # noqa: N802
+        self._respond("GET")
+
+    def do_POST(self) -> None:  # noqa: N802
+        self._respond("POST")
 
 
 def serve(orch: Orchestrator, port: int = 8080) -> int:
-    Handler.orch = orch
+    if orch.config.serve_mode == "asyncio":
+        from .aioserver import serve_async
+        return serve_async(orch, port=port)
+    Handler.app = build_app(orch)
     server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
     print(f"Serving web UI on http://0.0.0.0:{port}")
     try:
@@ -443,4 +1174,5 @@ def serve(orch: Orchestrator, port: int = 8080) -> int:
         print("Shutting down...")
     finally:
         server.server_close()
+        Handler.app.close()
     return 0
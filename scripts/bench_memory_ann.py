@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Recall@k and latency of the IVF memory index against exact search.
+
+Builds a synthetic memory.vec per size (bag-of-words vectors over a
+Zipf-distributed vocabulary, hashed like _embed_local), trains the index,
+then for each nprobe reports recall@k against exact top-k and the mean
+query latency, including the exact rescoring of the probed rows.
+
+    python3 scripts/bench_memory_ann.py
+    python3 scripts/bench_memory_ann.py --sizes 100000 --nprobe 4,16,64 --dtype int8
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agentic.tools import vector_store  # noqa: E402
+from agentic.tools.ann import IVFIndex  # noqa: E402
+from agentic.tools.memory import _embed_local  # noqa: E402
+from agentic.tools.vector_store import VectorFile  # noqa: E402
+
+
+def _texts(rng: random.Random, n: int, vocab: int = 20000):
+    weights = [1.0 / (i + 1) for i in range(vocab)]
+    words = [f"w{i}" for i in range(vocab)]
+    for _ in range(n):
+        yield " ".join(rng.choices(words, weights, k=rng.randint(4, 30)))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="10000,100000")
+    ap.add_argument("--nprobe", default="1,4,8,16,32,64")
+    ap.add_argument("--dtype", choices=["float32", "int8"], default="float32")
+    ap.add_argument("--top-k", type=int, default=10)
+    ap.add_argument("--queries", type=int, default=50)
+    args = ap.parse_args()
+
+    if vector_store.np is None:
+        print("the IVF index needs numpy (pip install numpy)")
+        return 1
+    rng = random.Random(0)
+    k = args.top_k
+    print(f"dtype: {args.dtype}  k: {k}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in (int(x) for x in args.sizes.split(",")):
+            vf = VectorFile(Path(tmp) / f"bench-{n}.vec", 256, args.dtype)
+            vf.rewrite(_embed_local(t) for t in _texts(rng, n))
+            queries = [_embed_local(t) for t in _texts(rng, args.queries)]
+            rows = list(range(n))
+            with vf.reader() as r:
+                started = time.perf_counter()
+                index = IVFIndex(Path(tmp) / f"bench-{n}.ann")
+                index.sync(r)
+                build = time.perf_counter() - started
+                stats = index.stats()
+                print(f"\nrows {n}: built {stats['lists']} lists in {build:.1f}s (largest {stats['largest_list']})")
+
+                started = time.perf_counter()
+                exact = [{i for _, i in r.top_k(q, rows, k)} for q in queries]
+                exact_ms = (time.perf_counter() - started) * 1000 / len(queries)
+                print(f"{'nprobe':>8} {'recall@' + str(k):>10} {'ms/query':>10} {'scanned':>9}")
+                print(f"{'exact':>8} {1.0:10.3f} {exact_ms:10.2f} {1.0:9.1%}")
+                for nprobe in (int(x) for x in args.nprobe.split(",")):
+                    hits = scanned = 0
+                    started = time.perf_counter()
+                    for q, truth in zip(queries, exact):
+                        cand = index.candidates(q, nprobe)
+                        scanned += len(cand)
+                        found = {cand[i] for _, i in r.top_k(q, cand, k)}
+                        hits += len(found & truth)
+                    ms = (time.perf_counter() - started) * 1000 / len(queries)
+                    print(f"{nprobe:>8} {hits / (k * len(queries)):10.3f} {ms:10.2f} {scanned / (n * len(queries)):9.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
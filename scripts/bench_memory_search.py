@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Queries/second of memory_search scoring: batched top-k vs the original search.
+
+Builds synthetic hashed bag-of-words vectors (like _embed_local produces)
+for each size, stored both ways:
+
+- old: memory.jsonl with an inline "vec" list per entry, searched the way
+  memory_search was before the sidecar: every query parses the file, scores
+  each vec with _cos and sorts all the scores. Entries are streamed rather
+  than all kept, so 1M rows fit in memory; the work per query is the same.
+- new: memory.vec scored by VectorReader.top_k (batched, partial top-k).
+
+    python3 scripts/bench_memory_search.py
+    python3 scripts/bench_memory_search.py --sizes 10000,100000 --dtype int8
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import math
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agentic.tools import vector_store  # noqa: E402
+from agentic.tools.memory import DIM, _cos  # noqa: E402
+from agentic.tools.vector_store import VectorFile  # noqa: E402
+
+
+def _vector(rng: random.Random, words: int) -> list:
+    vec = [0.0] * DIM
+    for _ in range(words):
+        vec[rng.randrange(DIM)] += 1.0
+    norm = math.sqrt(sum(x * x for x in vec)) or 1.0
+    return [x / norm for x in vec]
+
+
+def _vectors(rng: random.Random, n: int, jsonl):
+    """Yields n vectors, writing each as a legacy memory.jsonl entry if jsonl is given."""
+    with jsonl.open("w", encoding="utf-8") if jsonl else contextlib.nullcontext() as f:
+        for i in range(n):
+            vec = _vector(rng, rng.randint(3, 40))
+            if f:
+                f.write(json.dumps({"id": str(i), "text": "", "tags": [], "vec": vec}) + "\n")
+            yield vec
+
+
+def _old(jsonl: Path, q, k):
+    scored = []
+    with jsonl.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                e = json.loads(line)
+            except Exception:
+                continue
+            scored.append((_cos(q, e.pop("vec")), e))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return scored[:k]
+
+
+def _qps(fn, queries, budget: float) -> float:
+    done, started = 0, time.perf_counter()
+    while True:
+        fn(queries[done % len(queries)])
+        done += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= budget or done >= len(queries) * 20:
+            return done / elapsed
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="10000,100000,1000000")
+    ap.add_argument("--dtype", choices=["float32", "int8"], default="float32")
+    ap.add_argument("--top-k", type=int, default=5)
+    ap.add_argument("--seconds", type=float, default=3.0, help="time budget per measurement")
+    ap.add_argument("--no-old", action="store_true", help="skip the original search (slow, and a ~1.5GB memory.jsonl, at 1M)")
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    queries = [_vector(rng, 4) for _ in range(16)]
+    print(f"numpy: {'yes' if vector_store.np is not None else 'no'}  dtype: {args.dtype}  dim: {DIM}")
+    print(f"{'rows':>10} {'old q/s':>10} {'new q/s':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in (int(x) for x in args.sizes.split(",")):
+            jsonl = None if args.no_old else Path(tmp) / f"bench-{n}.jsonl"
+            vf = VectorFile(Path(tmp) / f"bench-{n}.vec", DIM, args.dtype)
+            vf.rewrite(_vectors(rng, n, jsonl))
+            rows = list(range(n))
+            with vf.reader() as r:
+                new = _qps(lambda q: r.top_k(q, rows, args.top_k), queries, args.seconds)
+            old = _qps(lambda q: _old(jsonl, q, args.top_k), queries, args.seconds) if jsonl else None
+            if jsonl:
+                jsonl.unlink()
+            old_s = f"{old:10.2f}" if old else f"{'-':>10}"
+            ratio = f"{new / old:7.1f}x" if old else f"{'-':>8}"
+            print(f"{n:>10} {old_s} {new:10.1f} {ratio}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,123 @@
+import json
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from agentic.providers.anthropic_provider import AnthropicProvider
+from agentic.providers.transport import HTTPTransport
+
+
+def _frame(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8")
+
+
+STREAM = [
+    {"type": "message_start", "message": {"id": "msg_1", "type": "message", "role": "assistant", "model": "claude-test", "content": [], "stop_reason": None, "usage": {"input_tokens": 12, "output_tokens": 1}}},
+    {"type": "content_block_start", "index": 0, "content_block": {"type": "thinking", "thinking": ""}},
+    {"type": "content_block_delta", "index": 0, "delta": {"type": "thinking_delta", "thinking": "Need the "}},
+    {"type": "content_block_delta", "index": 0, "delta": {"type": "thinking_delta", "thinking": "file."}},
+    {"type": "content_block_delta", "index": 0, "delta": {"type": "signature_delta", "signature": "c2ln"}},
+    {"type": "content_block_stop", "index": 0},
+    {"type": "content_block_start", "index": 1, "content_block": {"type": "text", "text": ""}},
+    {"type": "content_block_delta", "index": 1, "delta": {"type": "text_delta", "text": "Reading "}},
+    {"type": "content_block_delta", "index": 1, "delta": {"type": "text_delta", "text": "it now."}},
+    {"type": "content_block_stop", "index": 1},
+    {"type": "ping"},
+    {"type": "content_block_start", "index": 2, "content_block": {"type": "tool_use", "id": "toolu_1", "name": "read_file", "input": {}}},
+    {"type": "content_block_delta", "index": 2, "delta": {"type": "input_json_delta", "partial_json": ""}},
+    {"type": "content_block_delta", "index": 2, "delta": {"type": "input_json_delta", "partial_json": '{"path": "no'}},
+    {"type": "content_block_delta", "index": 2, "delta": {"type": "input_json_delta", "partial_json": 'tes.txt"}'}},
+    {"type": "content_block_stop", "index": 2},
+    {"type": "message_delta", "delta": {"stop_reason": "tool_use", "stop_sequence": None}, "usage": {"output_tokens": 42}},
+    {"type": "message_stop"},
+]
+
+
+@contextmanager
+def _serve(body):
+    """A stand-in Messages API on 127.0.0.1 that answers every POST with body as SSE."""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            requests.append((self.path, json.loads(self.rfile.read(int(self.headers["Content-Length"])))))
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", requests
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _stream(body):
+    with _serve(body) as (url, requests):
+        provider = AnthropicProvider("test-key", base_url=url, transport=HTTPTransport())
+        events = list(provider.generate_stream([{"role": "system", "content": "sys"}, {"role": "user", "content": "hi"}], "claude-test", request_timeout=5))
+    return events, requests
+
+
+def test_stream_yields_deltas_and_rebuilds_the_message():
+    events, requests = _stream(b"".join(_frame(e) for e in STREAM))
+    path, sent = requests[0]
+    assert path == "/v1/messages"
+    assert sent["stream"] is True and sent["system"] == "sys" and sent["messages"] == [{"role": "user", "content": "hi"}]
+
+    assert events[:-1] == [
+        {"event": "delta", "reasoning": "Need the "},
+        {"event": "delta", "reasoning": "file."},
+        {"event": "delta", "text": "Reading "},
+        {"event": "delta", "text": "it now."},
+    ]
+    final = events[-1]
+    assert final["event"] == "final"
+    assert final["content"] == "Reading it now."
+    assert final["reasoning"] == "Need the file."
+    assert final["tool_calls"] == [{"id": "toolu_1", "tool": "read_file", "args": {"path": "notes.txt"}}]
+
+    raw = final["raw"]
+    assert raw["id"] == "msg_1" and raw["stop_reason"] == "tool_use"
+    assert raw["usage"] == {"input_tokens": 12, "output_tokens": 42}
+    assert raw["content"] == [
+        {"type": "thinking", "thinking": "Need the file.", "signature": "c2ln"},
+        {"type": "text", "text": "Reading it now."},
+        {"type": "tool_use", "id": "toolu_1", "name": "read_file", "input": {"path": "notes.txt"}},
+    ]
+    assert "error" not in raw
+
+
+def test_stream_error_event_ends_the_stream():
+    error = {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}}
+    body = b"".join(_frame(e) for e in STREAM[:2] + [STREAM[6], STREAM[7], error] + STREAM[8:])
+    events, _ = _stream(body)
+    assert events[:-1] == [{"event": "delta", "text": "Reading "}]
+    final = events[-1]
+    assert final["content"] == "Reading " and final["tool_calls"] == []
+    assert final["raw"]["error"] == {"type": "overloaded_error", "message": "Overloaded"}
+
+
+def test_stream_reports_a_malformed_frame():
+    body = _frame(STREAM[0]) + b"event: content_block_delta\ndata: {not json\n\n" + b"".join(_frame(e) for e in STREAM[6:10] + STREAM[-1:])
+    events, _ = _stream(body)
+    final = events[-1]
+    assert final["content"] == "Reading it now."
+    assert final["raw"]["error"]["type"] == "invalid_event"
+
+
+def test_stream_reports_a_failed_request():
+    with _serve(b"") as (url, _):
+        pass  # closed again: nothing listens on the port any more
+    provider = AnthropicProvider("test-key", base_url=url, transport=HTTPTransport())
+    events = list(provider.generate_stream([{"role": "user", "content": "hi"}], "claude-test", request_timeout=5))
+    assert len(events) == 1 and events[0]["content"] == ""
+    assert events[0]["raw"]["error"]["type"] == "transport_error"
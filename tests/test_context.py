@@ -0,0 +1,71 @@
+import json
+
+from agentic.config import AppConfig
+from agentic.context import ContextManager
+from agentic.events import EventRecorder
+from agentic.orchestrator import Orchestrator
+
+
+TASK = "Task: summarize notes.txt"
+
+
+class ScriptedProvider:
+    """Returns the scripted replies in order and records every prompt."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.prompts = []
+
+    def generate(self, messages, **kwargs):
+        self.prompts.append([m["content"] for m in messages])
+        return self.replies.pop(0)
+
+
+def _tool(tool_id, tool, **args):
+    return json.dumps({"type": "tool", "tool": tool, "id": tool_id, "args": args})
+
+
+def _orchestrator(tmp_path, replies, budget=1500):
+    (tmp_path / "notes.txt").write_text("x" * 6000)
+    config = AppConfig(workspace_root=tmp_path, config_dir=tmp_path / ".agentic", log_dir=tmp_path / "logs", context_budget=budget, tool_cache=False, max_steps=20)
+    provider = ScriptedProvider(replies)
+    return Orchestrator(provider, config), provider
+
+
+def test_first_request_survives_reprompts(tmp_path):
+    reads = [_tool(f"t{i}", "read_file", path="notes.txt") for i in range(8)]
+    replies = reads[:4] + ["not json"] + reads[4:] + ["still not json", json.dumps({"type": "final", "content": "done"})]
+    orch, provider = _orchestrator(tmp_path, replies)
+    assert orch.run("summarize notes.txt") == "done"
+    assert orch.last_context_stats["dropped"] > 0
+    for prompt in provider.prompts:
+        assert TASK in prompt
+    # the reprompt is not mistaken for the request once old turns are dropped
+    assert provider.prompts[-1][1] == TASK
+
+
+def test_first_request_survives_approval_continuation(tmp_path):
+    reads = [_tool(f"t{i}", "read_file", path="notes.txt") for i in range(6)]
+    replies = reads + [_tool("w1", "write_file", path="out.txt", content="y")] + reads + [json.dumps({"type": "final", "content": "ok"})]
+    orch, provider = _orchestrator(tmp_path, replies)
+    orch.run("summarize notes.txt", sink=EventRecorder())  # defers approvals like the web UI
+    pending = orch.get_pending_info()
+    assert pending and pending["tool"] == "write_file"
+    orch.resolve_approval(pending["token"], False, sink=EventRecorder())
+    # the UI continues with an empty user message after a decision
+    assert orch.chat_once("", sink=EventRecorder()) == "ok"
+    assert orch.last_context_stats["dropped"] > 0
+    for prompt in provider.prompts:
+        assert TASK in prompt
+
+
+def test_follow_up_request_is_pinned_with_the_first():
+    messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "Task: first"}]
+    messages += [{"role": "user", "content": "TOOL_RESULT[t%d]: %s" % (i, "r" * 2000)} for i in range(5)]
+    messages += [{"role": "user", "content": "Please respond with valid JSON per protocol."}, {"role": "user", "content": "second question"}]
+    messages += [{"role": "user", "content": "TOOL_RESULT[t9]: " + "r" * 2000}]
+    out, stats = ContextManager(300).fit(messages, "gpt-4o", requests=[1, 8])
+    contents = [m["content"] for m in out]
+    assert "Task: first" in contents and "second question" in contents
+    assert "Please respond with valid JSON per protocol." not in contents
+    assert contents[-1].startswith("TOOL_RESULT[t9]")